@@ -1,12 +1,37 @@
 ﻿import os
-from typing import Optional
+import json
+import re
+import base64
+import hashlib
+import time
+import asyncio
+import traceback
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
-import requests
+import httpx
+
+from conversation import ConversationStore, Message, Session
+from metrics import (
+    ENCODE_LATENCY,
+    METRICS_CONTENT_TYPE,
+    REQUEST_LATENCY,
+    ServerTiming,
+    render_metrics,
+    track_upstream,
+)
+from reply_cache import ReplyCache, reply_key
+from resilience import DeadlineExceeded, RetryBudget, UpstreamPolicy, deadline_scope, upstream_timeout
+from state_backend import make_backend
+from tts_cache import TTSCache, cache_key, normalize_text
 
 ENV_PATH = Path(__file__).resolve().parent / ".env"
 load_dotenv(dotenv_path=ENV_PATH)
@@ -19,79 +44,526 @@ MURF_API_KEY: Optional[str] = os.getenv("MURF_API_KEY")
 if not GROQ_API_KEY or not MURF_API_KEY:
     raise RuntimeError("Missing GROQ_API_KEY/GROK_API_KEY or MURF_API_KEY.")
 
+# Old clients expect a base64 data URL inside the JSON; new ones fetch /audio/{id}.
+# Set INLINE_AUDIO_BASE64=1 (or send "inline_audio": true) to keep the old field.
+INLINE_AUDIO_BASE64 = os.getenv("INLINE_AUDIO_BASE64", "0").lower() in ("1", "true", "yes")
+
+# Reply caching is opt-in (REPLY_CACHE=1) and can be overridden per request,
+# e.g. switched off for traffic that rarely repeats
+REPLY_CACHE_ENABLED = os.getenv("REPLY_CACHE", "0").lower() in ("1", "true", "yes")
+
 class ChatRequest(BaseModel):
     message: str
+    inline_audio: Optional[bool] = None
+    # Omit to start a new conversation; the response carries the ID to reuse
+    session_id: Optional[str] = None
+    use_reply_cache: Optional[bool] = None
+
+    def wants_inline_audio(self) -> bool:
+        return INLINE_AUDIO_BASE64 if self.inline_audio is None else self.inline_audio
+
+    def wants_reply_cache(self) -> bool:
+        return REPLY_CACHE_ENABLED if self.use_reply_cache is None else self.use_reply_cache
 
 class ChatResponse(BaseModel):
     reply: str
-    audio_base64: str
+    session_id: str
+    audio_id: str
+    audio_url: str
+    audio_base64: Optional[str] = None
+
+# One pooled client per upstream host, so each host gets its own connection limits
+# and keep-alive connections are reused across requests instead of paying TCP+TLS
+# setup on every call. Created and closed by the app lifespan.
+http_clients: Dict[str, httpx.AsyncClient] = {}
+
+# Point these at loadtest/standin.py to benchmark without touching the live APIs
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com")
+MURF_BASE_URL = os.getenv("MURF_BASE_URL", "https://api.murf.ai")
+
+# Per-call ceilings; each call is further clipped to what the request deadline leaves
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30"))
+MURF_TIMEOUT = float(os.getenv("MURF_TIMEOUT", "60"))
+# Wall-clock budget for one /chat request or one streamed reply, both upstreams included
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "20"))
+
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "60"))
+
+try:
+    import h2  # noqa: F401  (httpx only needs it to be importable)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def make_upstream_client(base_url: str, timeout: float) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=base_url,
+        http2=HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(timeout, connect=5.0),
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    http_clients["groq"] = make_upstream_client(GROQ_BASE_URL, timeout=GROQ_TIMEOUT)
+    http_clients["murf"] = make_upstream_client(MURF_BASE_URL, timeout=MURF_TIMEOUT)
+    try:
+        yield
+    finally:
+        for client in http_clients.values():
+            await client.aclose()
+        http_clients.clear()
+
 
-app = FastAPI(title="Groq + Murf Voice Agent (Fast)")
+app = FastAPI(title="Groq + Murf Voice Agent (Fast)", lifespan=lifespan)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 # ✅ Smaller, faster model
 GROQ_MODEL = "llama-3.1-8b-instant"
+GROQ_URL = "/openai/v1/chat/completions"
+SYSTEM_PROMPT = "You are a friendly, fast voice assistant. Reply in 1–2 short sentences."
+MURF_URL = "/v1/speech/generate"
+# Everything in here changes the synthesized audio, so it is all part of the cache key
+MURF_VOICE = {
+    "voiceId": "en-US-natalie",
+    "format": "MP3",
+    "modelVersion": "GEN2",
+    "channelType": "MONO",
+    "sampleRate": 44100,
+}
 
+tts_cache = TTSCache(
+    max_memory_bytes=int(os.getenv("TTS_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+    disk_dir=Path(os.getenv("TTS_CACHE_DIR", Path(__file__).resolve().parent / ".tts_cache")),
+    max_disk_bytes=int(os.getenv("TTS_CACHE_DISK_MB", "512")) * 1024 * 1024,
+)
 
-def call_groq_llm(user_message: str) -> str:
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
+# "memory" keeps reply cache + conversations in this process; "sqlite" shares
+# them between all workers on the host (see serve.py)
+state_backend = make_backend(
+    os.getenv("STATE_BACKEND", "memory").lower(),
+    db_path=Path(os.getenv("STATE_DB_PATH", Path(__file__).resolve().parent / ".state" / "voice_agent.db")),
+    max_entries={
+        "reply": int(os.getenv("REPLY_CACHE_MAX_ENTRIES", "5000")),
+        "session": int(os.getenv("MAX_SESSIONS", "10000")),
+    },
+)
+
+reply_cache = ReplyCache(state_backend, ttl=float(os.getenv("REPLY_CACHE_TTL", "600")))
+
+conversations = ConversationStore(
+    state_backend,
+    token_budget=int(os.getenv("SESSION_TOKEN_BUDGET", "1200")),
+    keep_recent=int(os.getenv("SESSION_KEEP_RECENT_MESSAGES", "4")),
+    idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "1800")),
+)
+SUMMARY_PROMPT = (
+    "Update the running summary of a voice conversation. Keep names, facts the user "
+    "shared, preferences and open questions. Reply with the summary only, under 80 words."
+)
+# Keeps background compaction tasks referenced until they finish
+background_tasks: Set["asyncio.Task[None]"] = set()
+
+# Sentence end = . ! ? (optionally followed by quotes/brackets) and then whitespace
+SENTENCE_END = re.compile(r"""[.!?]+["')\]]*\s+""")
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key onto one shared task.
+
+    The first caller for a key starts the work; everyone arriving while it is
+    still running awaits the same result. The task is shielded, so one caller
+    disconnecting doesn't cancel the work the others are waiting on. When the
+    last caller waiting on it is cancelled, nobody needs the result any more
+    and the task is cancelled too; a later call for the key starts afresh.
+    """
+
+    def __init__(self, name: str, max_tracked_keys: int = 1000):
+        self.name = name
+        self.inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        # Callers currently awaiting each in-flight task
+        self.waiters: Dict["asyncio.Task[Any]", int] = {}
+        self.cancelled = 0
+        self.calls = 0
+        self.coalesced = 0
+        # Coalesced-request count per key, most recent keys only
+        self.per_key: "OrderedDict[str, int]" = OrderedDict()
+        self.max_tracked_keys = max_tracked_keys
+
+    def _record_coalesced(self, key: str) -> None:
+        self.coalesced += 1
+        self.per_key[key] = self.per_key.pop(key, 0) + 1
+        if len(self.per_key) > self.max_tracked_keys:
+            self.per_key.popitem(last=False)
+
+    @staticmethod
+    def _consume_exception(task: "asyncio.Task[Any]") -> None:
+        # Avoid "exception was never retrieved" when every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        # A cancelled task may finish after a new one took over its key
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self.inflight.get(key)
+        if task is not None:
+            self._record_coalesced(key)
+        else:
+            task = asyncio.create_task(fn())
+            self.inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            task.add_done_callback(self._consume_exception)
+        self.waiters[task] = self.waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self.waiters[task] == 1 and not task.done():
+                # Last one out: stop the upstream call instead of finishing it for nobody
+                self._forget(key, task)
+                task.cancel()
+                self.cancelled += 1
+            raise
+        finally:
+            self.waiters[task] -= 1
+            if not self.waiters[task]:
+                del self.waiters[task]
+
+    def stats(self) -> Dict:
+        top = sorted(self.per_key.items(), key=lambda kv: kv[1], reverse=True)[:20]
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "inflight": len(self.inflight),
+            "top_coalesced_keys": [{"key": k[:80], "coalesced": n} for k, n in top],
+        }
+
+
+llm_flight = SingleFlight("groq")
+tts_flight = SingleFlight("murf")
+
+# Retries and hedges may add at most ~RETRY_BUDGET_RATIO extra load per upstream.
+# Hedging is opt-in: it trades a little extra Groq spend for a shorter tail.
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "1"))
+groq_policy = UpstreamPolicy(
+    "groq",
+    budget=RetryBudget(RETRY_BUDGET_RATIO, max_tokens=10),
+    max_retries=MAX_RETRIES,
+    hedge=os.getenv("GROQ_HEDGE", "0").lower() in ("1", "true", "yes"),
+)
+murf_policy = UpstreamPolicy(
+    "murf",
+    budget=RetryBudget(RETRY_BUDGET_RATIO, max_tokens=10),
+    max_retries=MAX_RETRIES,
+)
+
+
+def normalize_message(message: str) -> str:
+    return normalize_text(message).lower()
+
+
+def prompt_key(messages: List[Message]) -> str:
+    """Single-flight key: identical normalized prompts (history included) coalesce."""
+    normalized = [[m["role"], normalize_message(m["content"])] for m in messages]
+    return hashlib.sha256(json.dumps(normalized).encode("utf-8")).hexdigest()
+
+
+def build_messages(session: Session, user_message: str) -> List[Message]:
+    return [*session.context(conversations.token_budget), {"role": "user", "content": user_message}]
+
+
+async def remember_turn(session: Session, user_message: str, reply_text: str) -> None:
+    session.add_turn(user_message, reply_text)
+    await conversations.save(session)
+    if conversations.needs_compaction(session):
+        # Summarize off the hot path; the next prompt is budget-trimmed meanwhile
+        task = asyncio.create_task(conversations.compact(session, summarize_turns))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+
+def groq_headers() -> dict:
+    return {
         "Authorization": f"Bearer {GROQ_API_KEY}",
         "Content-Type": "application/json",
     }
-    payload = {
+
+
+def groq_payload(messages: List[Message], stream: bool) -> dict:
+    return {
         "model": GROQ_MODEL,
         "messages": [
             {
                 "role": "system",
-                "content": "You are a friendly, fast voice assistant. Reply in 1–2 short sentences.",
-            },
-            {
-                "role": "user",
-                "content": user_message,
+                "content": SYSTEM_PROMPT,
             },
+            *messages,
         ],
-        "stream": False,
+        "stream": stream,
         "temperature": 0.5,
         # ✅ Limit length to reduce latency
         "max_tokens": 96,
     }
 
-    resp = requests.post(url, headers=headers, json=payload, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    return data["choices"][0]["message"]["content"]
 
+async def call_groq_llm(messages: List[Message], use_cache: bool = False) -> str:
+    url = GROQ_URL
+    headers = groq_headers()
+    payload = groq_payload(messages, stream=False)
+    key = reply_key(payload)
+    if use_cache:
+        cached = await reply_cache.get(key)
+        if cached is not None:
+            return cached
+
+    async def attempt(timeout: float) -> str:
+        async with track_upstream("groq"):
+            resp = await http_clients["groq"].post(url, headers=headers, json=payload, timeout=timeout)
+            resp.raise_for_status()
+        data = resp.json()
+        return data["choices"][0]["message"]["content"]
+
+    reply = await groq_policy.call(attempt, GROQ_TIMEOUT)
+    if use_cache:
+        await reply_cache.put(key, reply)
+    return reply
 
-def call_murf_tts(text: str) -> str:
-    url = "https://api.murf.ai/v1/speech/generate"
+
+async def summarize_turns(summary: str, turns: List[Message]) -> str:
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": f"Current summary: {summary or '(none)'}\n\nNew turns:\n{transcript}"},
+        ],
+        "stream": False,
+        "temperature": 0.2,
+        "max_tokens": 150,
+    }
+    async with track_upstream("groq_summary"):
+        resp = await http_clients["groq"].post(GROQ_URL, headers=groq_headers(), json=payload)
+        resp.raise_for_status()
+    return resp.json()["choices"][0]["message"]["content"].strip()
+
+
+async def fetch_murf_audio(text: str) -> bytes:
+    url = MURF_URL
     headers = {
         "api-key": MURF_API_KEY,
         "Content-Type": "application/json",
     }
     payload = {
         "text": text,
-        "voiceId": "en-US-natalie",
-        "format": "MP3",
+        **MURF_VOICE,
         "encodeAsBase64": True,
-        "modelVersion": "GEN2",
-        "channelType": "MONO",
-        "sampleRate": 44100,
     }
 
-    resp = requests.post(url, headers=headers, json=payload, timeout=60)
-    resp.raise_for_status()
-    data = resp.json()
-    encoded_audio = data.get("encodedAudio")
-    if not encoded_audio:
-        raise RuntimeError("Murf response did not contain encodedAudio")
-    return "data:audio/mp3;base64," + encoded_audio
+    async def attempt(timeout: float) -> bytes:
+        async with track_upstream("murf"):
+            resp = await http_clients["murf"].post(url, headers=headers, json=payload, timeout=timeout)
+            resp.raise_for_status()
+        data = resp.json()
+        encoded_audio = data.get("encodedAudio")
+        if not encoded_audio:
+            raise RuntimeError("Murf response did not contain encodedAudio")
+        return base64.b64decode(encoded_audio)
+
+    # No hedging here: Murf bills per character, so a duplicate costs real money
+    return await murf_policy.call(attempt, MURF_TIMEOUT)
+
+
+async def synthesize_audio(text: str) -> Tuple[str, bytes]:
+    """Return (audio_id, mp3 bytes); the ID is the content-addressed cache key."""
+    key = cache_key(text, MURF_VOICE)
+
+    async def cached_synthesis() -> bytes:
+        audio = await tts_cache.get(key)
+        if audio is None:
+            audio = await fetch_murf_audio(text)
+            await tts_cache.put(key, audio)
+        return audio
+
+    return key, await tts_flight.do(key, cached_synthesis)
+
+
+def to_data_url(audio: bytes) -> str:
+    with ENCODE_LATENCY.labels(stage="base64").time():
+        return "data:audio/mp3;base64," + base64.b64encode(audio).decode("ascii")
+
+
+async def call_murf_tts(text: str) -> str:
+    _, audio = await synthesize_audio(text)
+    return to_data_url(audio)
+
+
+def audio_fields(audio_id: str, audio: bytes, inline: bool) -> dict:
+    fields = {"audio_id": audio_id, "audio_url": f"/audio/{audio_id}"}
+    if inline:
+        fields["audio_base64"] = to_data_url(audio)
+    return fields
+
+
+async def stream_groq_llm(messages: List[Message]) -> AsyncIterator[str]:
+    """Yield content deltas from Groq's OpenAI-compatible SSE stream."""
+    payload = groq_payload(messages, stream=True)
+    # Streams are not hedged or retried once tokens flow; the deadline still caps each read
+    timeout = upstream_timeout("groq_stream", GROQ_TIMEOUT)
+    async with track_upstream("groq_stream"), \
+            http_clients["groq"].stream("POST", GROQ_URL, headers=groq_headers(), json=payload, timeout=timeout) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or []
+            if not choices:
+                continue
+            delta = choices[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+async def llm_deltas(messages: List[Message], use_cache: bool) -> AsyncIterator[str]:
+    """Streamed reply text, served whole from the reply cache when possible."""
+    key = reply_key(groq_payload(messages, stream=True))
+    if use_cache:
+        cached = await reply_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+    parts = []
+    async for delta in stream_groq_llm(messages):
+        parts.append(delta)
+        yield delta
+    if use_cache:
+        await reply_cache.put(key, "".join(parts))
+
+
+async def split_sentences(deltas: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Regroup token deltas into whole sentences as soon as each one ends."""
+    buffer = ""
+    async for delta in deltas:
+        buffer += delta
+        match = SENTENCE_END.search(buffer)
+        while match:
+            sentence = buffer[:match.end()].strip()
+            if sentence:
+                yield sentence
+            buffer = buffer[match.end():]
+            match = SENTENCE_END.search(buffer)
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def reply_pipeline(messages: List[Message], use_cache: bool = False) -> AsyncIterator[Tuple[str, int, Any]]:
+    """Pipeline Groq sentences into Murf and yield events in sentence order.
+
+    Yields ``("text", index, sentence)`` the moment Groq finishes a sentence and
+    its Murf job starts in the background, then ``("audio", index, (audio_id,
+    audio))`` in order as soon as the head of the queue is ready, without
+    waiting for later ones. Closing or cancelling the generator cancels any
+    Murf jobs still running.
+    """
+    pending = []
+    index = 0
+    try:
+        async for sentence in split_sentences(llm_deltas(messages, use_cache)):
+            yield "text", index, sentence
+            pending.append((index, asyncio.create_task(synthesize_audio(sentence))))
+            index += 1
+            while pending and pending[0][1].done():
+                i, task = pending.pop(0)
+                yield "audio", i, task.result()
+        while pending:
+            i, task = pending[0]
+            result = await task
+            pending.pop(0)
+            yield "audio", i, result
+    finally:
+        # Client went away, barged in or something failed: don't leave Murf jobs running.
+        # Waiting for them lets the cancellation reach the single-flight task behind each one.
+        for _, task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+
+
+async def chat_event_stream(
+    session: Session, user_message: str, inline_audio: bool, use_cache: bool
+) -> AsyncIterator[str]:
+    sentences = []
+    yield sse_event("session", {"session_id": session.session_id})
+    try:
+        with deadline_scope(REQUEST_DEADLINE):
+            async for kind, index, payload in reply_pipeline(build_messages(session, user_message), use_cache):
+                if kind == "text":
+                    sentences.append(payload)
+                    yield sse_event("text", {"index": index, "text": payload})
+                else:
+                    yield sse_event("audio", {"index": index, **audio_fields(*payload, inline_audio)})
+        await remember_turn(session, user_message, " ".join(sentences))
+        yield sse_event("done", {"sentences": len(sentences)})
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        try:
+            response = await call_next(request)
+        except httpx.HTTPError as e:
+            # Answered here rather than by Starlette, so it still gets its Server-Timing
+            response = JSONResponse(status_code=502, content={"detail": f"upstream error: {e!r}"})
+        except Exception:
+            traceback.print_exc()
+            response = JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
+        # Set by handlers that time their stages; errors and deadline 504s included
+        timing = getattr(request.state, "server_timing", None)
+        if timing is not None:
+            response.headers["Server-Timing"] = timing.header()
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, so /audio/{id} stays one series
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            route=getattr(route, "path", "unmatched"), status=str(status)
+        ).observe(time.perf_counter() - start)
 
 
 @app.get("/")
@@ -99,8 +571,226 @@ def root():
     return {"status": "ok", "message": "Groq + Murf voice agent backend running (fast model)"}
 
 
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "pid": os.getpid(),
+        "state_backend": state_backend.name,
+        "tts_cache": tts_cache.stats(),
+        "reply_cache": {"enabled": REPLY_CACHE_ENABLED, **(await reply_cache.stats())},
+        "single_flight": {"llm": llm_flight.stats(), "tts": tts_flight.stats()},
+        "conversations": await conversations.stats(),
+        "upstream_policies": {"groq": groq_policy.stats(), "murf": murf_policy.stats()},
+    }
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single "bytes=start-end" range into inclusive offsets.
+
+    Returns None for anything we don't serve partially (multi-range, bad units),
+    in which case the full body is sent, and raises 416 when out of bounds.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_s, _, end_s = spec.strip().partition("-")
+    try:
+        if start_s:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+        else:
+            # Suffix range: last N bytes
+            start = max(size - int(end_s), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+@app.get("/audio/{audio_id}")
+async def get_audio(
+    audio_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+):
+    if not re.fullmatch(r"[0-9a-f]{64}", audio_id):
+        raise HTTPException(status_code=404, detail="Unknown audio id")
+    etag = f'"{audio_id}"'
+    # Audio IDs are content hashes, so a given URL never changes
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    audio = await tts_cache.get(audio_id)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio expired or unknown")
+
+    byte_range = parse_range(range_header, len(audio)) if range_header else None
+    if byte_range is None:
+        return Response(content=audio, media_type="audio/mpeg", headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(audio)}"
+    return Response(content=audio[start:end + 1], status_code=206, media_type="audio/mpeg", headers=headers)
+
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    reply_text = call_groq_llm(req.message)
-    audio_data_url = call_murf_tts(reply_text)
-    return ChatResponse(reply=reply_text, audio_base64=audio_data_url)
+async def chat(req: ChatRequest, request: Request):
+    # The header is added by record_request_latency, whatever the outcome
+    timing = request.state.server_timing = ServerTiming()
+    session = await conversations.load(req.session_id)
+    messages = build_messages(session, req.message)
+    with deadline_scope(REQUEST_DEADLINE):
+        with timing.stage("llm"):
+            reply_text = await llm_flight.do(
+                prompt_key(messages), lambda: call_groq_llm(messages, req.wants_reply_cache())
+            )
+        await remember_turn(session, req.message, reply_text)
+        with timing.stage("tts"):
+            audio_id, audio = await synthesize_audio(reply_text)
+    with timing.stage("encode"):
+        result = ChatResponse(reply=reply_text, session_id=session.session_id, **audio_fields(audio_id, audio, req.wants_inline_audio()))
+        with ENCODE_LATENCY.labels(stage="json").time():
+            body = json.dumps(jsonable_encoder(result))
+    return Response(content=body, media_type="application/json")
+
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    session = await conversations.load(req.session_id)
+    return StreamingResponse(
+        chat_event_stream(session, req.message, req.wants_inline_audio(), req.wants_reply_cache()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class CallConnection:
+    """One /ws call: at most one reply turn in flight, cancelled on barge-in.
+
+    Client -> server (JSON text frames):
+        {"type": "transcript", "text": "...", "turn_id": "optional", "use_reply_cache": optional bool}
+        {"type": "cancel"}                       # user barged in
+    Server -> client:
+        {"type": "text", "turn_id", "index", "text"}
+        {"type": "audio", "turn_id", "index", "audio_id", "bytes"} followed by
+            one binary frame with the raw MP3 for that sentence
+        {"type": "done" | "cancelled", "turn_id"}
+        {"type": "error", "turn_id", "detail"}
+    """
+
+    def __init__(self, websocket: WebSocket, session: Session):
+        self.websocket = websocket
+        self.session = session
+        self.turn: Optional["asyncio.Task[None]"] = None
+        self.turn_count = 0
+        # The JSON header and binary body of an audio frame must not interleave
+        # with another send, so every send goes through this lock
+        self.send_lock = asyncio.Lock()
+
+    async def send_json(self, message: dict) -> None:
+        async with self.send_lock:
+            await self.websocket.send_json(message)
+
+    async def send_audio(self, header: dict, audio: bytes) -> None:
+        async with self.send_lock:
+            await self.websocket.send_json(header)
+            await self.websocket.send_bytes(audio)
+
+    async def run_turn(self, turn_id: str, message: str, use_cache: bool) -> None:
+        sentences = []
+        try:
+            with deadline_scope(REQUEST_DEADLINE):
+                async for kind, index, payload in reply_pipeline(build_messages(self.session, message), use_cache):
+                    if kind == "text":
+                        sentences.append(payload)
+                        await self.send_json({"type": "text", "turn_id": turn_id, "index": index, "text": payload})
+                    else:
+                        audio_id, audio = payload
+                        header = {"type": "audio", "turn_id": turn_id, "index": index, "audio_id": audio_id, "bytes": len(audio)}
+                        await self.send_audio(header, audio)
+            await self.send_json({"type": "done", "turn_id": turn_id})
+        except asyncio.CancelledError:
+            # Barged in: the user still heard (part of) what was generated so far;
+            # saving is awaited, so hand it off rather than delay the cancellation
+            task = asyncio.create_task(remember_turn(self.session, message, " ".join(sentences)))
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+            raise
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            await self.send_json({"type": "error", "turn_id": turn_id, "detail": str(e)})
+        else:
+            await remember_turn(self.session, message, " ".join(sentences))
+
+    async def cancel_turn(self) -> None:
+        turn, self.turn = self.turn, None
+        if turn is None or turn.done():
+            return
+        turn.cancel()
+        try:
+            await turn
+        except asyncio.CancelledError:
+            pass
+        await self.send_json({"type": "cancelled", "turn_id": turn.get_name()})
+
+    async def start_turn(self, message: str, turn_id: Optional[str], use_cache: bool) -> None:
+        # A new transcript while the agent is still talking is a barge-in
+        await self.cancel_turn()
+        self.turn_count += 1
+        turn_id = turn_id or str(self.turn_count)
+        self.turn = asyncio.create_task(self.run_turn(turn_id, message, use_cache), name=turn_id)
+
+    async def serve(self) -> None:
+        try:
+            while True:
+                frame = await self.websocket.receive()
+                if frame["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code", 1000))
+                if frame.get("text") is None:
+                    # receive_text() would raise KeyError on a binary frame and drop the call
+                    await self.send_json({"type": "error", "detail": "binary frames are not accepted; send JSON text frames"})
+                    continue
+                try:
+                    message = json.loads(frame["text"])
+                    kind = message.get("type")
+                except (ValueError, AttributeError):
+                    await self.send_json({"type": "error", "detail": "messages must be JSON objects"})
+                    continue
+                if kind == "transcript" and str(message.get("text", "")).strip():
+                    turn_id = message.get("turn_id")
+                    use_cache = message.get("use_reply_cache")
+                    await self.start_turn(
+                        message["text"],
+                        str(turn_id) if turn_id is not None else None,
+                        REPLY_CACHE_ENABLED if use_cache is None else bool(use_cache),
+                    )
+                elif kind == "cancel":
+                    await self.cancel_turn()
+                else:
+                    await self.send_json({"type": "error", "detail": f"unsupported message type: {kind}"})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if self.turn is not None:
+                self.turn.cancel()
+
+
+@app.websocket("/ws")
+async def call_socket(websocket: WebSocket, session_id: Optional[str] = None):
+    await websocket.accept()
+    session = await conversations.load(session_id)
+    await websocket.send_json({"type": "session", "session_id": session.session_id})
+    await CallConnection(websocket, session).serve()
@@ -0,0 +1,123 @@
+"""Per-session conversation memory with a hard prompt-token budget.
+
+Each session keeps a rolling summary plus the most recent turns. Once the
+turns outgrow the budget, the oldest ones are folded into the summary by a
+background summarization call; until that finishes, the prompt is trimmed
+from the oldest end so it never exceeds the budget. Sessions live in the
+shared state backend, which expires idle ones after a TTL and caps their
+number LRU-style, so memory stays flat no matter how many callers come and go.
+"""
+
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from state_backend import StateBackend
+
+Message = Dict[str, str]
+
+# Summarizer gets (previous summary, turns to fold in) and returns the new summary
+Summarizer = Callable[[str, List[Message]], Awaitable[str]]
+
+NAMESPACE = "session"
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English, plus per-message framing overhead
+    return len(text) // 4 + 4
+
+
+@dataclass
+class Session:
+    session_id: str
+    summary: str = ""
+    turns: List[Message] = field(default_factory=list)
+    compactions: int = 0
+
+    def add_turn(self, user_text: str, assistant_text: str) -> None:
+        self.turns.append({"role": "user", "content": user_text})
+        if assistant_text:
+            self.turns.append({"role": "assistant", "content": assistant_text})
+
+    def turn_tokens(self) -> int:
+        return sum(estimate_tokens(m["content"]) for m in self.turns)
+
+    def context(self, budget: int) -> List[Message]:
+        """Summary + as many recent turns as fit in ``budget`` tokens, oldest first."""
+        messages: List[Message] = []
+        used = 0
+        for message in reversed(self.turns):
+            cost = estimate_tokens(message["content"])
+            if used + cost > budget:
+                break
+            messages.append(message)
+            used += cost
+        messages.reverse()
+        if self.summary:
+            summary_message = {"role": "system", "content": f"Summary of the conversation so far: {self.summary}"}
+            if used + estimate_tokens(summary_message["content"]) <= budget:
+                messages.insert(0, summary_message)
+        return messages
+
+
+class ConversationStore:
+    def __init__(self, backend: StateBackend, token_budget: int, keep_recent: int, idle_ttl: float):
+        self.backend = backend
+        self.token_budget = token_budget
+        # Messages always kept verbatim; only older ones are summarized
+        self.keep_recent = keep_recent
+        self.idle_ttl = idle_ttl
+        # Sessions this process is summarizing right now
+        self.compacting: Set[str] = set()
+        self.counters = {"created": 0, "compactions": 0, "compaction_errors": 0}
+
+    async def load(self, session_id: Optional[str]) -> Session:
+        data = await self.backend.get(NAMESPACE, session_id) if session_id else None
+        if data is None:
+            self.counters["created"] += 1
+            return Session(session_id=session_id or uuid.uuid4().hex)
+        # Copy, so in-process backends never share lists with a live Session
+        return Session(
+            session_id=data["session_id"],
+            summary=data["summary"],
+            turns=[dict(m) for m in data["turns"]],
+            compactions=data["compactions"],
+        )
+
+    async def save(self, session: Session) -> None:
+        # Every save pushes the idle expiry out again
+        await self.backend.set(NAMESPACE, session.session_id, asdict(session), ttl=self.idle_ttl)
+
+    def needs_compaction(self, session: Session) -> bool:
+        return (
+            session.session_id not in self.compacting
+            and len(session.turns) > self.keep_recent
+            and session.turn_tokens() > self.token_budget
+        )
+
+    async def compact(self, session: Session, summarize: Summarizer) -> None:
+        """Fold all but the most recent turns into the session summary."""
+        if not self.needs_compaction(session):
+            return
+        self.compacting.add(session.session_id)
+        old = session.turns[: len(session.turns) - self.keep_recent]
+        try:
+            summary = await summarize(session.summary, old)
+            # Another request (or worker) may have saved new turns meanwhile;
+            # apply the fold to the latest copy if it still starts with ``old``
+            latest = await self.load(session.session_id)
+            if latest.turns[: len(old)] == old:
+                for target in (session, latest):
+                    target.summary = summary
+                    del target.turns[: len(old)]
+                    target.compactions += 1
+                await self.save(latest)
+                self.counters["compactions"] += 1
+        except Exception:
+            # Keep the turns; context() still trims them to the budget
+            self.counters["compaction_errors"] += 1
+        finally:
+            self.compacting.discard(session.session_id)
+
+    async def stats(self) -> Dict:
+        return {**self.counters, "active": await self.backend.count(NAMESPACE)}
@@ -0,0 +1,101 @@
+"""Open-loop load generator for the Day-1 /chat endpoint.
+
+Requests are fired on a fixed schedule at the target rate whether or not
+earlier ones have finished, so a slow backend shows up as higher latency
+instead of silently lowering the offered load.
+
+    python loadtest/loadgen.py --url http://127.0.0.1:8000/chat --rps 20 --duration 30
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+DEFAULT_MESSAGES = [
+    "hi",
+    "what can you do",
+    "tell me a fun fact about space",
+    "how is the weather usually in spring",
+    "give me a quick productivity tip",
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def one_request(client: httpx.AsyncClient, url: str, message: str, results: List[Dict]) -> None:
+    start = time.perf_counter()
+    status: Optional[int] = None
+    error: Optional[str] = None
+    try:
+        resp = await client.post(url, json={"message": message})
+        status = resp.status_code
+        await resp.aread()
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    results.append({"latency": time.perf_counter() - start, "status": status, "error": error})
+
+
+async def run(url: str, rps: float, duration: float, messages: List[str], unique: bool, timeout: float) -> Dict:
+    results: List[Dict] = []
+    interval = 1 / rps
+    total = int(rps * duration)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        tasks = []
+        start = time.perf_counter()
+        for i, message in zip(range(total), itertools.cycle(messages)):
+            # Sleep until this request's slot, not "interval after the last one"
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if unique:
+                message = f"{message} (#{i})"
+            tasks.append(asyncio.create_task(one_request(client, url, message, results)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    ok = sorted(r["latency"] for r in results if r["status"] == 200)
+    statuses: Dict[str, int] = {}
+    for r in results:
+        label = str(r["status"]) if r["status"] is not None else r["error"]
+        statuses[label] = statuses.get(label, 0) + 1
+    return {
+        "target_rps": rps,
+        "sent": len(results),
+        "succeeded": len(ok),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ok, 50) * 1000, 1),
+        "p95_ms": round(percentile(ok, 95) * 1000, 1),
+        "p99_ms": round(percentile(ok, 99) * 1000, 1),
+        "max_ms": round(ok[-1] * 1000, 1) if ok else 0.0,
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/chat")
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--timeout", type=float, default=90)
+    parser.add_argument("--message", action="append", dest="messages", help="repeatable; defaults to a small built-in set")
+    parser.add_argument("--unique", action="store_true", help="make every message distinct to defeat caching/coalescing")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.url, args.rps, args.duration, args.messages or DEFAULT_MESSAGES, args.unique, args.timeout))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
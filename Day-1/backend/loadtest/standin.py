@@ -0,0 +1,145 @@
+"""Local stand-in for the Groq and Murf APIs used by app.py.
+
+Serves the OpenAI-compatible ``/openai/v1/chat/completions`` endpoint (plain
+and ``"stream": true``) and Murf's ``/v1/speech/generate`` with configurable
+latency, error rate and payload size, so /chat can be benchmarked repeatably.
+
+    python loadtest/standin.py --port 9000 --groq-latency-ms 250 --murf-latency-ms 600
+
+then start the backend with
+GROQ_BASE_URL=http://127.0.0.1:9000 MURF_BASE_URL=http://127.0.0.1:9000.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLY_WORDS = (
+    "sure thing happy to help with that right away here is a quick answer "
+    "for you and let me know if there is anything else you need today"
+).split()
+
+config = {
+    "groq_latency_ms": 250.0,
+    "groq_sigma": 0.35,
+    "groq_error_rate": 0.0,
+    "groq_token_ms": 8.0,
+    "reply_words": 24,
+    "murf_latency_ms": 600.0,
+    "murf_sigma": 0.35,
+    "murf_error_rate": 0.0,
+    "audio_bytes_per_char": 400,
+    "seed": None,
+}
+
+app = FastAPI(title="Groq + Murf stand-in")
+rng = random.Random()
+
+
+def sample_latency(median_ms: float, sigma: float) -> float:
+    """Log-normal latency in seconds: median_ms at the 50th percentile, sigma sets the tail."""
+    if median_ms <= 0:
+        return 0.0
+    return median_ms * math.exp(sigma * rng.gauss(0, 1)) / 1000
+
+
+def should_fail(rate: float) -> bool:
+    return rate > 0 and rng.random() < rate
+
+
+def fake_reply(n_words: int) -> str:
+    words = [rng.choice(REPLY_WORDS) for _ in range(n_words)]
+    # Two sentences, so the streaming endpoint has something to split
+    half = max(1, n_words // 2)
+    first = " ".join(words[:half]).capitalize() + "."
+    second = " ".join(words[half:]).capitalize() + "." if words[half:] else ""
+    return f"{first} {second}".strip()
+
+
+def error_response(service: str) -> JSONResponse:
+    return JSONResponse({"error": f"{service} stand-in injected failure"}, status_code=503)
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await asyncio.sleep(sample_latency(config["groq_latency_ms"], config["groq_sigma"]))
+    if should_fail(config["groq_error_rate"]):
+        return error_response("groq")
+
+    reply = fake_reply(config["reply_words"])
+    model = body.get("model", "stand-in")
+    created = int(time.time())
+
+    if not body.get("stream"):
+        return {
+            "id": "chatcmpl-standin",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+        }
+
+    async def events():
+        # The sleep above stands in for time-to-first-token; tokens then trickle out
+        for i, word in enumerate(reply.split(" ")):
+            delta = word if i == 0 else " " + word
+            chunk = {
+                "id": "chatcmpl-standin",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(config["groq_token_ms"] / 1000)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/speech/generate")
+async def speech_generate(request: Request):
+    body = await request.json()
+    await asyncio.sleep(sample_latency(config["murf_latency_ms"], config["murf_sigma"]))
+    if should_fail(config["murf_error_rate"]):
+        return error_response("murf")
+
+    text = body.get("text", "")
+    audio = os.urandom(max(1, len(text)) * config["audio_bytes_per_char"])
+    return {
+        "encodedAudio": base64.b64encode(audio).decode("ascii"),
+        "audioLengthInSeconds": round(len(text) / 15, 2),
+        "consumedCharacterCount": len(text),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    for key, default in config.items():
+        flag = "--" + key.replace("_", "-")
+        kind = int if key in ("reply_words", "audio_bytes_per_char", "seed") else float
+        parser.add_argument(flag, type=kind, default=default)
+    args = parser.parse_args()
+
+    for key in config:
+        config[key] = getattr(args, key)
+    if config["seed"] is not None:
+        rng.seed(config["seed"])
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Prometheus metrics and per-request Server-Timing for the voice agent backend."""
+
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, List, Tuple
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Upstream calls are 100 ms - several seconds; encoding is sub-millisecond to a few ms
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0, 60.0)
+ENCODE_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+UPSTREAM_LATENCY = Histogram(
+    "voice_agent_upstream_seconds",
+    "Latency of calls to Groq and Murf",
+    ["upstream"],
+    buckets=UPSTREAM_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "voice_agent_upstream_errors_total",
+    "Failed calls to Groq and Murf, by failure kind",
+    ["upstream", "kind"],
+)
+ENCODE_LATENCY = Histogram(
+    "voice_agent_encode_seconds",
+    "Time spent base64- and JSON-encoding responses",
+    ["stage"],
+    buckets=ENCODE_BUCKETS,
+)
+REQUEST_LATENCY = Histogram(
+    "voice_agent_request_seconds",
+    "Total time spent handling a request",
+    ["route", "status"],
+    buckets=UPSTREAM_BUCKETS,
+)
+
+DEADLINE_EXCEEDED = Counter(
+    "voice_agent_deadline_exceeded_total",
+    "Upstream calls skipped or aborted because the request deadline ran out",
+    ["upstream"],
+)
+RETRIES = Counter(
+    "voice_agent_upstream_retries_total",
+    "Retries of failed upstream calls",
+    ["upstream"],
+)
+RETRY_BUDGET_EXHAUSTED = Counter(
+    "voice_agent_retry_budget_exhausted_total",
+    "Retries or hedges skipped because the retry budget was empty",
+    ["upstream"],
+)
+HEDGES = Counter(
+    "voice_agent_hedged_requests_total",
+    "Duplicate upstream requests sent because the first one was slow",
+    ["upstream"],
+)
+HEDGE_WINS = Counter(
+    "voice_agent_hedge_wins_total",
+    "Hedged requests that answered before the original",
+    ["upstream"],
+)
+HEDGE_DELAY = Gauge(
+    "voice_agent_hedge_delay_seconds",
+    "Current adaptive (p95-based) delay before a hedge is sent",
+    ["upstream"],
+)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def render_metrics() -> bytes:
+    return generate_latest()
+
+
+def error_kind(exc: BaseException) -> str:
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"http_{exc.response.status_code}"
+    if isinstance(exc, httpx.TransportError):
+        return "transport"
+    return "other"
+
+
+@asynccontextmanager
+async def track_upstream(upstream: str) -> AsyncIterator[None]:
+    """Time one upstream call and count it as an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        UPSTREAM_ERRORS.labels(upstream=upstream, kind=error_kind(e)).inc()
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(upstream=upstream).observe(time.perf_counter() - start)
+
+
+class ServerTiming:
+    """Collects stage durations for one request and renders a Server-Timing header."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def header(self) -> str:
+        stages = self.stages + [("total", time.perf_counter() - self.start)]
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages)
@@ -0,0 +1,56 @@
+"""Opt-in cache of Groq replies for repeated small talk.
+
+Keyed on the full Groq payload - model, system prompt, sampling parameters
+and the conversation messages - with message text normalized so "Hi!",
+"hi" and " hi  there" vs "hi there" collapse onto one entry. Entries live in
+the shared state backend, which expires them after a TTL and caps the
+namespace size, least recently used first.
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, Optional
+
+from state_backend import StateBackend
+from tts_cache import normalize_text
+
+NAMESPACE = "reply"
+
+TRAILING_PUNCTUATION = re.compile(r"[\s.!?,;:]+$")
+
+
+def normalize_for_cache(text: str) -> str:
+    return TRAILING_PUNCTUATION.sub("", normalize_text(text).lower())
+
+
+def reply_key(payload: Dict) -> str:
+    material = {k: v for k, v in payload.items() if k not in ("messages", "stream")}
+    material["messages"] = [[m["role"], normalize_for_cache(m["content"])] for m in payload["messages"]]
+    blob = json.dumps(material, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ReplyCache:
+    def __init__(self, backend: StateBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        # Per-process counters
+        self.counters = {"hits": 0, "misses": 0}
+
+    async def get(self, key: str) -> Optional[str]:
+        reply = await self.backend.get(NAMESPACE, key)
+        self.counters["hits" if reply is not None else "misses"] += 1
+        return reply
+
+    async def put(self, key: str, reply: str) -> None:
+        if reply:
+            await self.backend.set(NAMESPACE, key, reply, ttl=self.ttl)
+
+    async def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": await self.backend.count(NAMESPACE),
+        }
@@ -0,0 +1,194 @@
+"""Request deadlines, retry budgets and hedged upstream calls.
+
+A deadline is set once per request (``deadline_scope``) and read through a
+context variable, so every upstream call underneath - including ones running
+in single-flight tasks - clips its timeout to the time the request has left.
+
+``UpstreamPolicy`` wraps one upstream: it retries transient failures while a
+shared retry budget allows it, and can hedge, i.e. fire a duplicate request
+once the first has been outstanding longer than the recent p95 latency and
+take whichever answers first.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+import httpx
+
+from metrics import DEADLINE_EXCEEDED, HEDGE_DELAY, HEDGE_WINS, HEDGES, RETRIES, RETRY_BUDGET_EXHAUSTED
+
+T = TypeVar("T")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[None]:
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def upstream_timeout(upstream: str, default: float) -> float:
+    """The per-call timeout: ``default``, clipped to what the request has left."""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        DEADLINE_EXCEEDED.labels(upstream=upstream).inc()
+        raise DeadlineExceeded(f"no time left for {upstream} call")
+    return min(default, left)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)  # includes timeouts
+
+
+class LatencyTracker:
+    """Sliding window of recent successful latencies."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class RetryBudget:
+    """Token bucket: every request earns ``ratio`` of a retry, capped at ``max_tokens``.
+
+    Retries and hedges spend whole tokens, so extra load stays around ``ratio``
+    of normal traffic even when an upstream is failing hard.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class UpstreamPolicy:
+    def __init__(
+        self,
+        name: str,
+        budget: RetryBudget,
+        max_retries: int = 1,
+        hedge: bool = False,
+        initial_hedge_delay: float = 1.0,
+        min_hedge_delay: float = 0.05,
+    ):
+        self.name = name
+        self.budget = budget
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.latency = LatencyTracker()
+
+    def hedge_delay(self) -> float:
+        p95 = self.latency.quantile(0.95)
+        delay = self.initial_hedge_delay if p95 is None else max(self.min_hedge_delay, p95)
+        HEDGE_DELAY.labels(upstream=self.name).set(delay)
+        return delay
+
+    async def _attempt(self, fn: Callable[[float], Awaitable[T]], default_timeout: float) -> T:
+        timeout = upstream_timeout(self.name, default_timeout)
+        start = time.monotonic()
+        try:
+            result = await fn(timeout)
+        except httpx.TimeoutException as e:
+            left = remaining()
+            if left is not None and left <= 0:
+                DEADLINE_EXCEEDED.labels(upstream=self.name).inc()
+                raise DeadlineExceeded(f"{self.name} call ran past the request deadline") from e
+            raise
+        self.latency.observe(time.monotonic() - start)
+        return result
+
+    async def _hedged(self, fn: Callable[[float], Awaitable[T]], default_timeout: float) -> T:
+        delay = self.hedge_delay()
+        primary = asyncio.create_task(self._attempt(fn, default_timeout))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            left = remaining()
+            # Not worth a duplicate if it could not finish in time anyway
+            if (left is not None and left <= delay) or not self.budget.try_spend():
+                return await primary
+            HEDGES.labels(upstream=self.name).inc()
+            hedge = asyncio.create_task(self._attempt(fn, default_timeout))
+            tasks.add(hedge)
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            HEDGE_WINS.labels(upstream=self.name).inc()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self, fn: Callable[[float], Awaitable[T]], default_timeout: float) -> T:
+        """Run ``fn(timeout)`` under the deadline, with hedging and budgeted retries."""
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                if self.hedge:
+                    return await self._hedged(fn, default_timeout)
+                return await self._attempt(fn, default_timeout)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                if not self.budget.try_spend():
+                    RETRY_BUDGET_EXHAUSTED.labels(upstream=self.name).inc()
+                    raise
+                attempt += 1
+                RETRIES.labels(upstream=self.name).inc()
+
+    def stats(self) -> Dict:
+        return {
+            "hedging": self.hedge,
+            "hedge_delay_s": round(self.hedge_delay(), 3) if self.hedge else None,
+            "retry_tokens": round(self.budget.tokens, 2),
+            "latency_samples": len(self.latency.samples),
+        }
@@ -0,0 +1,65 @@
+"""Run the backend with several worker processes.
+
+    python serve.py --workers 4 --port 8000
+
+On Linux/macOS this starts gunicorn with uvicorn workers and ``preload_app``:
+``app.py`` is imported once in the master (env, prompts, cache objects) and
+the workers are forked from it. On Windows, where gunicorn does not run, it
+falls back to ``uvicorn --workers``, which imports the app in every worker.
+
+With more than one worker the reply cache and conversations must be shared,
+so ``STATE_BACKEND`` defaults to ``sqlite`` (file at ``STATE_DB_PATH``). The
+TTS disk cache is already shared through ``TTS_CACHE_DIR``. Request
+coalescing, retry budgets and ``/metrics`` stay per worker.
+"""
+
+import argparse
+import os
+import sys
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--timeout", type=int, default=60, help="seconds before gunicorn restarts a stuck worker")
+    return parser.parse_args()
+
+
+def run_gunicorn(args: argparse.Namespace) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self) -> None:
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("preload_app", True)
+            self.cfg.set("timeout", args.timeout)
+            # Long-lived /ws and SSE calls get time to finish on reload/shutdown
+            self.cfg.set("graceful_timeout", args.timeout)
+
+        def load(self):
+            from app import app
+
+            return app
+
+    Server().run()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.workers > 1:
+        os.environ.setdefault("STATE_BACKEND", "sqlite")
+    print(f"Starting {args.workers} worker(s), state backend: {os.getenv('STATE_BACKEND', 'memory')}")
+    if sys.platform == "win32":
+        import uvicorn
+
+        uvicorn.run("app:app", host=args.host, port=args.port, workers=args.workers)
+    else:
+        run_gunicorn(args)
+
+
+if __name__ == "__main__":
+    main()
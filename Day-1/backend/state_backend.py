@@ -0,0 +1,165 @@
+"""Pluggable key/value state shared by the reply cache and conversation store.
+
+``InProcessBackend`` keeps everything in this process (single worker).
+``SQLiteBackend`` keeps it in a WAL-mode SQLite file, so every uvicorn or
+gunicorn worker on the host sees the same caches and conversations.
+
+Values are JSON-serializable objects. Both backends namespace keys, expire
+entries after a per-entry TTL and cap each namespace at ``max_entries``,
+dropping the least recently used entries first.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class StateBackend:
+    name = "base"
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    async def count(self, namespace: str) -> int:
+        raise NotImplementedError
+
+
+class InProcessBackend(StateBackend):
+    name = "memory"
+
+    def __init__(self, max_entries: Dict[str, int]):
+        self.max_entries = max_entries
+        self.namespaces: Dict[str, "OrderedDict[str, Tuple[Optional[float], Any]]"] = {}
+
+    def _ns(self, namespace: str) -> "OrderedDict[str, Tuple[Optional[float], Any]]":
+        return self.namespaces.setdefault(namespace, OrderedDict())
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        entries = self._ns(namespace)
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.time():
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return value
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        entries = self._ns(namespace)
+        entries[key] = (time.time() + ttl if ttl is not None else None, value)
+        entries.move_to_end(key)
+        limit = self.max_entries.get(namespace)
+        while limit is not None and len(entries) > limit:
+            entries.popitem(last=False)
+
+    async def delete(self, namespace: str, key: str) -> None:
+        self._ns(namespace).pop(key, None)
+
+    async def count(self, namespace: str) -> int:
+        return len(self._ns(namespace))
+
+
+class SQLiteBackend(StateBackend):
+    name = "sqlite"
+
+    # Expired/over-limit rows are cleaned up every this many writes, not on every one
+    MAINTENANCE_EVERY = 200
+
+    def __init__(self, path: Path, max_entries: Dict[str, int]):
+        self.path = path
+        self.max_entries = max_entries
+        self.local = threading.local()
+        self.writes = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Connections are opened lazily per thread, so it is safe to construct
+        # this before gunicorn forks its workers
+        self._initialized = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._initialized:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS kv ("
+                    " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                    " expires_at REAL, accessed_at REAL NOT NULL,"
+                    " PRIMARY KEY (namespace, key))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS kv_lru ON kv (namespace, accessed_at)")
+                self._initialized = True
+            self.local.conn = conn
+        return conn
+
+    def _get(self, namespace: str, key: str) -> Optional[Any]:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value FROM kv WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, now),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE kv SET accessed_at = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+        return json.loads(row[0])
+
+    def _set(self, namespace: str, key: str, value: Any, ttl: Optional[float]) -> None:
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, ensure_ascii=False), now + ttl if ttl is not None else None, now),
+        )
+        self.writes += 1
+        if self.writes % self.MAINTENANCE_EVERY == 0:
+            self._maintain(conn, now)
+
+    def _maintain(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        for namespace, limit in self.max_entries.items():
+            conn.execute(
+                "DELETE FROM kv WHERE namespace = ? AND key IN ("
+                " SELECT key FROM kv WHERE namespace = ? ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (namespace, namespace, limit),
+            )
+
+    def _delete(self, namespace: str, key: str) -> None:
+        self._conn().execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def _count(self, namespace: str) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM kv WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self._get, namespace, key)
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await asyncio.to_thread(self._set, namespace, key, value, ttl)
+
+    async def delete(self, namespace: str, key: str) -> None:
+        await asyncio.to_thread(self._delete, namespace, key)
+
+    async def count(self, namespace: str) -> int:
+        return await asyncio.to_thread(self._count, namespace)
+
+
+def make_backend(kind: str, db_path: Path, max_entries: Dict[str, int]) -> StateBackend:
+    if kind == "sqlite":
+        return SQLiteBackend(db_path, max_entries)
+    if kind == "memory":
+        return InProcessBackend(max_entries)
+    raise RuntimeError(f"Unknown STATE_BACKEND {kind!r}; use 'memory' or 'sqlite'.")
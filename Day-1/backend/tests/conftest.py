@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# app.py refuses to start without API keys; nothing here talks to the real APIs
+os.environ.setdefault("GROQ_API_KEY", "test-groq-key")
+os.environ.setdefault("MURF_API_KEY", "test-murf-key")
+os.environ.setdefault("TTS_CACHE_DIR", tempfile.mkdtemp(prefix="tts_cache_"))
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,68 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import app
+
+
+class _Socket:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send_json(self, message: dict) -> None:
+        self.sent.append(message)
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.sent.append(data)
+
+
+def test_cancel_stops_every_murf_request(monkeypatch) -> None:
+    running, cancelled = set(), set()
+
+    async def llm_deltas(messages, use_cache):
+        yield "Here is the first sentence. "
+        yield "And here is the second one. "
+        await asyncio.sleep(10)
+
+    async def fetch_murf_audio(text: str) -> bytes:
+        running.add(text)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.add(text)
+            raise
+        finally:
+            running.discard(text)
+        return b"mp3"
+
+    monkeypatch.setattr(app, "llm_deltas", llm_deltas)
+    monkeypatch.setattr(app, "fetch_murf_audio", fetch_murf_audio)
+
+    async def run() -> _Socket:
+        socket = _Socket()
+        connection = app.CallConnection(socket, await app.conversations.load(None))
+        await connection.start_turn("Tell me something", "t1", use_cache=False)
+        while len(running) < 2:
+            await asyncio.sleep(0.01)
+        # The user barges in
+        await connection.cancel_turn()
+        assert running == set() and app.tts_flight.inflight == {}
+        await asyncio.gather(*app.background_tasks, return_exceptions=True)
+        return socket
+
+    socket = asyncio.run(run())
+    assert cancelled == {"Here is the first sentence.", "And here is the second one."}
+    assert socket.sent[-1] == {"type": "cancelled", "turn_id": "t1"}
+
+
+def test_binary_frame_is_rejected_without_closing_the_call() -> None:
+    with TestClient(app.app).websocket_connect("/ws") as websocket:
+        assert websocket.receive_json()["type"] == "session"
+        websocket.send_bytes(b"\x00\x01")
+        assert websocket.receive_json() == {
+            "type": "error",
+            "detail": "binary frames are not accepted; send JSON text frames",
+        }
+        # The call is still up
+        websocket.send_json({"type": "ping"})
+        assert websocket.receive_json() == {"type": "error", "detail": "unsupported message type: ping"}
@@ -0,0 +1,23 @@
+import httpx
+from fastapi.testclient import TestClient
+
+import app
+from resilience import DeadlineExceeded
+
+
+def _post_chat(monkeypatch, llm_error: Exception) -> httpx.Response:
+    async def call_groq_llm(messages, use_cache=False):
+        raise llm_error
+
+    monkeypatch.setattr(app, "call_groq_llm", call_groq_llm)
+    return TestClient(app.app).post("/chat", json={"message": "Hello"})
+
+
+def test_error_responses_carry_server_timing(monkeypatch) -> None:
+    response = _post_chat(monkeypatch, DeadlineExceeded("no time left for groq call"))
+    assert response.status_code == 504
+    assert response.headers["Server-Timing"].startswith("llm;dur=")
+
+    response = _post_chat(monkeypatch, httpx.ConnectError("connection refused"))
+    assert response.status_code == 502
+    assert "total;dur=" in response.headers["Server-Timing"]
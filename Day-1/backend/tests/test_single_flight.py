@@ -0,0 +1,37 @@
+import asyncio
+
+from app import SingleFlight
+
+
+def test_shared_task_runs_until_the_last_waiter_leaves() -> None:
+    started, finished = [], []
+
+    async def synthesize() -> str:
+        started.append(1)
+        await asyncio.sleep(0.2)
+        finished.append(1)
+        return "audio"
+
+    async def run() -> None:
+        flight = SingleFlight("murf")
+        first = asyncio.create_task(flight.do("hello", synthesize))
+        second = asyncio.create_task(flight.do("hello", synthesize))
+        await asyncio.sleep(0.01)
+        assert started == [1] and flight.coalesced == 1
+
+        # One caller leaving does not stop the work the other one waits on
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert len(flight.inflight) == 1
+
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        assert flight.inflight == {} and flight.waiters == {} and flight.cancelled == 1
+        await asyncio.sleep(0.3)
+        assert finished == []
+
+        # The key starts afresh afterwards
+        assert await flight.do("hello", synthesize) == "audio"
+        assert started == [1, 1] and finished == [1]
+
+    asyncio.run(run())
@@ -0,0 +1,54 @@
+import asyncio
+import os
+
+from tts_cache import TTSCache
+
+
+def _clip(key: str) -> bytes:
+    return key.encode() * 10
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path) -> None:
+    keys = [f"{n:02d}" + "a" * 62 for n in range(4)]
+
+    async def run() -> TTSCache:
+        # Room for three 64-byte clips on disk, none in memory
+        cache = TTSCache(max_memory_bytes=0, disk_dir=tmp_path, max_disk_bytes=3 * 640)
+        for key in keys[:3]:
+            await cache.put(key, _clip(key))
+        # Reading the oldest clip makes the second one least recently used
+        assert await cache.get(keys[0]) == _clip(keys[0])
+        await cache.put(keys[3], _clip(keys[3]))
+        return cache
+
+    cache = asyncio.run(run())
+    on_disk = {path.stem for path in tmp_path.glob("*/*.mp3")}
+    assert on_disk == {keys[0], keys[2], keys[3]}
+    assert cache.stats()["disk_evictions"] == 1
+    assert cache.stats()["disk_bytes"] == 3 * 640
+
+
+def test_disk_index_is_rebuilt_from_mtimes(tmp_path) -> None:
+    keys = [f"{n:02d}" + "b" * 62 for n in range(3)]
+
+    async def fill() -> None:
+        cache = TTSCache(max_memory_bytes=0, disk_dir=tmp_path)
+        for key in keys:
+            await cache.put(key, _clip(key))
+
+    asyncio.run(fill())
+    # The first clip was read last by an earlier run
+    for age, key in zip((0, 30, 20), keys):
+        path = tmp_path / key[:2] / f"{key}.mp3"
+        os.utime(path, (path.stat().st_atime, path.stat().st_mtime - age))
+
+    async def restart() -> TTSCache:
+        cache = TTSCache(max_memory_bytes=0, disk_dir=tmp_path, max_disk_bytes=2 * 640)
+        assert cache.stats()["disk_entries"] == 3
+        await cache.put("zz" + "c" * 62, b"x" * 640)
+        return cache
+
+    cache = asyncio.run(restart())
+    on_disk = {path.stem for path in tmp_path.glob("*/*.mp3")}
+    assert on_disk == {keys[0], "zz" + "c" * 62}
+    assert cache.stats()["disk_evictions"] == 2
@@ -0,0 +1,184 @@
+"""Content-addressed cache for Murf TTS audio.
+
+Audio is keyed on a SHA-256 of the normalized text plus every Murf setting
+that changes the output (voice, format, sample rate, model version). Lookups
+go memory LRU -> disk -> miss; disk hits are promoted back into memory.
+
+The disk tier is capped at ``max_disk_bytes``. Its index is rebuilt from the
+clips' mtimes at startup, disk hits touch the clip, and the least recently
+used clips are deleted once a write goes over the cap. Workers sharing one
+directory each enforce the cap on their own view, so it is approximate.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    # Case and punctuation change prosody, so only whitespace is folded
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def cache_key(text: str, voice_settings: Dict) -> str:
+    material = {
+        "text": normalize_text(text),
+        "voiceId": voice_settings.get("voiceId"),
+        "format": voice_settings.get("format"),
+        "sampleRate": voice_settings.get("sampleRate"),
+        "modelVersion": voice_settings.get("modelVersion"),
+    }
+    blob = json.dumps(material, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, max_memory_bytes: int, disk_dir: Optional[Path], max_disk_bytes: Optional[int] = None):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_bytes = 0
+        # key -> clip size, least recently used first
+        self.disk: "OrderedDict[str, int]" = OrderedDict()
+        self.disk_bytes = 0
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+            "disk_errors": 0,
+        }
+        if disk_dir is not None:
+            disk_dir.mkdir(parents=True, exist_ok=True)
+            self._scan_disk()
+
+    def _scan_disk(self) -> None:
+        clips = []
+        for path in self.disk_dir.glob("*/*.mp3"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            clips.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(clips):
+            self.disk[key] = size
+            self.disk_bytes += size
+
+    def _disk_path(self, key: str) -> Path:
+        # Two-level fan-out keeps directories small
+        return self.disk_dir / key[:2] / f"{key}.mp3"
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.max_memory_bytes:
+            return
+        if key in self.memory:
+            self.memory_bytes -= len(self.memory.pop(key))
+        self.memory[key] = audio
+        self.memory_bytes += len(audio)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            self.counters["evictions"] += 1
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._disk_path(key)
+        try:
+            audio = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            # The mtime is the recency the index is rebuilt from
+            os.utime(path)
+        except OSError:
+            pass  # a read-only cache still serves hits
+        return audio
+
+    def _write_disk(self, key: str, audio: bytes) -> None:
+        path = self._disk_path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(audio)
+        # Atomic rename so a crash never leaves a truncated clip behind
+        os.replace(tmp, path)
+
+    def _delete_disk(self, keys: List[str]) -> None:
+        for key in keys:
+            try:
+                self._disk_path(key).unlink()
+            except FileNotFoundError:
+                pass  # evicted by another worker
+
+    def _index_disk(self, key: str, size: int) -> List[str]:
+        """Record a clip in the disk index and return the keys to evict."""
+        if key in self.disk:
+            self.disk_bytes -= self.disk.pop(key)
+        self.disk[key] = size
+        self.disk_bytes += size
+        victims = []
+        if self.max_disk_bytes is not None:
+            while self.disk_bytes > self.max_disk_bytes and len(self.disk) > 1:
+                victim, victim_size = self.disk.popitem(last=False)
+                self.disk_bytes -= victim_size
+                victims.append(victim)
+        self.counters["disk_evictions"] += len(victims)
+        return victims
+
+    async def get(self, key: str) -> Optional[bytes]:
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory.move_to_end(key)
+            self.counters["memory_hits"] += 1
+            return audio
+        if self.disk_dir is not None:
+            audio = await asyncio.to_thread(self._read_disk, key)
+            if audio is not None:
+                self._remember(key, audio)
+                if key in self.disk:
+                    self.disk.move_to_end(key)
+                else:
+                    # Written by another worker sharing the directory
+                    await self._evict_disk(self._index_disk(key, len(audio)))
+                self.counters["disk_hits"] += 1
+                return audio
+        self.counters["misses"] += 1
+        return None
+
+    async def put(self, key: str, audio: bytes) -> None:
+        self._remember(key, audio)
+        if self.disk_dir is not None:
+            try:
+                await asyncio.to_thread(self._write_disk, key, audio)
+            except OSError:
+                # A full or read-only disk only costs us the persistent copy
+                self.counters["disk_errors"] += 1
+                return
+            await self._evict_disk(self._index_disk(key, len(audio)))
+
+    async def _evict_disk(self, victims: List[str]) -> None:
+        if not victims:
+            return
+        try:
+            await asyncio.to_thread(self._delete_disk, victims)
+        except OSError:
+            self.counters["disk_errors"] += 1
+
+    def stats(self) -> Dict:
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+            "disk_entries": len(self.disk),
+            "disk_bytes": self.disk_bytes,
+        }
@@ -8,7 +8,29 @@ const input = document.getElementById("user-input");
 const sendBtn = document.getElementById("send-btn");
 
 // Backend endpoint
-const BACKEND_URL = "http://127.0.0.1:8000/chat";
+const BACKEND_BASE = "http://127.0.0.1:8000";
+const BACKEND_URL = BACKEND_BASE + "/chat";
+// Sentence-by-sentence SSE endpoint (first audio plays before the full reply is ready)
+const STREAM_URL = BACKEND_BASE + "/chat/stream";
+const USE_STREAMING = true;
+// One WebSocket per call: no per-turn request setup, and barge-in cancels the reply
+const WS_URL = BACKEND_BASE.replace(/^http/, "ws") + "/ws";
+const USE_WEBSOCKET = true;
+
+// Server-side conversation memory: reuse the session the backend handed us
+let sessionId = sessionStorage.getItem("voiceSessionId");
+
+function rememberSession(id) {
+  if (!id) return;
+  sessionId = id;
+  sessionStorage.setItem("voiceSessionId", id);
+}
+
+// Replies carry an audio URL; fall back to the inline data URL if the server sent one
+function audioSource(data) {
+  if (data.audio_url) return BACKEND_BASE + data.audio_url;
+  return data.audio_base64;
+}
 
 // ---- Voice input (SpeechRecognition) ----
 let recognition = null;
@@ -75,6 +97,11 @@ if ("SpeechRecognition" in window || "webkitSpeechRecognition" in window) {
     // Show partial text while user is speaking
     lastUserText.textContent = transcript;
 
+    // User started talking over the agent: stop the reply right away
+    if (USE_WEBSOCKET && (audioPlaying || currentTurn) && transcript.length > 3) {
+      bargeIn();
+    }
+
     const isFinal =
       event.results[event.results.length - 1].isFinal === true;
 
@@ -107,6 +134,7 @@ function startCall() {
 
 function endCall() {
   inCall = false;
+  if (socket) socket.close();
   try {
     recognition.stop();
   } catch (err) {
@@ -126,6 +154,174 @@ micBtn.addEventListener("click", () => {
   }
 });
 
+// ---- Ordered audio queue for streamed replies ----
+const audioQueue = [];
+let audioPlaying = false;
+let currentAudio = null;
+
+function enqueueAudio(src) {
+  audioQueue.push(src);
+  if (!audioPlaying) playNextAudio();
+}
+
+function playNextAudio() {
+  const src = audioQueue.shift();
+  if (!src) {
+    audioPlaying = false;
+    return;
+  }
+  audioPlaying = true;
+  const audio = new Audio(src);
+  currentAudio = audio;
+  const next = () => {
+    if (src.startsWith("blob:")) URL.revokeObjectURL(src);
+    if (currentAudio === audio) playNextAudio();
+  };
+  audio.onended = next;
+  audio.onerror = next;
+  audio.play().catch((err) => {
+    console.error("Audio play failed:", err);
+    statusText.textContent = "Audio blocked. Tap anywhere and speak again.";
+    playNextAudio();
+  });
+}
+
+function stopAudio() {
+  for (const src of audioQueue.splice(0)) {
+    if (src.startsWith("blob:")) URL.revokeObjectURL(src);
+  }
+  if (currentAudio) {
+    currentAudio.pause();
+    currentAudio = null;
+  }
+  audioPlaying = false;
+}
+
+// ---- WebSocket call channel ----
+let socket = null;
+let socketReady = null;
+let currentTurn = null;   // turn_id the server is still working on
+let turnCounter = 0;
+let pendingAudio = null;  // header of the audio frame whose binary body comes next
+let replySentences = [];
+
+function connectSocket() {
+  if (socket && socket.readyState <= WebSocket.OPEN) return socketReady;
+  socket = new WebSocket(WS_URL + (sessionId ? "?session_id=" + encodeURIComponent(sessionId) : ""));
+  socket.binaryType = "blob";
+  socketReady = new Promise((resolve, reject) => {
+    socket.onopen = resolve;
+    socket.onerror = reject;
+  });
+  socket.onmessage = onSocketMessage;
+  socket.onclose = () => {
+    socket = null;
+    currentTurn = null;
+  };
+  return socketReady;
+}
+
+function onSocketMessage(event) {
+  if (event.data instanceof Blob) {
+    // Binary frame = MP3 body for the preceding "audio" header
+    const header = pendingAudio;
+    pendingAudio = null;
+    if (header && header.turn_id === currentTurn) {
+      enqueueAudio(URL.createObjectURL(new Blob([event.data], { type: "audio/mpeg" })));
+    }
+    return;
+  }
+
+  const msg = JSON.parse(event.data);
+  if (msg.turn_id !== undefined && msg.turn_id !== currentTurn) return; // stale turn
+  if (msg.type === "session") {
+    rememberSession(msg.session_id);
+  } else if (msg.type === "text") {
+    replySentences[msg.index] = msg.text;
+    lastBotText.textContent = replySentences.join(" ");
+  } else if (msg.type === "audio") {
+    pendingAudio = msg;
+  } else if (msg.type === "done") {
+    currentTurn = null;
+    statusText.textContent = "Reply received — you can talk again";
+  } else if (msg.type === "error") {
+    currentTurn = null;
+    lastBotText.textContent = "Error: " + msg.detail;
+    statusText.textContent = "Error talking to server";
+  }
+}
+
+async function sendMessageSocket(message) {
+  await connectSocket();
+  stopAudio();
+  turnCounter += 1;
+  currentTurn = String(turnCounter);
+  replySentences = [];
+  lastBotText.textContent = "";
+  socket.send(JSON.stringify({ type: "transcript", text: message, turn_id: currentTurn }));
+}
+
+function bargeIn() {
+  stopAudio();
+  if (socket && currentTurn) {
+    socket.send(JSON.stringify({ type: "cancel" }));
+  }
+  currentTurn = null;
+}
+
+// Parse "event: x\ndata: {...}\n\n" blocks from the SSE response body
+async function readEvents(res, onEvent) {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
+async function sendMessageStreaming(message) {
+  const res = await fetch(STREAM_URL, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ message, session_id: sessionId }),
+  });
+
+  if (!res.ok) {
+    throw new Error("Backend error: " + res.status);
+  }
+
+  const sentences = [];
+  lastBotText.textContent = "";
+  await readEvents(res, (event, data) => {
+    if (event === "session") {
+      rememberSession(data.session_id);
+    } else if (event === "text") {
+      sentences[data.index] = data.text;
+      lastBotText.textContent = sentences.join(" ");
+    } else if (event === "audio") {
+      enqueueAudio(audioSource(data));
+    } else if (event === "error") {
+      throw new Error(data.detail);
+    }
+  });
+  if (!sentences.length) lastBotText.textContent = "(empty reply)";
+  statusText.textContent = "Reply received — you can talk again";
+}
+
 // ---- Shared send logic (voice + text) ----
 async function sendMessage(message) {
   if (!message) return;
@@ -136,10 +332,20 @@ async function sendMessage(message) {
   micBtn.disabled = true;
 
   try {
+    if (USE_WEBSOCKET) {
+      await sendMessageSocket(message);
+      return;
+    }
+
+    if (USE_STREAMING) {
+      await sendMessageStreaming(message);
+      return;
+    }
+
     const res = await fetch(BACKEND_URL, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ message }),
+      body: JSON.stringify({ message, session_id: sessionId }),
     });
 
     if (!res.ok) {
@@ -147,11 +353,13 @@ async function sendMessage(message) {
     }
 
     const data = await res.json();
+    rememberSession(data.session_id);
     lastBotText.textContent = data.reply || "(empty reply)";
     statusText.textContent = "Reply received — you can talk again";
 
-    if (data.audio_base64) {
-      const audio = new Audio(data.audio_base64);
+    const src = audioSource(data);
+    if (src) {
+      const audio = new Audio(src);
       audio.play().catch((err) => {
         console.error("Audio play failed:", err);
         statusText.textContent = "Audio blocked. Tap anywhere and speak again.";
@@ -1,6 +1,6 @@
+import asyncio
 import logging
 import os
-import json
 from datetime import datetime
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -19,9 +19,14 @@ from livekit.agents import (
 )
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from wellness_journal import COMPACT_EVERY, LEGACY_NAME, RECORDS_DIR, WellnessJournal
 logger = logging.getLogger("agent")
 load_dotenv(".env.local")
 
+journal = WellnessJournal()
+# Background compaction, kept referenced until it finishes
+_compactions = set()
+
 class Assistant(Agent):
     def __init__(self, past_ref: str = "") -> None:
         base_instructions = """You are a supportive, realistic, and grounded health & wellness voice companion. You conduct short daily check-ins to help users reflect on their mood, set simple intentions, and end with encouragement. Keep conversations natural, empathetic, and concise—aim for 1-2 minutes total. Speak as if in a friendly chat.
@@ -56,7 +61,6 @@ Be curious and non-judgmental. Responses: concise, voice-friendly, no emojis/lis
             objectives: Comma-separated list of 1-3 goals (e.g., "10-min walk, reply to emails, read a chapter").
             summary: One short, neutral sentence summarizing the check-in (e.g., "User felt moderately energetic and set self-care goals.").
         """
-        log_file = "records/wellness_log.json"
         now = datetime.now()
         entry = {
             "date": now.strftime("%Y-%m-%d"),
@@ -65,17 +69,13 @@ Be curious and non-judgmental. Responses: concise, voice-friendly, no emojis/lis
             "objectives": [obj.strip() for obj in objectives.split(",") if obj.strip()],
             "summary": summary
         }
-        try:
-            with open(log_file, 'r') as f:
-                log = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            log = []
-        
-        log.append(entry)
-        with open(log_file, 'w') as f:
-            json.dump(log, f, indent=2, ensure_ascii=False)
-        
+        # One fsynced line in the journal, off the event loop
+        await asyncio.to_thread(journal.append, entry)
         logger.info(f"Saved check-in: {entry}")
+        if journal.uncompacted >= COMPACT_EVERY and not _compactions:
+            task = asyncio.create_task(asyncio.to_thread(journal.compact))
+            _compactions.add(task)
+            task.add_done_callback(_compactions.discard)
         return "Check-in saved. Thanks for sharing—have a great day!"
 
 def prewarm(proc: JobProcess):
@@ -89,17 +89,15 @@ async def entrypoint(ctx: JobContext):
     
     # Create records directory and load past data
     os.makedirs("records", exist_ok=True)
-    log_file = "records/wellness_log.json"
-    past_ref = ""
-    try:
-        with open(log_file, 'r') as f:
-            log = json.load(f)
-        if log:
-            last = log[-1]
-            objectives_str = ", ".join(last.get("objectives", []))
-            past_ref = f"Last time on {last['date']}, you felt {last['mood']}. You aimed for: {objectives_str}. How's that going, or how does today feel?"
-    except (FileNotFoundError, json.JSONDecodeError, IndexError):
+    # Snapshot plus tail off the event loop, like the appends
+    last = await asyncio.to_thread(journal.last)
+    if last:
+        objectives_str = ", ".join(last.get("objectives", []))
+        past_ref = f"Last time on {last['date']}, you felt {last['mood']}. You aimed for: {objectives_str}. How's that going, or how does today feel?"
+    else:
         past_ref = "This is our first check-in—excited to start!"
+        if (RECORDS_DIR / LEGACY_NAME).exists():
+            logger.warning(f"Found {RECORDS_DIR / LEGACY_NAME}; import it with: python src/wellness_journal.py migrate")
     
     logger.info(f"Past reference: {past_ref}")
 
@@ -140,6 +138,11 @@ async def entrypoint(ctx: JobContext):
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
     ctx.add_shutdown_callback(log_usage)
+    # Per-turn latency breakdown; needs Multi-Persona/backend/src on PYTHONPATH
+    if os.getenv("TURN_LATENCY"):
+        from turn_latency import track_turn_latency
+
+        track_turn_latency(ctx, session)
     # Start the session, which initializes the voice pipeline and warms up the models
     await session.start(
         agent=Assistant(past_ref=past_ref),
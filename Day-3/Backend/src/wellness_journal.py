@@ -0,0 +1,265 @@
+"""Append-only storage for the daily wellness check-ins.
+
+Check-ins used to live in one JSON array that was read and rewritten in full
+on every save, so each save cost the whole history and a crash mid-write
+could lose all of it. They now go to two files in ``records/``:
+
+- ``wellness_log.jsonl``, the journal: one check-in per line. A save appends
+  one line and fsyncs it, whatever the size of the history. A line torn by
+  a crash is skipped when reading, the lines before it are intact.
+- ``wellness_log.snapshot.json``, the snapshot: every check-in compacted so
+  far, an index of their positions by date and the last one. It records how
+  many bytes of the journal it covers; readers add the lines after that.
+
+The agent compacts in a background thread once ``COMPACT_EVERY`` check-ins
+have piled up after the snapshot. A compaction first renames the journal to
+a segment, ``wellness_log.<ns>-<pid>.jsonl``, so new check-ins start a fresh
+journal, then folds the segment into the snapshot. The snapshot is written
+to a temporary file and renamed over the old one, so it is never
+half-written. It lists the segments it has read up to where; the next
+compaction picks up any line appended to them late and deletes them. A
+segment the snapshot does not list was left by a compaction that crashed,
+and readers take its lines like the journal's. Import the
+check-ins of an existing ``wellness_log.json`` (run it again any time, the
+ones already imported are skipped), or compact by hand, with::
+
+    python src/wellness_journal.py migrate records/wellness_log.json
+    python src/wellness_journal.py compact
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger("agent")
+
+RECORDS_DIR = Path("records")
+JOURNAL_NAME = "wellness_log.jsonl"
+SNAPSHOT_NAME = "wellness_log.snapshot.json"
+SEGMENT_GLOB = "wellness_log.*.jsonl"
+LEGACY_NAME = "wellness_log.json"
+# Check-ins appended after the snapshot before the agent compacts again
+COMPACT_EVERY = 20
+
+Entry = dict[str, Any]
+
+
+def _fsync_dir(path: Path) -> None:
+    # Makes a created or renamed file survive a crash, not just its contents.
+    # Windows cannot open a directory for that, and NTFS journals its metadata anyway
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _key(entry: Entry) -> tuple[Any, ...]:
+    return entry.get("date"), entry.get("time"), entry.get("mood"), entry.get("summary")
+
+
+class WellnessJournal:
+    def __init__(self, records_dir: Path = RECORDS_DIR):
+        self.records_dir = Path(records_dir)
+        self.journal_path = self.records_dir / JOURNAL_NAME
+        self.snapshot_path = self.records_dir / SNAPSHOT_NAME
+        # Check-ins in the journal after the snapshot, as last seen by this process
+        self.uncompacted = 0
+
+    def append(self, *entries: Entry) -> None:
+        """Append ``entries`` to the journal and fsync them."""
+        data = "".join(
+            json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries
+        ).encode("utf-8")
+        self.records_dir.mkdir(parents=True, exist_ok=True)
+        created = not self.journal_path.exists()
+        # One unbuffered append, so lines from concurrent job processes never interleave
+        with open(self.journal_path, "ab+", buffering=0) as f:
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    # Keep a torn last line from swallowing this one
+                    data = b"\n" + data
+            f.write(data)
+            os.fsync(f.fileno())
+        if created:
+            _fsync_dir(self.records_dir)
+        self.uncompacted += len(entries)
+
+    def read_journal(
+        self, offset: int = 0, path: Optional[Path] = None
+    ) -> tuple[list[Entry], int]:
+        """Check-ins in the journal (or segment ``path``) from byte ``offset``, and the offset after the last whole line."""
+        path = path or self.journal_path
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], offset
+        # Anything after the last newline is a write cut short by a crash
+        whole = data[: data.rfind(b"\n") + 1]
+        entries = []
+        for number, line in enumerate(whole.splitlines(), 1):
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(
+                    f"Skipping unreadable line {number} after byte {offset} of {path}"
+                )
+        return entries, offset + len(whole)
+
+    def load_snapshot(self) -> dict[str, Any]:
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"journal_bytes": 0, "entries": [], "by_date": {}, "last": None}
+
+    def read_tail(self, snapshot: dict[str, Any]) -> tuple[list[Entry], dict[str, int]]:
+        """Check-ins missing from ``snapshot``, and how far each segment and the journal were read."""
+        read = snapshot.get("segments", {})
+        offset = snapshot["journal_bytes"]
+        tail: list[Entry] = []
+        ends: dict[str, int] = {}
+        for path in sorted(self.records_dir.glob(SEGMENT_GLOB)):
+            if path.name in read:
+                start = read[path.name]
+            else:
+                # Renamed by a compaction that crashed: the journal the offset refers to
+                start, offset = offset, 0
+            entries, ends[path.name] = self.read_journal(start, path)
+            tail += entries
+        entries, ends[JOURNAL_NAME] = self.read_journal(offset)
+        return tail + entries, ends
+
+    def entries(self) -> list[Entry]:
+        """Every check-in, oldest first."""
+        snapshot = self.load_snapshot()
+        tail, _ = self.read_tail(snapshot)
+        return snapshot["entries"] + tail
+
+    def on_date(self, date: str) -> list[Entry]:
+        """Check-ins of ``date`` (YYYY-MM-DD)."""
+        snapshot = self.load_snapshot()
+        tail, _ = self.read_tail(snapshot)
+        return [snapshot["entries"][i] for i in snapshot["by_date"].get(date, [])] + [
+            entry for entry in tail if entry.get("date") == date
+        ]
+
+    def last(self) -> Optional[Entry]:
+        """The latest check-in, or None before the first one."""
+        snapshot = self.load_snapshot()
+        tail, _ = self.read_tail(snapshot)
+        self.uncompacted = len(tail)
+        return tail[-1] if tail else snapshot["last"]
+
+    def compact(self) -> int:
+        """Fold the journal lines after the snapshot into a new snapshot; returns how many."""
+        snapshot = self.load_snapshot()
+        rotated = False
+        if self.journal_path.exists():
+            segment = (
+                self.records_dir / f"wellness_log.{time.time_ns()}-{os.getpid()}.jsonl"
+            )
+            try:
+                os.replace(self.journal_path, segment)
+                rotated = True
+            except FileNotFoundError:
+                pass  # renamed by a concurrent compaction
+            except PermissionError:
+                # Open in another process on Windows; fold it in place this time
+                logger.info(
+                    f"Could not rotate {self.journal_path}, compacting it in place"
+                )
+        tail, ends = self.read_tail(snapshot)
+        if not tail and not rotated:
+            return 0
+        entries = snapshot["entries"] + tail
+        if not entries:
+            return 0
+        by_date: dict[str, list[int]] = {}
+        for position, entry in enumerate(entries):
+            by_date.setdefault(entry.get("date", ""), []).append(position)
+        new_snapshot = {
+            "journal_bytes": ends.pop(JOURNAL_NAME),
+            "segments": ends,
+            "entries": entries,
+            "by_date": by_date,
+            "last": entries[-1],
+        }
+        # Unique per process, so concurrent compactions never write the same file
+        tmp_path = self.snapshot_path.with_name(f"{SNAPSHOT_NAME}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(new_snapshot, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_dir(self.records_dir)
+        # Segments the previous snapshot listed had a whole compaction to get late lines,
+        # and those were just read
+        for name in snapshot.get("segments", {}):
+            # Gone already, or still open on Windows: the next compaction tries again
+            with contextlib.suppress(OSError):
+                (self.records_dir / name).unlink()
+        self.uncompacted = max(0, self.uncompacted - len(tail))
+        logger.info(
+            f"Compacted {len(tail)} check-ins into {self.snapshot_path} ({len(entries)} in total)"
+        )
+        return len(tail)
+
+    def migrate(self, legacy: Iterable[Entry]) -> int:
+        """Append the check-ins of the old JSON array that are not in the journal yet; returns how many."""
+        known = {_key(entry) for entry in self.entries()}
+        new = [entry for entry in legacy if _key(entry) not in known]
+        if new:
+            self.append(*new)
+        return len(new)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Maintain the wellness check-in journal"
+    )
+    parser.add_argument(
+        "--records",
+        type=Path,
+        default=RECORDS_DIR,
+        help="directory holding the journal",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser(
+        "migrate", help=f"import the check-ins of an old {LEGACY_NAME}"
+    )
+    migrate.add_argument(
+        "legacy", nargs="?", type=Path, help=f"defaults to <records>/{LEGACY_NAME}"
+    )
+    commands.add_parser("compact", help="fold the journal into the indexed snapshot")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    journal = WellnessJournal(args.records)
+    if args.command == "migrate":
+        legacy_path = args.legacy or args.records / LEGACY_NAME
+        with open(legacy_path, encoding="utf-8") as f:
+            legacy = json.load(f)
+        imported = journal.migrate(legacy)
+        print(
+            f"Imported {imported} of {len(legacy)} check-ins from {legacy_path} into {journal.journal_path}"
+        )
+        journal.compact()
+    else:
+        print(f"Compacted {journal.compact()} check-ins into {journal.snapshot_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import json
+
+from wellness_journal import SEGMENT_GLOB, WellnessJournal
+
+
+def _checkin(date: str, mood: str) -> dict:
+    return {
+        "date": date,
+        "time": "09:00:00",
+        "mood": mood,
+        "objectives": ["take a walk"],
+        "summary": f"Felt {mood}.",
+    }
+
+
+def test_journal_survives_a_torn_write_and_compacts(tmp_path) -> None:
+    journal = WellnessJournal(tmp_path)
+    journal.append(_checkin("2025-11-23", "6/10"))
+    journal.append(_checkin("2025-11-24", "7/10"))
+    # A crash in the middle of the next append
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"date": "2025-11-25", "mo')
+    assert [e["mood"] for e in journal.entries()] == ["6/10", "7/10"]
+
+    assert journal.compact() == 2
+    snapshot = json.loads(journal.snapshot_path.read_text())
+    assert snapshot["by_date"] == {"2025-11-23": [0], "2025-11-24": [1]}
+    assert journal.compact() == 0
+
+    # The next append still gets a line of its own, read after the snapshot
+    journal.append(_checkin("2025-11-24", "8/10"))
+    assert [e["mood"] for e in journal.on_date("2025-11-24")] == ["7/10", "8/10"]
+    assert journal.last()["mood"] == "8/10"
+    assert len(journal.entries()) == 3
+
+
+def test_migration_imports_the_old_array_once(tmp_path) -> None:
+    legacy = [_checkin("2025-11-20", "5/10"), _checkin("2025-11-21", "6/10")]
+    journal = WellnessJournal(tmp_path)
+    assert journal.last() is None
+    assert journal.migrate(legacy) == 2
+    assert journal.migrate(legacy) == 0
+    assert journal.entries() == legacy
+
+
+def test_compaction_rotates_the_journal(tmp_path) -> None:
+    journal = WellnessJournal(tmp_path)
+    journal.append(_checkin("2025-11-20", "5/10"), _checkin("2025-11-21", "6/10"))
+    assert journal.compact() == 2
+    # The compacted lines left the journal; new check-ins start a fresh one
+    assert not journal.journal_path.exists()
+    (first,) = tmp_path.glob(SEGMENT_GLOB)
+
+    journal.append(_checkin("2025-11-22", "7/10"))
+    # A late line from a process that opened the journal before it was renamed
+    with open(first, "a", encoding="utf-8") as f:
+        f.write(json.dumps(_checkin("2025-11-21", "8/10")) + "\n")
+    reloaded = WellnessJournal(tmp_path)
+    assert [e["mood"] for e in reloaded.entries()] == ["5/10", "6/10", "8/10", "7/10"]
+
+    assert reloaded.compact() == 2
+    # The first segment is deleted once a later snapshot holds its late lines
+    assert not first.exists()
+    journal.append(_checkin("2025-11-23", "9/10"))
+    assert [e["mood"] for e in WellnessJournal(tmp_path).entries()] == [
+        "5/10",
+        "6/10",
+        "8/10",
+        "7/10",
+        "9/10",
+    ]
+    assert [e["mood"] for e in journal.on_date("2025-11-21")] == ["6/10", "8/10"]
+
+
+def test_crash_between_rotation_and_snapshot_loses_nothing(tmp_path) -> None:
+    journal = WellnessJournal(tmp_path)
+    journal.append(_checkin("2025-11-20", "5/10"))
+    journal.compact()
+    journal.append(_checkin("2025-11-21", "6/10"))
+    # Renamed by a compaction that died before writing its snapshot
+    journal.journal_path.rename(tmp_path / "wellness_log.1-1.jsonl")
+    journal.append(_checkin("2025-11-22", "7/10"))
+    assert [e["mood"] for e in journal.entries()] == ["5/10", "6/10", "7/10"]
+
+    assert journal.compact() == 2
+    assert [e["mood"] for e in journal.entries()] == ["5/10", "6/10", "7/10"]
+    assert journal.last()["mood"] == "7/10"
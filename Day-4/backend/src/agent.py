@@ -219,6 +219,20 @@ class TutorAgent(Agent):
 # 🎬 ENTRYPOINT
 # ======================================================
 
+def create_session_plugins(tokenizer=None):
+    """STT, LLM and TTS for one session; ``tokenizer`` overrides how replies are chunked for TTS."""
+    tts_options = {"tokenizer": tokenizer} if tokenizer else {}
+    return {
+        "stt": deepgram.STT(model="nova-3"),
+        "llm": google.LLM(model="gemini-2.5-flash"),
+        "tts": murf.TTS(
+            voice="en-US-matthew", 
+            style="Promo",        
+            text_pacing=True,
+            **tts_options,
+        ),
+    }
+
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
 
@@ -233,18 +247,24 @@ async def entrypoint(ctx: JobContext):
     userdata = Userdata(tutor_state=TutorState())
 
     # 2. Setup Agent
+    # Built and warmed ahead of the job when hosted by the multi-persona worker
+    plugins = ctx.proc.userdata.pop("plugins", None) or create_session_plugins()
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
-        tts=murf.TTS(
-            voice="en-US-matthew", 
-            style="Promo",        
-            text_pacing=True,
-        ),
-        turn_detection=MultilingualModel(),
+        **plugins,
+        turn_detection=ctx.proc.userdata.get("turn_detector") or MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         userdata=userdata,
     )
+
+    # Hooks registered by the multi-persona worker (latency tracking, ...)
+    hooks = ctx.proc.userdata.get("session_hooks")
+    if hooks is None and os.getenv("TURN_LATENCY"):
+        # Run standalone; needs Multi-Persona/backend/src on PYTHONPATH
+        from turn_latency import track_turn_latency
+
+        hooks = [track_turn_latency]
+    for hook in hooks or ():
+        hook(ctx, session)
     
     # 3. Store session in userdata for tools to access
     userdata.agent_session = session
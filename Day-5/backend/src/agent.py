@@ -1,3 +1,4 @@
+import contextlib
 import logging
 import os
 import json
@@ -15,6 +16,7 @@ from livekit.agents import (
     metrics,
     tokenize,
     function_tool,
+    get_job_context,
     RunContext
 )
 from livekit.agents.llm import ChatMessage
@@ -28,6 +30,10 @@ load_dotenv(".env.local")
 os.makedirs("company", exist_ok=True)
 os.makedirs("user-database", exist_ok=True)
 
+# Spoken verbatim on every call, so it can be pre-synthesized
+GREETING = "Hello! I'm Priya, your Jar savings consultant. Welcome! I'm here to help you start your micro-saving journey. What brings you here today?"
+SCRIPTED_PHRASES = [GREETING]
+
 # Load Jar company information from file
 def load_jar_company_info():
     company_file = "company/jar_info.json"
@@ -142,8 +148,8 @@ class JarSDRAgent(Agent):
         # SDR instructions - include initial greeting in instructions
         instructions = """You are Priya, a friendly and enthusiastic Sales Development Representative for Jar, India's leading micro-savings app. 
 
-IMPORTANT: You MUST start the conversation with this exact greeting:
-"Hello! I'm Priya, your Jar savings consultant. Welcome! I'm here to help you start your micro-saving journey. What brings you here today?"
+IMPORTANT: The conversation has already started with this exact greeting, spoken for you (do not repeat it):
+"{greeting}"
 
 After the greeting, follow this conversation flow:
 1. Understand their saving needs and goals
@@ -176,12 +182,21 @@ FAQ FOR ANSWERS:
         # Format instructions
         faq_text = "\n".join([f"Q: {item['question']}\nA: {item['answer']}" for item in self.company_info['faq']])
         formatted_instructions = instructions.format(
+            greeting=GREETING,
             company_description=self.company_info['description'],
             faq_data=faq_text
         )
         
         super().__init__(instructions=formatted_instructions)
 
+    async def on_enter(self):
+        say = AgentSession.say
+        # Not running inside a job raises RuntimeError, e.g. in the evals
+        with contextlib.suppress(RuntimeError):
+            # Played from pre-synthesized audio when the host has it cached
+            say = get_job_context().proc.userdata.get("say_scripted", say)
+        say(self.session, GREETING)
+
     @function_tool
     async def update_lead_info(self, context: RunContext, field: str, value: str) -> str:
         """Update lead information with user-provided data"""
@@ -245,6 +260,21 @@ FAQ FOR ANSWERS:
 
 I'll make sure you receive all the information about starting your saving journey with Jar. Have a wonderful day!"""
 
+def create_session_plugins(tokenizer=None):
+    """STT, LLM and TTS for one session; ``tokenizer`` overrides how replies are chunked for TTS."""
+    return {
+        "stt": deepgram.STT(model="nova-2"),
+        "llm": google.LLM(
+            model="gemini-2.0-flash",
+        ),
+        "tts": murf.TTS(
+            voice="en-US-alicia",  # Female voice
+            style="Conversation",
+            tokenizer=tokenizer or tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+            text_pacing=True
+        ),
+    }
+
 def prewarm(proc: JobProcess):
     """Preload models and company data"""
     logger.info("Prewarming agent...")
@@ -273,22 +303,25 @@ async def entrypoint(ctx: JobContext):
         return
 
     # Set up voice AI pipeline with FEMALE voice
+    # Built and warmed ahead of the job when hosted by the multi-persona worker
+    plugins = ctx.proc.userdata.pop("plugins", None) or create_session_plugins()
     session = AgentSession(
-        stt=deepgram.STT(model="nova-2"),
-        llm=google.LLM(
-            model="gemini-2.0-flash",
-        ),
-        tts=murf.TTS(
-            voice="en-US-alicia",  # Female voice
-            style="Conversation",
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-            text_pacing=True
-        ),
-        turn_detection=MultilingualModel(),
+        **plugins,
+        turn_detection=ctx.proc.userdata.get("turn_detector") or MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         preemptive_generation=True,
     )
 
+    # Hooks registered by the multi-persona worker (latency tracking, ...)
+    hooks = ctx.proc.userdata.get("session_hooks")
+    if hooks is None and os.getenv("TURN_LATENCY"):
+        # Run standalone; needs Multi-Persona/backend/src on PYTHONPATH
+        from turn_latency import track_turn_latency
+
+        hooks = [track_turn_latency]
+    for hook in hooks or ():
+        hook(ctx, session)
+
     # Add event listeners for debugging
     @session.on("user_speech")
     def on_user_speech(transcript: str):
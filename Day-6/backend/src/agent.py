@@ -15,6 +15,7 @@ from livekit.agents import (
     metrics,
     tokenize,
     function_tool,
+    get_job_context,
     RunContext
 )
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
@@ -26,6 +27,10 @@ load_dotenv(".env.local")
 # Create necessary directories
 os.makedirs("fraud_database", exist_ok=True)
 
+# Spoken verbatim on every call, so it can be pre-synthesized
+GREETING = "Namaste! This is State Bank of India Fraud Prevention Department calling regarding a suspicious transaction on your account. To verify your identity, could you please tell me your full name?"
+SCRIPTED_PHRASES = [GREETING]
+
 def load_fraud_cases():
     """Load fraud cases from database"""
     database_file = "fraud_database/fraud_cases.json"
@@ -163,7 +168,7 @@ class FraudAlertAgent(Agent):
         
         instructions = """You are a professional fraud detection agent for State Bank of India. You must follow this exact flow:
 
-1. GREETING: Start with: "Namaste! This is State Bank of India Fraud Prevention Department calling regarding a suspicious transaction on your account. To verify your identity, could you please tell me your full name?"
+1. GREETING: Already spoken for you when the call connects (do not repeat it): "{greeting}"
 
 2. IDENTITY VERIFICATION: 
    - When user provides name, search for their fraud case
@@ -197,9 +202,18 @@ FRAUD CASES DATA:
         for case in self.fraud_cases["fraud_cases"]:
             cases_text += f"User: {case['userName']}, Security ID: {case['securityIdentifier']}, Card: ****{case['cardEnding']}, Question: {case['securityQuestion']}, Answer: {case['securityAnswer']}\n"
         
-        formatted_instructions = instructions.format(fraud_cases_data=cases_text)
+        formatted_instructions = instructions.format(greeting=GREETING, fraud_cases_data=cases_text)
         super().__init__(instructions=formatted_instructions)
 
+    async def on_enter(self):
+        say = AgentSession.say
+        try:
+            # Played from pre-synthesized audio when the host has it cached
+            say = get_job_context().proc.userdata.get("say_scripted", say)
+        except RuntimeError:
+            pass  # not running inside a job, e.g. in the evals
+        say(self.session, GREETING)
+
     @function_tool
     async def find_fraud_case(self, context: RunContext, user_name: str) -> str:
         """Find fraud case by user name"""
@@ -292,6 +306,21 @@ Did you authorize this transaction?
         
         return "For security reasons, we are ending this call. Please contact State Bank of India customer service directly at 1800-1234 for assistance. Dhanyavaad."
 
+def create_session_plugins(tokenizer=None):
+    """STT, LLM and TTS for one session; ``tokenizer`` overrides how replies are chunked for TTS."""
+    return {
+        "stt": deepgram.STT(model="nova-2"),
+        "llm": google.LLM(
+            model="gemini-2.0-flash",
+        ),
+        "tts": murf.TTS(
+            voice="en-US-alicia",  # Using valid Murf voice
+            style="Conversation",
+            tokenizer=tokenizer or tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+            text_pacing=True
+        ),
+    }
+
 def prewarm(proc: JobProcess):
     """Preload models and fraud database"""
     logger.info("Prewarming State Bank of India fraud agent...")
@@ -320,22 +349,25 @@ async def entrypoint(ctx: JobContext):
         return
 
     # Set up voice AI pipeline with valid Murf voice
+    # Built and warmed ahead of the job when hosted by the multi-persona worker
+    plugins = ctx.proc.userdata.pop("plugins", None) or create_session_plugins()
     session = AgentSession(
-        stt=deepgram.STT(model="nova-2"),
-        llm=google.LLM(
-            model="gemini-2.0-flash",
-        ),
-        tts=murf.TTS(
-            voice="en-US-alicia",  # Using valid Murf voice
-            style="Conversation",
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-            text_pacing=True
-        ),
-        turn_detection=MultilingualModel(),
+        **plugins,
+        turn_detection=ctx.proc.userdata.get("turn_detector") or MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         preemptive_generation=True,
     )
 
+    # Hooks registered by the multi-persona worker (latency tracking, ...)
+    hooks = ctx.proc.userdata.get("session_hooks")
+    if hooks is None and os.getenv("TURN_LATENCY"):
+        # Run standalone; needs Multi-Persona/backend/src on PYTHONPATH
+        from turn_latency import track_turn_latency
+
+        hooks = [track_turn_latency]
+    for hook in hooks or ():
+        hook(ctx, session)
+
     # Add event listeners for debugging
     @session.on("user_speech")
     def on_user_speech(transcript: str):
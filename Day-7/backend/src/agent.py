@@ -394,6 +394,21 @@ Thank you for shopping with QuickBasket! Your order has been saved and will be d
         self.cart.clear()
         return f"Cleared your cart of {item_count} items. No problem at all! Fresh start - what delicious items would you like to add now? 🛒"
 
+def create_session_plugins(tokenizer=None):
+    """STT, LLM and TTS for one session; ``tokenizer`` overrides how replies are chunked for TTS."""
+    return {
+        "stt": deepgram.STT(model="nova-2"),
+        "llm": google.LLM(
+            model="gemini-2.0-flash",
+        ),
+        "tts": murf.TTS(
+            voice="en-US-alicia",  # Friendly female voice
+            style="Conversation",
+            tokenizer=tokenizer or tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+            text_pacing=True
+        ),
+    }
+
 def prewarm(proc: JobProcess):
     """Preload models and food catalog"""
     logger.info("Prewarming QuickBasket food ordering agent...")
@@ -422,22 +437,25 @@ async def entrypoint(ctx: JobContext):
         return
 
     # Set up voice AI pipeline with friendly Indian-accented voice
+    # Built and warmed ahead of the job when hosted by the multi-persona worker
+    plugins = ctx.proc.userdata.pop("plugins", None) or create_session_plugins()
     session = AgentSession(
-        stt=deepgram.STT(model="nova-2"),
-        llm=google.LLM(
-            model="gemini-2.0-flash",
-        ),
-        tts=murf.TTS(
-            voice="en-US-alicia",  # Friendly female voice
-            style="Conversation",
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-            text_pacing=True
-        ),
-        turn_detection=MultilingualModel(),
+        **plugins,
+        turn_detection=ctx.proc.userdata.get("turn_detector") or MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         preemptive_generation=True,
     )
 
+    # Hooks registered by the multi-persona worker (latency tracking, ...)
+    hooks = ctx.proc.userdata.get("session_hooks")
+    if hooks is None and os.getenv("TURN_LATENCY"):
+        # Run standalone; needs Multi-Persona/backend/src on PYTHONPATH
+        from turn_latency import track_turn_latency
+
+        hooks = [track_turn_latency]
+    for hook in hooks or ():
+        hook(ctx, session)
+
     # Add event listeners for debugging
     @session.on("user_speech")
     def on_user_speech(transcript: str):
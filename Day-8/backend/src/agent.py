@@ -332,6 +332,21 @@ Thank you for exploring the mystical lands of India with me. May your real-life
         
         return summary
 
+def create_session_plugins(tokenizer=None):
+    """STT, LLM and TTS for one session; ``tokenizer`` overrides how replies are chunked for TTS."""
+    return {
+        "stt": deepgram.STT(model="nova-2"),
+        "llm": google.LLM(
+            model="gemini-2.0-flash",  # Using the same model as working example
+        ),
+        "tts": murf.TTS(
+            voice="en-US-ken",  # Male voice for Jungle Raja
+            style="Conversation",
+            tokenizer=tokenizer or tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+            text_pacing=True
+        ),
+    }
+
 def prewarm(proc: JobProcess):
     """Preload models and game world data"""
     logger.info("Prewarming Jungle Raja agent...")
@@ -360,22 +375,25 @@ async def entrypoint(ctx: JobContext):
         return
 
     # Set up voice AI pipeline with MALE voice for Jungle Raja
+    # Built and warmed ahead of the job when hosted by the multi-persona worker
+    plugins = ctx.proc.userdata.pop("plugins", None) or create_session_plugins()
     session = AgentSession(
-        stt=deepgram.STT(model="nova-2"),
-        llm=google.LLM(
-            model="gemini-2.0-flash",  # Using the same model as working example
-        ),
-        tts=murf.TTS(
-            voice="en-US-ken",  # Male voice for Jungle Raja
-            style="Conversation",
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-            text_pacing=True
-        ),
-        turn_detection=MultilingualModel(),
+        **plugins,
+        turn_detection=ctx.proc.userdata.get("turn_detector") or MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         preemptive_generation=True,  # Same as working example
     )
 
+    # Hooks registered by the multi-persona worker (latency tracking, ...)
+    hooks = ctx.proc.userdata.get("session_hooks")
+    if hooks is None and os.getenv("TURN_LATENCY"):
+        # Run standalone; needs Multi-Persona/backend/src on PYTHONPATH
+        from turn_latency import track_turn_latency
+
+        hooks = [track_turn_latency]
+    for hook in hooks or ():
+        hook(ctx, session)
+
     # Add event listeners for debugging
     @session.on("user_speech")
     def on_user_speech(transcript: str):
@@ -1,3 +1,4 @@
+import contextlib
 import logging
 import os
 import json
@@ -17,6 +18,7 @@ from livekit.agents import (
     metrics,
     tokenize,
     function_tool,
+    get_job_context,
     RunContext
 )
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
@@ -29,6 +31,10 @@ load_dotenv(".env.local")
 os.makedirs("ecommerce_data", exist_ok=True)
 os.makedirs("ecommerce_products", exist_ok=True)
 
+# Spoken verbatim on every call, so it can be pre-synthesized
+GREETING = "Namaste! Welcome to our voice shopping experience. I'm here to help you find the perfect products. What would you like to browse today - mugs, clothing, stationery, or bags?"
+SCRIPTED_PHRASES = [GREETING]
+
 class ProductManager:
     """Manages product catalog with file-based storage"""
     
@@ -348,10 +354,10 @@ class EcommerceAgent(Agent):
         }
         
         # Agent instructions for e-commerce
-        instructions = """You are a friendly and helpful voice shopping assistant. Your role is to help users browse products and place orders.
+        instructions = f"""You are a friendly and helpful voice shopping assistant. Your role is to help users browse products and place orders.
 
-IMPORTANT: You MUST start with this greeting:
-"Namaste! Welcome to our voice shopping experience. I'm here to help you find the perfect products. What would you like to browse today - mugs, clothing, stationery, or bags?"
+IMPORTANT: The conversation has already started with this greeting, spoken for you (do not repeat it):
+"{GREETING}"
 
 KEY RESPONSIBILITIES:
 1. Help users browse products by category, price, color, brand, etc.
@@ -379,6 +385,14 @@ RESPONSE RULES:
 
         super().__init__(instructions=instructions)
 
+    async def on_enter(self):
+        say = AgentSession.say
+        # Not running inside a job raises RuntimeError, e.g. in the evals
+        with contextlib.suppress(RuntimeError):
+            # Played from pre-synthesized audio when the host has it cached
+            say = get_job_context().proc.userdata.get("say_scripted", say)
+        say(self.session, GREETING)
+
     @function_tool
     async def list_products(self, context: RunContext, category: Optional[str] = "", 
                           max_price: Optional[float] = 0, color: Optional[str] = "", 
@@ -651,6 +665,21 @@ RESPONSE RULES:
             logger.error(f"Error in suggest_products: {e}")
             return "Let me show you some popular products instead..."
 
+def create_session_plugins(tokenizer=None):
+    """STT, LLM and TTS for one session; ``tokenizer`` overrides how replies are chunked for TTS."""
+    return {
+        "stt": deepgram.STT(model="nova-2"),
+        "llm": google.LLM(
+            model="gemini-2.0-flash",
+        ),
+        "tts": murf.TTS(
+            voice="en-US-ken",
+            style="Conversation",
+            tokenizer=tokenizer or tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+            text_pacing=True
+        ),
+    }
+
 def prewarm(proc: JobProcess):
     """Preload models and e-commerce data"""
     logger.info("Prewarming E-commerce agent...")
@@ -677,22 +706,25 @@ async def entrypoint(ctx: JobContext):
         return
 
     # Set up voice AI pipeline
+    # Built and warmed ahead of the job when hosted by the multi-persona worker
+    plugins = ctx.proc.userdata.pop("plugins", None) or create_session_plugins()
     session = AgentSession(
-        stt=deepgram.STT(model="nova-2"),
-        llm=google.LLM(
-            model="gemini-2.0-flash",
-        ),
-        tts=murf.TTS(
-            voice="en-US-ken",
-            style="Conversation",
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-            text_pacing=True
-        ),
-        turn_detection=MultilingualModel(),
+        **plugins,
+        turn_detection=ctx.proc.userdata.get("turn_detector") or MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         preemptive_generation=True,
     )
 
+    # Hooks registered by the multi-persona worker (latency tracking, ...)
+    hooks = ctx.proc.userdata.get("session_hooks")
+    if hooks is None and os.getenv("TURN_LATENCY"):
+        # Run standalone; needs Multi-Persona/backend/src on PYTHONPATH
+        from turn_latency import track_turn_latency
+
+        hooks = [track_turn_latency]
+    for hook in hooks or ():
+        hook(ctx, session)
+
     # Add event listeners for debugging
     @session.on("user_speech")
     def on_user_speech(transcript: str):
@@ -0,0 +1,213 @@
+"""Time to first audio: ClauseTokenizer vs. the sentence tokenizer the agents use.
+
+Replays typical persona replies as a token stream with LLM-like timing and
+measures when each tokenizer releases its first chunk to TTS. Time to first
+audio is that moment plus Murf's TTFB: a fixed ``--tts-ttfb-ms`` by default,
+or the real thing with ``--murf`` (needs MURF_API_KEY).
+
+    uv run python bench/tokenizer_ttfb.py
+    uv run python bench/tokenizer_ttfb.py --murf --llm-token-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import aiohttp
+from livekit.agents import tokenize
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from clause_tokenizer import ClauseTokenizer
+from personas import PERSONAS
+
+# First replies in the style each persona produces
+REPLIES: dict[str, list[str]] = {
+    "tutor": [
+        "Great question, a variable is simply a named container that stores a value your program can read and change later on. Want to try explaining it back to me?",
+        "In learn mode I will walk you through loops step by step, starting with the idea that a loop repeats a block of code while a condition stays true.",
+    ],
+    "sdr": [
+        "Hello! I'm Priya, your Jar savings consultant. Welcome! I'm here to help you start your micro-saving journey. What brings you here today?",
+        "Jar lets you save as little as one rupee a day and automatically converts your savings into twenty four karat digital gold that you can redeem anytime.",
+    ],
+    "fraud": [
+        "Namaste! This is State Bank of India calling from our fraud prevention department regarding a suspicious transaction on your card. May I know your name please?",
+        "Thank you for verifying, we noticed a transaction of twelve thousand rupees at an electronics store in Mumbai yesterday evening, did you authorize this purchase?",
+    ],
+    "grocery": [
+        "I have added two packets of Amul butter and a loaf of whole wheat bread to your cart, which brings your total to one hundred and eighty rupees.",
+        "For a quick pasta dinner you will need penne, tomato sauce, garlic and some parmesan cheese, shall I add all of those to your cart?",
+    ],
+    "game": [
+        "Deep in the heart of the Sundarban jungle, the ancient banyan tree creaks as Raja the tiger watches you from the shadows, what do you do?",
+        "You step carefully across the rope bridge while the river roars below and a flock of parrots bursts from the canopy above your head.",
+    ],
+    "shop": [
+        "Namaste! Welcome to our voice shopping experience. I can help you browse products, check prices and place orders. What are you looking for today?",
+        "The boAt Rockerz headphones are priced at one thousand four hundred and ninety nine rupees and come with forty hours of playback on a single charge.",
+    ],
+    "improv": [
+        "Welcome to Improv Battle, the show where quick wit meets total chaos, and tonight you are our brave contestant! What's your name?",
+        "Your scene is a waiter who must explain to a very picky customer that the soup of the day is actually alive and has opinions about the menu.",
+    ],
+}
+
+TOKEN = re.compile(r"\S+\s*")
+
+
+def llm_tokens(text: str) -> list[str]:
+    # Roughly one LLM token per word piece
+    return TOKEN.findall(text)
+
+
+async def first_chunk_time(
+    tok: tokenize.SentenceTokenizer, text: str, args: argparse.Namespace
+) -> dict:
+    stream = tok.stream()
+    start = time.perf_counter()
+
+    async def produce() -> None:
+        await asyncio.sleep(args.llm_ttft_ms / 1000)
+        for piece in llm_tokens(text):
+            stream.push_text(piece)
+            await asyncio.sleep(args.llm_token_ms / 1000)
+        stream.end_input()
+
+    producer = asyncio.create_task(produce())
+    first_at: Optional[float] = None
+    first_chunk = ""
+    chunks = 0
+    async for data in stream:
+        chunks += 1
+        if first_at is None:
+            first_at = time.perf_counter() - start
+            first_chunk = data.token
+    await producer
+    return {
+        "first_chunk_s": first_at,
+        "first_chunk_words": len(first_chunk.split()),
+        "chunks": chunks,
+    }
+
+
+async def murf_first_audio(
+    tok: tokenize.SentenceTokenizer,
+    text: str,
+    args: argparse.Namespace,
+    session: aiohttp.ClientSession,
+) -> float:
+    from livekit.plugins import murf
+
+    tts = murf.TTS(
+        voice=args.voice, style=args.style, tokenizer=tok, http_session=session
+    )
+    stream = tts.stream()
+    start = time.perf_counter()
+
+    async def produce() -> None:
+        await asyncio.sleep(args.llm_ttft_ms / 1000)
+        for piece in llm_tokens(text):
+            stream.push_text(piece)
+            await asyncio.sleep(args.llm_token_ms / 1000)
+        stream.end_input()
+
+    producer = asyncio.create_task(produce())
+    try:
+        async for _ in stream:
+            return time.perf_counter() - start
+    finally:
+        producer.cancel()
+        await stream.aclose()
+        await tts.aclose()
+    raise RuntimeError("Murf returned no audio")
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "p95_ms": round(
+            ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 1
+        ),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 1),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    baseline = tokenize.basic.SentenceTokenizer(min_sentence_len=2)
+    results: dict[str, dict[str, list[dict]]] = {"sentence": {}, "clause": {}}
+    session = aiohttp.ClientSession() if args.murf else None
+    try:
+        for name, replies in REPLIES.items():
+            clause = ClauseTokenizer(
+                first_max_words=PERSONAS[name].first_chunk_words or 8
+            )
+            for label, tok in (("sentence", baseline), ("clause", clause)):
+                runs = []
+                for text in replies * args.repeat:
+                    run = await first_chunk_time(tok, text, args)
+                    if args.murf:
+                        run["first_audio_s"] = await murf_first_audio(
+                            tok, text, args, session
+                        )
+                    else:
+                        run["first_audio_s"] = (
+                            run["first_chunk_s"] + args.tts_ttfb_ms / 1000
+                        )
+                    runs.append(run)
+                results[label][name] = runs
+    finally:
+        if session is not None:
+            await session.close()
+
+    report = {"config": vars(args), "tokenizers": {}}
+    for label, by_persona in results.items():
+        runs = [run for persona_runs in by_persona.values() for run in persona_runs]
+        report["tokenizers"][label] = {
+            "first_audio": summarize([r["first_audio_s"] for r in runs]),
+            "mean_first_chunk_words": round(
+                statistics.fmean(r["first_chunk_words"] for r in runs), 1
+            ),
+            "per_persona_p50_ms": {
+                name: summarize([r["first_audio_s"] for r in persona_runs])["p50_ms"]
+                for name, persona_runs in by_persona.items()
+            },
+        }
+    sentence, clause = report["tokenizers"]["sentence"], report["tokenizers"]["clause"]
+    report["p50_saved_ms"] = round(
+        sentence["first_audio"]["p50_ms"] - clause["first_audio"]["p50_ms"], 1
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--llm-ttft-ms",
+        type=float,
+        default=350,
+        help="delay before the first LLM token",
+    )
+    parser.add_argument(
+        "--llm-token-ms", type=float, default=30, help="delay between LLM tokens"
+    )
+    parser.add_argument(
+        "--tts-ttfb-ms",
+        type=float,
+        default=150,
+        help="modelled Murf TTFB (without --murf)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per reply")
+    parser.add_argument(
+        "--murf", action="store_true", help="measure real Murf time to first audio"
+    )
+    parser.add_argument("--voice", default="en-US-alicia")
+    parser.add_argument("--style", default="Conversation")
+    asyncio.run(main(parser.parse_args()))
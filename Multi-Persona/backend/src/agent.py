@@ -0,0 +1,101 @@
+import logging
+import os
+from functools import partial
+
+from dotenv import load_dotenv
+
+load_dotenv(".env.local")
+
+# Sets up multiprocess metrics before prometheus_client is imported elsewhere
+from metrics_export import start_metrics_server  # noqa: E402
+
+# isort: split
+
+from livekit.agents import JobContext, JobExecutorType, JobProcess, WorkerOptions, cli  # noqa: E402
+from livekit.plugins import silero  # noqa: E402
+
+from barge_in import track_barge_in  # noqa: E402
+from context_budget import manage_context  # noqa: E402
+from loop_watchdog import STALL_MS, LoopWatchdog  # noqa: E402
+from personas import enabled_personas, load_persona, resolve_persona  # noqa: E402
+from phrase_cache import PHRASE_CACHE_DIR, PhraseCache  # noqa: E402
+from speech_text import use_speech_normalizer  # noqa: E402
+from tool_trace import flush as flush_tool_trace  # noqa: E402
+from tool_trace import instrument_tools  # noqa: E402
+from turn_latency import track_turn_latency  # noqa: E402
+from warmup import timed, warm_job  # noqa: E402
+
+logger = logging.getLogger("multi-persona")
+
+# Name this worker registers under; rooms dispatch to it and pick the persona
+# in the dispatch metadata, e.g. {"persona": "fraud"}
+AGENT_NAME = os.getenv("LIVEKIT_AGENT_NAME", "murf-personas")
+# Used when a job names no (known) persona
+DEFAULT_PERSONA = os.getenv("DEFAULT_PERSONA")
+# Machine CPU share above which the worker stops accepting jobs; measure it
+# with src/load_sim.py (LiveKit's default is 0.7 in production)
+LOAD_THRESHOLD = os.getenv("LOAD_THRESHOLD")
+
+phrase_cache = PhraseCache(PHRASE_CACHE_DIR)
+
+
+def prewarm(proc: JobProcess):
+    """Load the models once per job process and import every persona."""
+    with timed(proc, "vad"):
+        proc.userdata["vad"] = silero.VAD.load()
+    with timed(proc, "personas"):
+        for persona in enabled_personas():
+            instrument_tools(load_persona(persona), persona.name)
+    with timed(proc, "phrases"):
+        phrase_cache.load()
+    # Personas speak their scripted lines through this
+    proc.userdata["say_scripted"] = phrase_cache.say
+
+
+async def entrypoint(ctx: JobContext):
+    persona = resolve_persona(ctx.job.agent_name, ctx.job.metadata, DEFAULT_PERSONA)
+    if persona is None:
+        logger.error(
+            f"No persona for agent {ctx.job.agent_name!r} with metadata {ctx.job.metadata!r}; "
+            f'set {{"persona": ...}} in the dispatch metadata or DEFAULT_PERSONA'
+        )
+        return
+
+    module = load_persona(persona)
+    # Each job has its own process, so the persona can own the working directory
+    os.chdir(persona.backend_dir)
+    if STALL_MS:
+        # Started first, so stalls during warm-up are reported too
+        ctx.add_shutdown_callback(LoopWatchdog(agent=persona.name).start().close)
+    # Kept referenced until the dummy turn-detector inference finishes
+    ctx.proc.userdata["warmup_task"] = warm_job(ctx, persona, module, phrase_cache)
+    # Called by the persona's entrypoint with its AgentSession
+    hooks = [
+        partial(track_turn_latency, agent=persona.name),
+        use_speech_normalizer,
+        partial(track_barge_in, agent=persona.name),
+    ]
+    if persona.context_budget:
+        hooks.append(
+            partial(manage_context, agent=persona.name, budget=persona.context_budget)
+        )
+    ctx.proc.userdata["session_hooks"] = hooks
+    ctx.add_shutdown_callback(flush_tool_trace)
+    logger.info(
+        f"Dispatching room {ctx.room.name} to persona {persona.name} ({persona.day})"
+    )
+    await module.entrypoint(ctx)
+
+
+if __name__ == "__main__":
+    start_metrics_server()
+    load_options = {"load_threshold": float(LOAD_THRESHOLD)} if LOAD_THRESHOLD else {}
+    cli.run_app(
+        WorkerOptions(
+            entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            agent_name=AGENT_NAME,
+            job_executor_type=JobExecutorType.PROCESS,
+            **load_options,
+        )
+    )
@@ -0,0 +1,219 @@
+"""Prompt clean-up of cancelled replies, and what they cost.
+
+A reply stops before it is fully heard when the user barges in, or when a
+preemptive reply (``preemptive_generation=True``, started on the interim
+transcript) is discarded because the final transcript or the chat context
+changed. LiveKit cancels the speech's LLM and TTS tasks right away, but the
+Murf websocket the TTS stream was using is only marked for closing: the
+connection pool closes it the next time a reply asks for a connection.
+Until then Murf goes on synthesizing the text it was sent, and the next
+reply waits for that close handshake before it can start.
+
+``track_barge_in(ctx, session)`` is a session hook that, as soon as a
+cancelled speech is done:
+
+- has the pool close the sockets marked for closing, and keep a fresh one
+  ready, so the next reply starts on a warm connection;
+- compares the characters sent to Murf for the speech (counted by
+  ``SpeechNormalizer``) with the characters the user actually heard, and
+  counts the difference in ``agent_wasted_tts_characters_total``;
+- counts the LLM completion tokens of the part that was not heard in
+  ``agent_wasted_llm_tokens_total``. A stream cancelled before the usage
+  arrived reports no tokens; they are estimated from its text instead.
+
+Counters are labelled by agent and reason ("interrupted" or "preemptive").
+The pool is murf.TTS's private ``_pool`` attribute. With a TTS engine
+that has none, or a plugin release that keeps it elsewhere, nothing is
+closed early and the waste is still counted.
+The totals of the session are logged when the job ends.
+"""
+
+import asyncio
+import logging
+import math
+from collections import OrderedDict
+from typing import Optional
+
+from livekit.agents import (
+    AgentSession,
+    ConversationItemAddedEvent,
+    JobContext,
+    MetricsCollectedEvent,
+    SpeechCreatedEvent,
+    llm,
+    metrics,
+    tts,
+    utils,
+)
+from livekit.agents.voice import SpeechHandle
+from prometheus_client import Counter
+
+from context_budget import CHARS_PER_TOKEN
+from speech_text import SpeechNormalizer, normalize
+
+logger = logging.getLogger("barge-in")
+
+# Speeches and interrupted messages kept until their speech is done
+MAX_PENDING = 32
+RECONNECT_TIMEOUT = 10.0
+
+CANCELLED_SPEECHES = Counter(
+    "agent_cancelled_speeches_total",
+    "Replies cancelled before they were fully heard",
+    ["agent", "reason"],
+)
+WASTED_TTS_CHARACTERS = Counter(
+    "agent_wasted_tts_characters_total",
+    "Characters sent to Murf for the unheard part of cancelled replies",
+    ["agent", "reason"],
+)
+WASTED_LLM_TOKENS = Counter(
+    "agent_wasted_llm_tokens_total",
+    "LLM completion tokens of the unheard part of cancelled replies",
+    ["agent", "reason"],
+)
+
+
+def connection_pool(engine: Optional[tts.TTS]) -> Optional[utils.ConnectionPool]:
+    # murf.TTS keeps its websockets in a pool; engines without one have nothing to close
+    pool = getattr(engine, "_pool", None)
+    return pool if isinstance(pool, utils.ConnectionPool) else None
+
+
+def _trim(pending: "OrderedDict") -> None:
+    while len(pending) > MAX_PENDING:
+        pending.popitem(last=False)
+
+
+class BargeInTracker:
+    def __init__(
+        self,
+        agent: str,
+        tokenizer: Optional[SpeechNormalizer],
+        engine: Optional[tts.TTS],
+    ):
+        self.agent = agent
+        self.tokenizer = tokenizer
+        self.pool = connection_pool(engine)
+        # speech_id -> LLM completion tokens
+        self.tokens: OrderedDict[str, int] = OrderedDict()
+        # message id -> text heard before the interruption
+        self.heard: OrderedDict[str, str] = OrderedDict()
+        self.totals: dict[str, int] = {
+            "speeches": 0,
+            "interrupted": 0,
+            "preemptive": 0,
+            "tts_characters": 0,
+            "wasted_tts_characters": 0,
+            "llm_tokens": 0,
+            "wasted_llm_tokens": 0,
+        }
+        self.tasks: set[asyncio.Task[None]] = set()
+
+    def speech_created(self, handle: SpeechHandle) -> None:
+        self.totals["speeches"] += 1
+        handle.add_done_callback(self.speech_done)
+
+    def collect(self, m: metrics.AgentMetrics) -> None:
+        if isinstance(m, metrics.LLMMetrics) and m.speech_id:
+            self.tokens[m.speech_id] = (
+                self.tokens.get(m.speech_id, 0) + m.completion_tokens
+            )
+            self.totals["llm_tokens"] += m.completion_tokens
+            _trim(self.tokens)
+
+    def item_added(self, item: llm.ChatItem) -> None:
+        # The copy of an interrupted reply holds only what was played
+        if (
+            isinstance(item, llm.ChatMessage)
+            and item.role == "assistant"
+            and item.interrupted
+        ):
+            self.heard[item.id] = item.text_content or ""
+            _trim(self.heard)
+
+    def speech_done(self, handle: SpeechHandle) -> None:
+        tokens = self.tokens.pop(handle.id, 0)
+        generated, sent = (
+            self.tokenizer.pop_speech(handle.id) if self.tokenizer else (0, 0)
+        )
+        self.totals["tts_characters"] += sent
+        if not handle.interrupted:
+            return
+
+        # A discarded preemptive reply was never scheduled to play
+        reason = "interrupted" if handle.scheduled else "preemptive"
+        self.close_cancelled()
+        if not tokens and generated:
+            # Cancelled before the LLM reported its usage
+            tokens = math.ceil(generated / CHARS_PER_TOKEN)
+            self.totals["llm_tokens"] += tokens
+        heard = sum(
+            len(normalize(self.heard.pop(item.id, "")))
+            for item in handle.chat_items
+            if isinstance(item, llm.ChatMessage)
+        )
+        wasted = max(0, sent - heard)
+        wasted_tokens = round(tokens * wasted / sent) if sent else tokens
+
+        self.totals[reason] += 1
+        self.totals["wasted_tts_characters"] += wasted
+        self.totals["wasted_llm_tokens"] += wasted_tokens
+        CANCELLED_SPEECHES.labels(agent=self.agent, reason=reason).inc()
+        WASTED_TTS_CHARACTERS.labels(agent=self.agent, reason=reason).inc(wasted)
+        WASTED_LLM_TOKENS.labels(agent=self.agent, reason=reason).inc(wasted_tokens)
+        logger.debug(
+            f"Speech {handle.id} {reason}: {wasted}/{sent} TTS characters and ~{wasted_tokens}/{tokens} "
+            "LLM tokens unheard"
+        )
+
+    def close_cancelled(self) -> None:
+        if self.pool is None:
+            return
+        task = asyncio.get_running_loop().create_task(self._reconnect(self.pool))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    @staticmethod
+    async def _reconnect(pool: utils.ConnectionPool) -> None:
+        # Taking a connection closes the ones marked for closing, and this one goes back
+        # to the pool ready for the next reply
+        try:
+            async with pool.connection(timeout=RECONNECT_TIMEOUT):
+                pass
+        except Exception as e:
+            logger.warning(
+                f"Could not reopen the TTS connection after a cancelled reply: {e}"
+            )
+
+    async def close(self) -> None:
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.totals["interrupted"] or self.totals["preemptive"]:
+            logger.info(f"Cancelled replies for {self.agent}: {self.totals}")
+
+
+def track_barge_in(
+    ctx: JobContext, session: AgentSession, agent: Optional[str] = None
+) -> BargeInTracker:
+    """Close Murf promptly after a cancelled reply and count what it wasted, for the lifetime of the job."""
+    tracker = BargeInTracker(
+        agent or ctx.job.agent_name or "agent",
+        ctx.proc.userdata.get("speech_tokenizer"),
+        session.tts,
+    )
+
+    @session.on("speech_created")
+    def _on_speech_created(ev: SpeechCreatedEvent):
+        tracker.speech_created(ev.speech_handle)
+
+    @session.on("metrics_collected")
+    def _on_metrics_collected(ev: MetricsCollectedEvent):
+        tracker.collect(ev.metrics)
+
+    @session.on("conversation_item_added")
+    def _on_conversation_item_added(ev: ConversationItemAddedEvent):
+        tracker.item_added(ev.item)
+
+    ctx.add_shutdown_callback(tracker.close)
+    return tracker
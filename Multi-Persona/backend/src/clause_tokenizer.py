@@ -0,0 +1,156 @@
+"""Streaming sentence tokenizer that lets the first words of a reply out early.
+
+``tokenize.basic.SentenceTokenizer`` holds text back until a whole sentence
+has arrived from the LLM, so a long opening sentence delays the first Murf
+audio by however long the LLM takes to write it. ``ClauseTokenizer`` flushes
+the first chunk of each segment at the first clause boundary instead:
+- a sentence end;
+- a comma, semicolon, colon or dash, once ``first_min_words`` are in;
+- the word before a conjunction, once ``first_min_words`` are in;
+- otherwise after ``first_max_words`` words.
+
+After that it goes back to sentence-sized chunks (at least
+``min_sentence_len`` characters), which keeps the prosody of the rest of the
+reply natural.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from livekit.agents import tokenize, utils
+
+CONJUNCTIONS = frozenset(
+    {
+        "and",
+        "but",
+        "or",
+        "so",
+        "because",
+        "which",
+        "while",
+        "then",
+        "although",
+        "though",
+        "since",
+        "unless",
+    }
+)
+# Not sentence ends, even though they end in a period
+ABBREVIATIONS = frozenset(
+    {"mr.", "mrs.", "ms.", "dr.", "st.", "rs.", "no.", "vs.", "e.g.", "i.e.", "etc."}
+)
+
+COMPLETE_WORD = re.compile(r"\S+\s+")
+SENTENCE_END = re.compile(r"""[.!?]+["')\]]*$""")
+# A lone hyphen, en dash (U+2013) or em dash (U+2014)
+CLAUSE_END = re.compile(r"""[,;:]["')\]]*$|^[-\u2013\u2014]+$""")
+
+
+@dataclass
+class ClauseChunking:
+    first_min_words: int = 3
+    first_max_words: int = 8
+    min_sentence_len: int = 20
+
+
+def _is_sentence_end(word: str) -> bool:
+    return bool(SENTENCE_END.search(word)) and word.lower() not in ABBREVIATIONS
+
+
+class ClauseChunker:
+    """Turns streamed text into chunks: an early clause first, then sentences."""
+
+    def __init__(self, opts: ClauseChunking):
+        self.opts = opts
+        self.buf = ""
+        self.first = True
+
+    def push(self, text: str) -> list[str]:
+        self.buf += text
+        chunks = []
+        while True:
+            cut = self._first_cut() if self.first else self._sentence_cut()
+            if cut is None:
+                return chunks
+            chunk, self.buf = self.buf[:cut].strip(), self.buf[cut:].lstrip()
+            if chunk:
+                chunks.append(chunk)
+                self.first = False
+
+    def flush(self) -> list[str]:
+        rest, self.buf, self.first = self.buf.strip(), "", True
+        return [rest] if rest else []
+
+    def _first_cut(self) -> Optional[int]:
+        words = list(COMPLETE_WORD.finditer(self.buf))
+        for i, match in enumerate(words):
+            word = match.group().strip()
+            count = i + 1
+            if _is_sentence_end(word):
+                return match.end()
+            if count < self.opts.first_min_words:
+                continue
+            if CLAUSE_END.search(word) or count >= self.opts.first_max_words:
+                return match.end()
+            if (
+                i + 1 < len(words)
+                and words[i + 1].group().strip().lower() in CONJUNCTIONS
+            ):
+                return match.end()
+        return None
+
+    def _sentence_cut(self) -> Optional[int]:
+        for match in COMPLETE_WORD.finditer(self.buf):
+            if match.end() >= self.opts.min_sentence_len and _is_sentence_end(
+                match.group().strip()
+            ):
+                return match.end()
+        return None
+
+
+class ClauseSentenceStream(tokenize.SentenceStream):
+    def __init__(self, opts: ClauseChunking):
+        super().__init__()
+        self._chunker = ClauseChunker(opts)
+        self._segment_id = utils.shortuuid()
+
+    def _send(self, chunks: list[str]) -> None:
+        for chunk in chunks:
+            self._event_ch.send_nowait(
+                tokenize.TokenData(segment_id=self._segment_id, token=chunk)
+            )
+
+    def push_text(self, text: str) -> None:
+        self._check_not_closed()
+        self._send(self._chunker.push(text))
+
+    def flush(self) -> None:
+        self._check_not_closed()
+        self._send(self._chunker.flush())
+        self._segment_id = utils.shortuuid()
+
+    def end_input(self) -> None:
+        self.flush()
+        self._do_close()
+
+    async def aclose(self) -> None:
+        self._do_close()
+
+
+class ClauseTokenizer(tokenize.SentenceTokenizer):
+    def __init__(
+        self,
+        *,
+        first_min_words: int = 3,
+        first_max_words: int = 8,
+        min_sentence_len: int = 20,
+    ):
+        self.opts = ClauseChunking(first_min_words, first_max_words, min_sentence_len)
+
+    def tokenize(self, text: str, *, language: Optional[str] = None) -> list[str]:
+        chunker = ClauseChunker(self.opts)
+        return chunker.push(text + " ") + chunker.flush()
+
+    def stream(self, *, language: Optional[str] = None) -> ClauseSentenceStream:
+        return ClauseSentenceStream(self.opts)
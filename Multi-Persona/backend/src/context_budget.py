@@ -0,0 +1,310 @@
+"""Bounded chat context with a rolling summary for long sessions.
+
+Without it the chat context of a long adventure (Day-8) or shopping run
+(Day-7) grows by every turn, and so do Gemini's prompt tokens and TTFT.
+``manage_context(ctx, session, agent=..., budget=...)`` keeps the estimated
+size of the agent's chat context under ``budget`` tokens:
+
+- after each agent reply the context is measured (about 4 characters per
+  token, the same order as Gemini's tokenizer for English)
+- once it is over budget, a background task asks the session's LLM to fold
+  the older user/agent messages, together with the previous summary, into
+  one new summary; the last ``keep_messages`` messages stay verbatim
+- the summary replaces the folded messages through ``Agent.update_chat_ctx``
+  in a single step, so a reply generated meanwhile is never cut short
+
+Pinned items are never folded: system instructions, tool calls and tool
+results (the cart, the game state...) and agent handoffs. If the LLM call
+fails, the summary falls back to the tail of the folded transcript. When a
+compaction still leaves the context over budget (the pinned items and the
+kept messages alone exceed it), the next one waits until user and agent
+messages worth half the budget have piled up again, rather than calling the
+LLM every other turn for a few messages.
+
+Prompt tokens reported by the LLM for every turn go to the
+``agent_prompt_tokens`` histogram and compactions to
+``agent_context_compactions_total``; both are logged with a per-session
+summary when the job ends.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from typing import Optional
+
+from livekit.agents import (
+    AgentSession,
+    ConversationItemAddedEvent,
+    JobContext,
+    MetricsCollectedEvent,
+    llm,
+    metrics,
+    utils,
+)
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger("context-budget")
+
+CHARS_PER_TOKEN = 4
+# Role markers and separators the provider adds around every item
+ITEM_OVERHEAD_TOKENS = 4
+# Messages kept verbatim after a compaction (user and agent, so ~4 exchanges)
+KEEP_MESSAGES = 8
+# Fewer foldable messages than this are not worth an LLM call
+MIN_FOLD_MESSAGES = 4
+# After a compaction that stayed over budget, new messages worth this share of
+# the budget before the next one
+REGROW_FRACTION = 0.5
+SUMMARY_WORDS = 120
+SUMMARY_TIMEOUT = 20.0
+SUMMARY_ID_PREFIX = "ctx_summary_"
+SUMMARY_HEADER = "Summary of the conversation so far:"
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain the memory of a voice assistant. Rewrite the summary and transcript you are given "
+    f"into one updated summary of at most {SUMMARY_WORDS} words. Keep names, choices, quantities, "
+    "prices, progress and anything the user asked for that is still open. Plain sentences, no lists, "
+    "no markdown."
+)
+
+PROMPT_TOKENS = Histogram(
+    "agent_prompt_tokens",
+    "LLM prompt tokens per turn",
+    ["agent"],
+    buckets=(250, 500, 1000, 2000, 3000, 4000, 6000, 8000, 12000, 16000, 32000),
+)
+CONTEXT_COMPACTIONS = Counter(
+    "agent_context_compactions_total",
+    "Chat context compactions by how the summary was produced",
+    ["agent", "method"],
+)
+
+
+def estimate_tokens(item: llm.ChatItem) -> int:
+    if item.type == "message":
+        text = item.text_content or ""
+    elif item.type == "function_call":
+        text = item.name + item.arguments
+    elif item.type == "function_call_output":
+        text = item.output
+    else:
+        text = ""
+    return ITEM_OVERHEAD_TOKENS + len(text) // CHARS_PER_TOKEN
+
+
+def context_tokens(chat_ctx: llm.ChatContext) -> int:
+    return sum(estimate_tokens(item) for item in chat_ctx.items)
+
+
+def foldable_tokens(chat_ctx: llm.ChatContext) -> int:
+    return sum(estimate_tokens(item) for item in chat_ctx.items if is_foldable(item))
+
+
+def is_summary(item: llm.ChatItem) -> bool:
+    return item.id.startswith(SUMMARY_ID_PREFIX)
+
+
+def is_foldable(item: llm.ChatItem) -> bool:
+    """User and agent messages; everything else is pinned."""
+    return item.type == "message" and item.role in ("user", "assistant")
+
+
+def plan_compaction(
+    chat_ctx: llm.ChatContext, keep_messages: int = KEEP_MESSAGES
+) -> tuple[Optional[llm.ChatMessage], list[llm.ChatMessage]]:
+    """The current summary (if any) and the messages to fold into the next one."""
+    summary = next((item for item in chat_ctx.items if is_summary(item)), None)
+    messages = [item for item in chat_ctx.items if is_foldable(item)]
+    return summary, messages[: max(0, len(messages) - keep_messages)]
+
+
+def transcript(
+    summary: Optional[llm.ChatMessage], folded: list[llm.ChatMessage]
+) -> str:
+    lines = []
+    if summary is not None:
+        lines.append(
+            (summary.text_content or "").replace(SUMMARY_HEADER, "Previous summary:", 1)
+        )
+    for message in folded:
+        speaker = "User" if message.role == "user" else "Agent"
+        lines.append(f"{speaker}: {message.text_content or ''}")
+    return "\n".join(lines)
+
+
+def fallback_summary(text: str) -> str:
+    """Tail of the transcript, cut to roughly the size of an LLM summary."""
+    limit = SUMMARY_WORDS * 6
+    return text if len(text) <= limit else "..." + text[-limit:]
+
+
+def compacted(
+    chat_ctx: llm.ChatContext, replaced: list[llm.ChatItem], summary_text: str
+) -> llm.ChatContext:
+    """``chat_ctx`` with ``replaced`` swapped for a summary where the first of them was."""
+    ids = {item.id for item in replaced}
+    items = chat_ctx.copy().items
+    position = next((i for i, item in enumerate(items) if item.id in ids), len(items))
+    kept = [item for item in items if item.id not in ids]
+    summary = llm.ChatMessage(
+        id=utils.shortuuid(SUMMARY_ID_PREFIX),
+        role="system",
+        content=[f"{SUMMARY_HEADER} {summary_text}"],
+        # ChatContext.insert() orders by created_at; keep the summary where it stands
+        created_at=items[position].created_at if position < len(items) else time.time(),
+    )
+    kept.insert(position, summary)
+    return llm.ChatContext(kept)
+
+
+class ContextBudget:
+    def __init__(
+        self,
+        session: AgentSession,
+        agent: str,
+        budget: int,
+        keep_messages: int = KEEP_MESSAGES,
+    ):
+        self.session = session
+        self.agent = agent
+        self.budget = budget
+        self.keep_messages = keep_messages
+        self.task: Optional[asyncio.Task[None]] = None
+        self.turns = 0
+        self.prompt_tokens: list[int] = []
+        self.compactions = 0
+        self.tokens_folded = 0
+        # Foldable tokens left by the last compaction, if it stayed over budget
+        self.regrow_from: Optional[int] = None
+        self.over_budget = 0
+
+    def observe(self, m: metrics.AgentMetrics) -> None:
+        # Only turn replies carry a speech_id; the summary calls do not
+        if isinstance(m, metrics.LLMMetrics) and m.speech_id:
+            self.turns += 1
+            self.prompt_tokens.append(m.prompt_tokens)
+            PROMPT_TOKENS.labels(agent=self.agent).observe(m.prompt_tokens)
+
+    def check(self, item: llm.ChatItem) -> None:
+        """Start a compaction after an agent reply if the context is over budget."""
+        if item.type != "message" or item.role != "assistant":
+            return
+        if self.task is not None and not self.task.done():
+            return
+        agent = self.session.current_agent
+        size = context_tokens(agent.chat_ctx)
+        if size <= self.budget:
+            return
+        if (
+            self.regrow_from is not None
+            and foldable_tokens(agent.chat_ctx) - self.regrow_from
+            < self.budget * REGROW_FRACTION
+        ):
+            return
+        summary, folded = plan_compaction(agent.chat_ctx, self.keep_messages)
+        if len(folded) < MIN_FOLD_MESSAGES:
+            return
+        # A fresh context, so the summary's LLM metrics are not attributed to the reply
+        self.task = contextvars.Context().run(
+            asyncio.create_task, self.compact(agent, summary, folded, size)
+        )
+
+    async def summarize(self, text: str) -> tuple[str, str]:
+        chat_ctx = llm.ChatContext.empty()
+        chat_ctx.add_message(role="system", content=SUMMARY_INSTRUCTIONS)
+        chat_ctx.add_message(role="user", content=text)
+
+        async def run() -> str:
+            pieces = []
+            async with self.session.llm.chat(chat_ctx=chat_ctx) as stream:
+                async for chunk in stream:
+                    if chunk.delta and chunk.delta.content:
+                        pieces.append(chunk.delta.content)
+            return "".join(pieces).strip()
+
+        try:
+            summary = await asyncio.wait_for(run(), SUMMARY_TIMEOUT)
+            if summary:
+                return summary, "llm"
+        except Exception as e:
+            logger.warning(f"Context summary failed, keeping the transcript tail: {e}")
+        return fallback_summary(text), "fallback"
+
+    async def compact(
+        self,
+        agent,
+        summary: Optional[llm.ChatMessage],
+        folded: list[llm.ChatMessage],
+        size: int,
+    ) -> None:
+        summary_text, method = await self.summarize(transcript(summary, folded))
+        replaced: list[llm.ChatItem] = (
+            [summary] if summary is not None else []
+        ) + folded
+        # Applied to the context as it is now; turns added meanwhile are kept
+        chat_ctx = compacted(agent.chat_ctx, replaced, summary_text)
+        await agent.update_chat_ctx(chat_ctx)
+        after = context_tokens(chat_ctx)
+        self.compactions += 1
+        self.tokens_folded += max(0, size - after)
+        CONTEXT_COMPACTIONS.labels(agent=self.agent, method=method).inc()
+        logger.info(
+            f"Compacted {self.agent} context: {len(folded)} messages folded ({method}), "
+            f"~{size} -> ~{after} tokens (budget {self.budget})"
+        )
+        if after <= self.budget:
+            self.regrow_from = None
+            return
+        # What is left is pinned or kept verbatim; folding again only pays off
+        # once enough new messages have come in
+        self.regrow_from = foldable_tokens(chat_ctx)
+        self.over_budget += 1
+        logger.warning(
+            f"{self.agent} context is still ~{after} tokens after compacting, over the "
+            f"budget of {self.budget}; waiting for more messages before the next one"
+        )
+
+    def summary(self) -> dict:
+        return {
+            "agent": self.agent,
+            "budget": self.budget,
+            "turns": self.turns,
+            "prompt_tokens_last": self.prompt_tokens[-1]
+            if self.prompt_tokens
+            else None,
+            "prompt_tokens_max": max(self.prompt_tokens, default=None),
+            "compactions": self.compactions,
+            "tokens_folded": self.tokens_folded,
+            "over_budget": self.over_budget,
+        }
+
+    async def close(self) -> None:
+        if self.task is not None:
+            await utils.aio.cancel_and_wait(self.task)
+        logger.info(f"Context budget: {json.dumps(self.summary())}")
+
+
+def manage_context(
+    ctx: JobContext,
+    session: AgentSession,
+    agent: Optional[str] = None,
+    budget: int = 4000,
+    keep_messages: int = KEEP_MESSAGES,
+) -> ContextBudget:
+    """Keep the chat context of ``session``'s current agent under ``budget`` estimated tokens."""
+    manager = ContextBudget(
+        session, agent or ctx.job.agent_name or "agent", budget, keep_messages
+    )
+
+    @session.on("conversation_item_added")
+    def _on_conversation_item_added(ev: ConversationItemAddedEvent):
+        manager.check(ev.item)
+
+    @session.on("metrics_collected")
+    def _on_metrics_collected(ev: MetricsCollectedEvent):
+        manager.observe(ev.metrics)
+
+    ctx.add_shutdown_callback(manager.close)
+    return manager
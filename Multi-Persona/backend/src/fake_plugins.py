@@ -0,0 +1,300 @@
+"""Scripted STT, LLM and TTS plugins for running the personas offline.
+
+Nothing leaves the process. ``FakeSTT`` returns the transcripts it is
+given, ``FakeLLM`` plays back scripted replies and tool calls, and
+``FakeTTS`` turns text into silence of a plausible length. Each one first
+waits its configured latency (``FakeLatency``): all zero to measure our
+own overhead, or values close to Deepgram/Gemini/Murf to pace a run like
+a real call. ``NullAudioOutput`` plays every segment instantly, so a
+session without a room still runs its TTS.
+
+A scripted LLM reply is a dict with ``text`` and/or ``tool_calls``::
+
+    {"tool_calls": [{"name": "add_item_to_cart", "arguments": {"item_name": "bread"}}]}
+    {"text": "Added a loaf of bread. Anything else?"}
+
+Every ``chat()`` call consumes one reply, so a turn that calls a tool
+needs two: the tool call, then the answer given once the tool has run.
+"""
+
+import asyncio
+import json
+import re
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from livekit import rtc
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectOptions,
+    NotGivenOr,
+    llm,
+    stt,
+    tokenize,
+    tts,
+    utils,
+)
+from livekit.agents.types import NOT_GIVEN
+from livekit.agents.utils import AudioBuffer
+from livekit.agents.voice import io
+
+# What FakeLLM answers once its script has run out
+FALLBACK_REPLY = "Sorry, could you say that again?"
+# Speaking rate used to size FakeTTS audio
+CHARS_PER_SECOND = 15
+
+TOKEN = re.compile(r"\S+\s*")
+
+
+@dataclass
+class FakeLatency:
+    stt_ms: float = 0
+    llm_ttft_ms: float = 0
+    llm_token_ms: float = 0
+    tts_ttfb_ms: float = 0
+
+
+async def _wait(ms: float) -> None:
+    # Always yield, so a zero-latency run still interleaves like a real one
+    await asyncio.sleep(ms / 1000)
+
+
+class FakeSTT(stt.STT):
+    def __init__(self, latency: Optional[FakeLatency] = None):
+        super().__init__(
+            capabilities=stt.STTCapabilities(streaming=False, interim_results=False)
+        )
+        self.latency = latency or FakeLatency()
+        self.transcripts: deque[str] = deque()
+
+    async def _recognize_impl(
+        self,
+        buffer: AudioBuffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions,
+    ) -> stt.SpeechEvent:
+        await _wait(self.latency.stt_ms)
+        text = self.transcripts.popleft() if self.transcripts else ""
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            request_id=utils.shortuuid("fake_stt_"),
+            alternatives=[stt.SpeechData(language="en", text=text, confidence=1.0)],
+        )
+
+
+class FakeLLM(llm.LLM):
+    def __init__(self, latency: Optional[FakeLatency] = None):
+        super().__init__()
+        self.latency = latency or FakeLatency()
+        self.replies: deque[dict[str, Any]] = deque()
+        # chat() calls that found no scripted reply left
+        self.unscripted = 0
+
+    @property
+    def model(self) -> str:
+        return "fake"
+
+    def script(self, replies: Iterable[dict[str, Any]]) -> None:
+        self.replies.extend(replies)
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list[llm.FunctionTool]] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        **kwargs: Any,
+    ) -> "FakeLLMStream":
+        if self.replies:
+            reply = self.replies.popleft()
+        else:
+            self.unscripted += 1
+            reply = {"text": FALLBACK_REPLY}
+        return FakeLLMStream(
+            self, reply, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options
+        )
+
+
+class FakeLLMStream(llm.LLMStream):
+    def __init__(self, fake: FakeLLM, reply: dict[str, Any], **kwargs: Any):
+        super().__init__(fake, **kwargs)
+        self._fake = fake
+        self._reply = reply
+
+    async def _run(self) -> None:
+        request_id = utils.shortuuid("fake_llm_")
+        await _wait(self._fake.latency.llm_ttft_ms)
+        pieces = TOKEN.findall(self._reply.get("text", ""))
+        for i, piece in enumerate(pieces):
+            if i:
+                await _wait(self._fake.latency.llm_token_ms)
+            self._event_ch.send_nowait(
+                llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(role="assistant", content=piece),
+                )
+            )
+
+        calls = [
+            llm.FunctionToolCall(
+                name=call["name"],
+                arguments=json.dumps(call.get("arguments", {})),
+                call_id=f"{request_id}_{i}",
+            )
+            for i, call in enumerate(self._reply.get("tool_calls", []))
+        ]
+        if calls:
+            self._event_ch.send_nowait(
+                llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(role="assistant", tool_calls=calls),
+                )
+            )
+
+        # Rough token counts, so usage metrics move like they do with a real model
+        prompt_tokens = sum(
+            len(str(item.model_dump()).split()) for item in self._chat_ctx.items
+        )
+        completion_tokens = len(pieces) + 8 * len(calls)
+        self._event_ch.send_nowait(
+            llm.ChatChunk(
+                id=request_id,
+                usage=llm.CompletionUsage(
+                    completion_tokens=completion_tokens,
+                    prompt_tokens=prompt_tokens,
+                    total_tokens=prompt_tokens + completion_tokens,
+                ),
+            )
+        )
+
+
+def _silence(text: str, sample_rate: int) -> bytes:
+    samples = int(len(text) / CHARS_PER_SECOND * sample_rate)
+    return bytes(2 * samples)
+
+
+class FakeTTS(tts.TTS):
+    """Streaming TTS that splits text with ``tokenizer`` like murf.TTS does."""
+
+    def __init__(
+        self,
+        latency: Optional[FakeLatency] = None,
+        *,
+        sample_rate: int = 16000,
+        tokenizer: Optional[tokenize.SentenceTokenizer] = None,
+    ):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=True),
+            sample_rate=sample_rate,
+            num_channels=1,
+        )
+        self.latency = latency or FakeLatency()
+        self.tokenizer = tokenizer or tokenize.basic.SentenceTokenizer(
+            min_sentence_len=2
+        )
+        # Characters sent for synthesis
+        self.characters = 0
+
+    def synthesize(
+        self,
+        text: str,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> "FakeChunkedStream":
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(
+        self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "FakeSynthesizeStream":
+        return FakeSynthesizeStream(tts=self, conn_options=conn_options)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        fake: FakeTTS = self._tts
+        await _wait(fake.latency.tts_ttfb_ms)
+        output_emitter.initialize(
+            request_id=utils.shortuuid("fake_tts_"),
+            sample_rate=fake.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        fake.characters += len(self.input_text)
+        output_emitter.push(_silence(self.input_text, fake.sample_rate))
+        output_emitter.flush()
+
+
+class FakeSynthesizeStream(tts.SynthesizeStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        fake: FakeTTS = self._tts
+        output_emitter.initialize(
+            request_id=utils.shortuuid("fake_tts_"),
+            sample_rate=fake.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=utils.shortuuid())
+        sentences = fake.tokenizer.stream()
+
+        async def input_task() -> None:
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    sentences.flush()
+                    continue
+                sentences.push_text(data)
+            sentences.end_input()
+
+        task = asyncio.create_task(input_task())
+        try:
+            first = True
+            async for ev in sentences:
+                self._mark_started()
+                if first:
+                    first = False
+                    await _wait(fake.latency.tts_ttfb_ms)
+                fake.characters += len(ev.token)
+                output_emitter.push(_silence(ev.token, fake.sample_rate))
+            output_emitter.end_input()
+        finally:
+            await utils.aio.gracefully_cancel(task)
+            await sentences.aclose()
+
+
+class NullAudioOutput(io.AudioOutput):
+    """Audio sink that finishes playing each segment as soon as it is flushed."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            label="NullAudioOutput",
+            capabilities=io.AudioOutputCapabilities(pause=False),
+        )
+        self._segment_duration = 0.0
+        self._capturing = False
+        # Seconds of agent audio received
+        self.played = 0.0
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        self._capturing = True
+        self._segment_duration += frame.duration
+
+    def _finish(self, interrupted: bool) -> None:
+        if not self._capturing:
+            return
+        self._capturing = False
+        self.played += self._segment_duration
+        self.on_playback_finished(
+            playback_position=self._segment_duration, interrupted=interrupted
+        )
+        self._segment_duration = 0.0
+
+    def flush(self) -> None:
+        super().flush()
+        self._finish(interrupted=False)
+
+    def clear_buffer(self) -> None:
+        self._finish(interrupted=True)
@@ -0,0 +1,538 @@
+"""Concurrent-session load simulator: how many rooms fit before audio suffers.
+
+    uv run python src/load_sim.py --sessions 1,2,4,8,16 --audio caller.wav
+    uv run python src/load_sim.py --sessions 1,2,4,8 --layout shared --out curve.json
+
+Every simulated participant streams audio in real time into its own
+``AgentSession``. The audio is a recorded WAV file (16-bit mono) or,
+without ``--audio``, a synthetic voice-like signal. The session runs the
+same local work as a real room:
+
+- silero VAD on every input frame;
+- the multilingual turn detector at the end of each user turn (``--turn-detector none`` skips it);
+- TTS audio played out at real-time pace.
+
+STT, LLM and TTS are the fakes from ``fake_plugins`` with realistic latencies,
+so the network never counts. BVC noise cancellation runs inside the LiveKit
+room's audio stream and cannot be simulated without a room, so it is left out.
+
+Sessions are laid out one per process (``--layout process``, what the
+worker's ``JobExecutorType.PROCESS`` does) or all in one process
+(``--layout shared``, the per-process ceiling). For every step of
+``--sessions`` the report gives:
+
+- CPU per session and for the whole machine;
+- RSS per process and per session;
+- event-loop lag;
+- the input frame drop rate: frames consumed more than ``--max-input-delay-ms`` after capture;
+- output underruns: gaps in agent audio that a listener would hear;
+- event-loop stalls over ``--stall-ms``, from ``loop_watchdog``.
+
+A step is healthy when it meets the ``--max-*`` limits. The worker's
+default ``load_fnc`` reports machine CPU, so the machine CPU at the largest
+healthy step is suggested as ``LOAD_THRESHOLD``.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+import wave
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import psutil
+from livekit import rtc
+from livekit.agents import Agent, AgentSession, vad
+from livekit.agents.utils.hw import get_cpu_monitor
+from livekit.agents.voice import io
+
+from fake_plugins import FakeLatency, FakeLLM, FakeTTS
+from loop_watchdog import LoopWatchdog
+
+FRAME_MS = 50  # what room_io reads from a participant's track
+SAMPLE_RATE = 16000
+
+REPLY = (
+    "Sure, I can help with that. I have added it to your cart and your total is now four hundred and twenty rupees. "
+    "Would you like anything else today?"
+)
+
+
+@dataclass
+class SimConfig:
+    duration: float = 30.0
+    warmup: float = 5.0
+    turn_interval: float = 6.0
+    turn_detector: str = "multilingual"
+    audio: Optional[str] = None
+    max_input_delay_ms: float = 200.0
+    llm_ttft_ms: float = 400.0
+    llm_token_ms: float = 30.0
+    tts_ttfb_ms: float = 250.0
+    stall_ms: float = 100.0
+    seed: int = 0
+
+
+def load_audio(path: Optional[str]) -> rtc.AudioFrame:
+    """The caller's audio, looped by every participant."""
+    if path:
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                raise ValueError(f"{path}: expected 16-bit mono audio")
+            rate = wav.getframerate()
+            data = wav.readframes(wav.getnframes())
+        return rtc.AudioFrame(
+            data=data,
+            sample_rate=rate,
+            num_channels=1,
+            samples_per_channel=len(data) // 2,
+        )
+
+    # Two seconds of a pitched, syllable-modulated tone, then two of silence
+    samples = []
+    for i in range(4 * SAMPLE_RATE):
+        t = i / SAMPLE_RATE
+        if t < 2:
+            envelope = 0.5 * (1 - math.cos(2 * math.pi * 4 * t))
+            tone = sum(
+                math.sin(2 * math.pi * f * t) / n
+                for n, f in enumerate((140, 280, 420, 700), 1)
+            )
+            samples.append(int(6000 * envelope * tone))
+        else:
+            samples.append(0)
+    data = b"".join(
+        max(-32768, min(32767, s)).to_bytes(2, "little", signed=True) for s in samples
+    )
+    return rtc.AudioFrame(
+        data=data,
+        sample_rate=SAMPLE_RATE,
+        num_channels=1,
+        samples_per_channel=len(samples),
+    )
+
+
+class SimulatedMicrophone(io.AudioInput):
+    """A participant's track: frames captured in real time, in order."""
+
+    def __init__(self, audio: rtc.AudioFrame, max_delay_ms: float):
+        super().__init__(label="SimulatedMicrophone")
+        self._frames = self._split(audio)
+        self._queue: asyncio.Queue[tuple] = asyncio.Queue()
+        self._max_delay = max_delay_ms / 1000
+        self.captured = 0
+        self.dropped = 0
+        self.delays: list[float] = []
+        self._task = asyncio.create_task(self._capture())
+
+    @staticmethod
+    def _split(audio: rtc.AudioFrame) -> list[rtc.AudioFrame]:
+        step = audio.sample_rate * FRAME_MS // 1000
+        pcm = audio.data
+        return [
+            rtc.AudioFrame(
+                data=pcm[start : start + step].tobytes(),
+                sample_rate=audio.sample_rate,
+                num_channels=1,
+                samples_per_channel=len(pcm[start : start + step]),
+            )
+            for start in range(0, len(pcm) - step + 1, step)
+        ]
+
+    async def _capture(self) -> None:
+        start = time.perf_counter()
+        for i in range(sys.maxsize):
+            due = start + i * FRAME_MS / 1000
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            self._queue.put_nowait((due, self._frames[i % len(self._frames)]))
+            self.captured += 1
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        due, frame = await self._queue.get()
+        delay = time.perf_counter() - due
+        self.delays.append(delay)
+        if delay > self._max_delay:
+            # Too stale to be useful for VAD and turn taking
+            self.dropped += 1
+        return frame
+
+    def reset(self) -> None:
+        self.captured = self.dropped = 0
+        self.delays.clear()
+
+    async def aclose(self) -> None:
+        self._task.cancel()
+
+
+class PacedAudioOutput(io.AudioOutput):
+    """Plays agent audio in real time and counts the gaps a listener would hear."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            label="PacedAudioOutput",
+            capabilities=io.AudioOutputCapabilities(pause=False),
+        )
+        self._buffer: deque[rtc.AudioFrame] = deque()
+        self._wakeup = asyncio.Event()
+        self._segment_open = False
+        self._flushed = False
+        self._played = 0.0
+        self.underruns = 0
+        self._task = asyncio.create_task(self._playout())
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if not self._segment_open:
+            self._segment_open, self._flushed, self._played = True, False, 0.0
+        self._buffer.append(frame)
+        self._wakeup.set()
+
+    def flush(self) -> None:
+        super().flush()
+        self._flushed = True
+        self._wakeup.set()
+
+    def clear_buffer(self) -> None:
+        self._buffer.clear()
+        if self._segment_open:
+            self._finish(interrupted=True)
+
+    def _finish(self, interrupted: bool) -> None:
+        self._segment_open = False
+        self.on_playback_finished(
+            playback_position=self._played, interrupted=interrupted
+        )
+
+    async def _playout(self) -> None:
+        next_due: Optional[float] = None
+        while True:
+            if not self._buffer:
+                if self._segment_open and self._flushed:
+                    self._finish(interrupted=False)
+                    next_due = None
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            frame = self._buffer.popleft()
+            now = time.perf_counter()
+            if next_due is None or self._played == 0:
+                next_due = now
+            elif now - next_due > FRAME_MS / 1000:
+                # The listener heard silence in the middle of a reply
+                self.underruns += 1
+                next_due = now
+            self._played += frame.duration
+            next_due += frame.duration
+            await asyncio.sleep(max(0.0, next_due - time.perf_counter()))
+
+    async def aclose(self) -> None:
+        self._task.cancel()
+
+
+class LocalInferenceExecutor:
+    """Runs the turn detector on a thread, where the worker would use its inference process."""
+
+    def __init__(self) -> None:
+        from livekit.plugins.turn_detector.multilingual import _EUORunnerMultilingual
+
+        self._runner = _EUORunnerMultilingual()
+        self._runner.initialize()
+
+    async def do_inference(self, method: str, data: bytes) -> Optional[bytes]:
+        return await asyncio.to_thread(self._runner.run, data)
+
+
+async def event_loop_lag(samples: list[float], interval: float = 0.05) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+class SimulatedSession:
+    def __init__(
+        self,
+        index: int,
+        audio: rtc.AudioFrame,
+        shared_vad: vad.VAD,
+        detector: Any,
+        config: SimConfig,
+    ):
+        latency = FakeLatency(
+            llm_ttft_ms=config.llm_ttft_ms,
+            llm_token_ms=config.llm_token_ms,
+            tts_ttfb_ms=config.tts_ttfb_ms,
+        )
+        self.config = config
+        self.detector = detector
+        self.random = random.Random(config.seed + index)
+        self.llm = FakeLLM(latency)
+        # Turns are taken on the simulator's schedule; VAD still runs for interruptions
+        self.session = AgentSession(
+            vad=shared_vad,
+            llm=self.llm,
+            tts=FakeTTS(latency, sample_rate=24000),
+            turn_detection="manual",
+            allow_interruptions=False,
+            resume_false_interruption=False,
+        )
+        self.microphone = SimulatedMicrophone(audio, config.max_input_delay_ms)
+        self.speaker = PacedAudioOutput()
+        self.turns = 0
+
+    async def start(self) -> None:
+        self.session.input.audio = self.microphone
+        self.session.output.audio = self.speaker
+        await self.session.start(
+            Agent(instructions="You are a helpful voice assistant.")
+        )
+
+    async def converse(self) -> None:
+        while True:
+            await asyncio.sleep(
+                self.config.turn_interval * self.random.uniform(0.7, 1.3)
+            )
+            if self.detector is not None:
+                await self.detector.predict_end_of_turn(self.session.history)
+            self.llm.script([{"text": REPLY}])
+            self.turns += 1
+            await self.session.generate_reply(
+                user_input="Add a packet of atta to my cart, please."
+            )
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
+        await self.microphone.aclose()
+        await self.speaker.aclose()
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_sessions(count: int, config: SimConfig) -> dict[str, Any]:
+    """Run ``count`` sessions in this process; measures the window after warm-up."""
+    from livekit.plugins import silero
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+    shared_vad = silero.VAD.load()
+    detector = None
+    if config.turn_detector == "multilingual":
+        detector = MultilingualModel(inference_executor=LocalInferenceExecutor())
+    audio = load_audio(config.audio)
+    process = psutil.Process()
+    rss_idle = process.memory_info().rss
+
+    sessions = [
+        SimulatedSession(i, audio, shared_vad, detector, config) for i in range(count)
+    ]
+    for sim in sessions:
+        await sim.start()
+    talkers = [asyncio.create_task(sim.converse()) for sim in sessions]
+    lag: list[float] = []
+    monitor = asyncio.create_task(event_loop_lag(lag))
+
+    await asyncio.sleep(config.warmup)
+    lag.clear()
+    for sim in sessions:
+        sim.microphone.reset()
+        sim.speaker.underruns = 0
+        sim.turns = 0
+    watchdog = LoopWatchdog("load_sim", threshold_ms=config.stall_ms, log=False).start()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.sleep(config.duration)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    rss = process.memory_info().rss
+    watchdog.stop()
+
+    for task in (*talkers, monitor):
+        task.cancel()
+    delays = [d for sim in sessions for d in sim.microphone.delays]
+    result = {
+        "sessions": count,
+        "cpu_s": cpu,
+        "wall_s": wall,
+        "rss_mb": rss / 2**20,
+        "rss_growth_mb": (rss - rss_idle) / 2**20,
+        "lag_ms": [x * 1000 for x in lag],
+        "captured": sum(sim.microphone.captured for sim in sessions),
+        "dropped": sum(sim.microphone.dropped for sim in sessions),
+        "input_delay_p99_ms": percentile(delays, 0.99) * 1000,
+        "underruns": sum(sim.speaker.underruns for sim in sessions),
+        "turns_started": sum(sim.turns for sim in sessions),
+        "stalls": watchdog.summary()["by_place"],
+    }
+    for sim in sessions:
+        await sim.aclose()
+    return result
+
+
+def run_process(count: int, config: dict[str, Any]) -> dict[str, Any]:
+    return asyncio.run(run_sessions(count, SimConfig(**config)))
+
+
+def run_step(sessions: int, layout: str, config: SimConfig) -> list[dict[str, Any]]:
+    counts = [sessions] if layout == "shared" else [1] * sessions
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(counts), mp_context=ctx) as pool:
+        futures = [pool.submit(run_process, n, asdict(config)) for n in counts]
+        return [f.result() for f in futures]
+
+
+def summarize(
+    sessions: int, processes: list[dict[str, Any]], limits: argparse.Namespace
+) -> dict[str, Any]:
+    cores = get_cpu_monitor().cpu_count()
+    wall = statistics.fmean(p["wall_s"] for p in processes)
+    cpu_cores = sum(p["cpu_s"] for p in processes) / wall
+    lag = [x for p in processes for x in p["lag_ms"]]
+    captured = sum(p["captured"] for p in processes)
+    minutes = wall / 60
+    row = {
+        "sessions": sessions,
+        "processes": len(processes),
+        "cpu_per_session_pct": round(100 * cpu_cores / sessions, 1),
+        "machine_cpu": round(cpu_cores / cores, 3),
+        "rss_total_mb": round(sum(p["rss_mb"] for p in processes), 1),
+        "rss_per_session_mb": round(
+            sum(p["rss_growth_mb"] for p in processes) / sessions, 1
+        ),
+        "lag_p50_ms": round(percentile(lag, 0.5), 1),
+        "lag_p99_ms": round(percentile(lag, 0.99), 1),
+        "lag_max_ms": round(max(lag, default=0.0), 1),
+        "input_drop_rate": round(
+            sum(p["dropped"] for p in processes) / max(1, captured), 4
+        ),
+        "input_delay_p99_ms": round(max(p["input_delay_p99_ms"] for p in processes), 1),
+        "underruns_per_session_min": round(
+            sum(p["underruns"] for p in processes) / sessions / minutes, 2
+        ),
+        "turns_started": sum(p["turns_started"] for p in processes),
+        "loop_stalls": sum(
+            place["count"] for p in processes for place in p["stalls"].values()
+        ),
+    }
+    row["healthy"] = (
+        row["lag_p99_ms"] <= limits.max_lag_ms
+        and row["input_drop_rate"] <= limits.max_drop_rate
+        and row["underruns_per_session_min"] <= limits.max_underruns_per_min
+    )
+    return row
+
+
+def suggest(curve: list[dict[str, Any]]) -> dict[str, Any]:
+    healthy = [row for row in curve if row["healthy"]]
+    if not healthy:
+        return {"max_sessions": 0, "load_threshold": None}
+    best = max(healthy, key=lambda row: row["sessions"])
+    if len(healthy) == len(curve):
+        # The ceiling is further out; a threshold from here would be too low
+        return {
+            "max_sessions": best["sessions"],
+            "load_threshold": None,
+            "ceiling_reached": False,
+        }
+    # Stop taking jobs a little before the last healthy point
+    threshold = math.floor(best["machine_cpu"] * 0.9 * 20) / 20
+    return {
+        "max_sessions": best["sessions"],
+        "load_threshold": max(0.05, min(0.95, threshold)),
+        "ceiling_reached": True,
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    config = SimConfig(
+        duration=args.duration,
+        warmup=args.warmup,
+        turn_interval=args.turn_interval,
+        turn_detector=args.turn_detector,
+        audio=args.audio,
+        max_input_delay_ms=args.max_input_delay_ms,
+        stall_ms=args.stall_ms,
+        seed=args.seed,
+    )
+    curve = []
+    for sessions in args.sessions:
+        row = summarize(sessions, run_step(sessions, args.layout, config), args)
+        print(json.dumps(row), file=sys.stderr)
+        curve.append(row)
+        if not row["healthy"] and args.stop_when_unhealthy:
+            break
+
+    report = {
+        "layout": args.layout,
+        "config": asdict(config),
+        "curve": curve,
+        "suggested": suggest(curve),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sessions",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[1, 2, 4, 8],
+    )
+    parser.add_argument("--layout", choices=("process", "shared"), default="process")
+    parser.add_argument(
+        "--duration", type=float, default=30.0, help="measured seconds per step"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=5.0, help="seconds before measuring"
+    )
+    parser.add_argument(
+        "--turn-interval",
+        type=float,
+        default=6.0,
+        help="mean seconds between user turns",
+    )
+    parser.add_argument(
+        "--turn-detector", choices=("multilingual", "none"), default="multilingual"
+    )
+    parser.add_argument(
+        "--audio", help="16-bit mono WAV the participants speak (looped)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-input-delay-ms", type=float, default=200.0)
+    parser.add_argument(
+        "--stall-ms",
+        type=float,
+        default=100.0,
+        help="report event-loop stalls longer than this",
+    )
+    parser.add_argument(
+        "--max-lag-ms", type=float, default=50.0, help="healthy event-loop lag p99"
+    )
+    parser.add_argument(
+        "--max-drop-rate",
+        type=float,
+        default=0.001,
+        help="healthy input frame drop rate",
+    )
+    parser.add_argument(
+        "--max-underruns-per-min",
+        type=float,
+        default=1.0,
+        help="healthy underruns per session",
+    )
+    parser.add_argument("--stop-when-unhealthy", action="store_true")
+    parser.add_argument("--out", help="write the report here as well")
+    main(parser.parse_args())
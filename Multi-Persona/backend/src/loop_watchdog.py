@@ -0,0 +1,201 @@
+"""Event-loop stall detector for agent job processes.
+
+Every session of a process shares its event loop, so a tool that writes a
+file synchronously (``save_order``, ``save_game_progress``...) holds up the
+audio of everyone else. ``LoopWatchdog`` finds those stalls:
+
+- a heartbeat callback on the loop measures how late it runs; that lag is
+  observed in ``agent_event_loop_lag_seconds``
+- a daemon thread watches the heartbeat; once it is ``threshold`` late, the
+  thread captures the stack of the loop thread, i.e. of the callback that
+  is blocking it right now
+- when the loop comes back the stall is logged with its duration, the
+  function tool it happened in (for tools wrapped by ``tool_trace``), the
+  persona file and line, and the innermost call, then counted in
+  ``agent_event_loop_stalls_total{agent,tool}``
+
+The worker runs one per job process (``LOOP_STALL_MS``, default 100, 0 turns
+it off). ``replay.py`` and ``load_sim.py`` run it too and report the stalls
+they saw.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from types import CodeType, FrameType
+from typing import Any, Optional
+
+from prometheus_client import Counter, Histogram
+
+from personas import PERSONAS_ROOT
+from tool_trace import TOOL_CODES
+
+logger = logging.getLogger("loop-watchdog")
+
+STALL_MS = float(os.getenv("LOOP_STALL_MS", "100"))
+HEARTBEAT_INTERVAL = 0.05
+# Frames kept in a stall record, innermost first
+MAX_FRAMES = 20
+MAX_STALLS = 200
+
+LOOP_LAG = Histogram(
+    "agent_event_loop_lag_seconds",
+    "How late the event loop ran a heartbeat scheduled every 50 ms",
+    ["agent"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+LOOP_STALLS = Counter(
+    "agent_event_loop_stalls_total",
+    "Event-loop stalls longer than LOOP_STALL_MS, by the function tool that was running",
+    ["agent", "tool"],
+)
+
+_LIBRARY_DIRS = ("site-packages", "dist-packages", f"{os.sep}lib{os.sep}python")
+
+Frames = list[tuple[CodeType, int]]
+
+
+def walk(frame: Optional[FrameType]) -> Frames:
+    """(code, line) of ``frame`` and its callers, innermost first."""
+    frames = []
+    while frame is not None:
+        frames.append((frame.f_code, frame.f_lineno))
+        frame = frame.f_back
+    return frames
+
+
+def is_own_file(filename: str) -> bool:
+    return filename.startswith(str(PERSONAS_ROOT)) and not any(
+        d in filename for d in _LIBRARY_DIRS
+    )
+
+
+def describe(code: CodeType, line: int) -> str:
+    filename = code.co_filename
+    if filename.startswith(str(PERSONAS_ROOT)):
+        filename = os.path.relpath(filename, PERSONAS_ROOT)
+    return f"{filename}:{line} in {code.co_name}"
+
+
+def locate(frames: Frames) -> dict[str, Any]:
+    """The tool, our innermost frame and the innermost call of a captured stack."""
+    tool = next(
+        (TOOL_CODES[code] for code, _ in reversed(frames) if code in TOOL_CODES), None
+    )
+    own = next(
+        ((code, line) for code, line in frames if is_own_file(code.co_filename)), None
+    )
+    return {
+        "tool": tool,
+        "location": describe(*own) if own else None,
+        "blocking_call": describe(*frames[0]) if frames else None,
+        "stack": [describe(code, line) for code, line in frames[:MAX_FRAMES]],
+    }
+
+
+class LoopWatchdog:
+    def __init__(
+        self,
+        agent: str = "agent",
+        threshold_ms: float = STALL_MS,
+        interval: float = HEARTBEAT_INTERVAL,
+        log: bool = True,
+    ):
+        self.agent = agent
+        self.threshold = threshold_ms / 1000
+        self.interval = interval
+        self.log = log
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=MAX_STALLS)
+        self.max_lag = 0.0
+        self.stall_count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._due = 0.0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        # (heartbeat due time, frames) written by the watcher thread
+        self._captured: Optional[tuple[float, Frames]] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LoopWatchdog":
+        """Start watching the running loop; call from the loop's thread."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stopped.clear()
+        self._schedule(time.perf_counter())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _schedule(self, now: float) -> None:
+        self._due = now + self.interval
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _beat(self) -> None:
+        now = time.perf_counter()
+        lag = max(0.0, now - self._due)
+        self.max_lag = max(self.max_lag, lag)
+        LOOP_LAG.labels(agent=self.agent).observe(lag)
+        if lag >= self.threshold:
+            captured = self._captured
+            frames = (
+                captured[1] if captured is not None and captured[0] == self._due else []
+            )
+            self._report(lag, frames)
+        self._schedule(now)
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.threshold / 4)
+        while not self._stopped.wait(poll):
+            due = self._due
+            captured = self._captured
+            if time.perf_counter() - due < self.threshold or (
+                captured is not None and captured[0] == due
+            ):
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            self._captured = (due, walk(frame))
+
+    def _report(self, lag: float, frames: Frames) -> None:
+        stall = {"ts": time.time(), "ms": round(lag * 1000, 1), **locate(frames)}
+        self.stalls.append(stall)
+        self.stall_count += 1
+        LOOP_STALLS.labels(agent=self.agent, tool=stall["tool"] or "none").inc()
+        if self.log:
+            where = stall["location"] or stall["blocking_call"] or "unknown code"
+            logger.warning(
+                f"Event loop blocked {stall['ms']:.0f} ms in tool {stall['tool'] or '-'} at {where}\n  "
+                + "\n  ".join(stall["stack"])
+            )
+
+    def summary(self) -> dict[str, Any]:
+        by_place: dict[str, dict[str, Any]] = {}
+        for stall in self.stalls:
+            key = f"{stall['tool'] or '-'} @ {stall['location'] or stall['blocking_call']}"
+            entry = by_place.setdefault(key, {"count": 0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["max_ms"] = max(entry["max_ms"], stall["ms"])
+        return {
+            "stalls": self.stall_count,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "by_place": dict(sorted(by_place.items(), key=lambda kv: -kv[1]["max_ms"])),
+        }
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._handle is not None:
+            self._handle.cancel()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def close(self) -> None:
+        self.stop()
+        if self.stalls:
+            logger.info(f"Event-loop stalls for {self.agent}: {self.summary()}")
@@ -0,0 +1,42 @@
+"""Prometheus export for the worker and all of its job processes.
+
+Jobs run in separate processes, so metrics are collected with
+prometheus_client's multiprocess mode. Every process writes its samples to
+``PROMETHEUS_MULTIPROC_DIR`` and the main worker process serves the merged
+view on ``METRICS_PORT``. Import this module before anything that imports
+prometheus_client, so the directory is set up in time.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger("multi-persona")
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0")) or None
+
+if METRICS_PORT and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    # Inherited by the job processes the worker starts
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="agent-metrics-")
+
+from prometheus_client import (  # noqa: E402
+    CollectorRegistry,
+    multiprocess,
+    start_http_server,
+)
+
+
+def start_metrics_server() -> None:
+    """Serve /metrics from the main worker process when METRICS_PORT is set."""
+    if not METRICS_PORT:
+        return
+    directory = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    # Samples from a previous run would otherwise be merged in
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True, exist_ok=True)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(METRICS_PORT, registry=registry)
+    logger.info(f"Serving Prometheus metrics on :{METRICS_PORT}")
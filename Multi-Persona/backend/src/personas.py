@@ -0,0 +1,188 @@
+"""Registry of the Day-N personas hosted by the multi-persona worker.
+
+Each persona is the unchanged ``src/agent.py`` of one Day-N backend. It is
+imported under its own module name (they are all called ``agent``) with the
+working directory switched to that backend, because the agents read and
+write their data files (catalogs, orders, saves) relative to it.
+"""
+
+import importlib.util
+import json
+import logging
+import os
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Optional
+
+logger = logging.getLogger("multi-persona")
+
+# Folder that holds Day-4 ... Day-10
+PERSONAS_ROOT = Path(os.getenv("PERSONAS_ROOT", Path(__file__).resolve().parents[3]))
+
+
+@dataclass(frozen=True)
+class Persona:
+    name: str
+    day: str
+    description: str
+    aliases: tuple[str, ...] = field(default_factory=tuple)
+    # Words after which the first TTS chunk of a reply is flushed at the
+    # latest (clause_tokenizer); 0 keeps the persona's own sentence tokenizer
+    first_chunk_words: int = 8
+    # Estimated tokens of chat context after which older turns are folded
+    # into a summary (context_budget); 0 lets the context grow unbounded
+    context_budget: int = 0
+
+    @property
+    def backend_dir(self) -> Path:
+        return PERSONAS_ROOT / self.day / "backend"
+
+    @property
+    def module_name(self) -> str:
+        return f"persona_{self.name}"
+
+
+PERSONAS: dict[str, Persona] = {
+    p.name: p
+    for p in [
+        Persona(
+            "tutor",
+            "Day-4",
+            "Active-recall CS tutor",
+            ("day4", "cs-tutor"),
+            first_chunk_words=10,
+        ),
+        Persona(
+            "sdr",
+            "Day-5",
+            "Jar sales development rep",
+            ("day5", "jar-sdr"),
+            first_chunk_words=6,
+        ),
+        Persona(
+            "fraud",
+            "Day-6",
+            "SBI fraud alert agent",
+            ("day6", "sbi-fraud-alert"),
+            first_chunk_words=8,
+        ),
+        Persona(
+            "grocery",
+            "Day-7",
+            "Food and grocery ordering",
+            ("day7", "food-ordering"),
+            first_chunk_words=6,
+            context_budget=3000,
+        ),
+        Persona(
+            "game",
+            "Day-8",
+            "Jungle Raja game master",
+            ("day8", "jungle-raja"),
+            first_chunk_words=8,
+            context_budget=4000,
+        ),
+        Persona(
+            "shop",
+            "Day-9",
+            "Voice shopping assistant",
+            ("day9", "ecommerce"),
+            first_chunk_words=6,
+        ),
+        Persona(
+            "improv",
+            "Day-10",
+            "Improv battle host",
+            ("day10", "improv-battle"),
+            first_chunk_words=6,
+        ),
+    ]
+}
+
+_ALIASES: dict[str, str] = {
+    alias: p.name for p in PERSONAS.values() for alias in (p.name, *p.aliases)
+}
+
+
+def find_persona(name: Optional[str]) -> Optional[Persona]:
+    if not name:
+        return None
+    key = _ALIASES.get(name.strip().lower())
+    return PERSONAS[key] if key else None
+
+
+def persona_from_metadata(metadata: Optional[str]) -> Optional[str]:
+    """Persona requested in dispatch metadata: ``{"persona": "fraud"}`` or just ``fraud``."""
+    if not metadata or not metadata.strip():
+        return None
+    try:
+        data = json.loads(metadata)
+    except ValueError:
+        return metadata.strip()
+    if isinstance(data, dict):
+        return data.get("persona")
+    return data if isinstance(data, str) else None
+
+
+def resolve_persona(
+    agent_name: Optional[str], metadata: Optional[str], default: Optional[str] = None
+) -> Optional[Persona]:
+    """Pick the persona for a dispatched job.
+
+    The dispatch metadata wins; otherwise the agent name itself may name a
+    persona (when the worker is registered as e.g. ``fraud``); otherwise
+    ``default``.
+    """
+    for candidate in (persona_from_metadata(metadata), agent_name, default):
+        persona = find_persona(candidate)
+        if persona is not None:
+            return persona
+    return None
+
+
+def enabled_personas() -> list[Persona]:
+    """Personas listed in ``PERSONAS`` (comma separated), or all of them."""
+    names = [n for n in os.getenv("PERSONAS", "").split(",") if n.strip()]
+    if not names:
+        return list(PERSONAS.values())
+    personas = [find_persona(n) for n in names]
+    unknown = [n for n, p in zip(names, personas) if p is None]
+    if unknown:
+        raise RuntimeError(f"Unknown persona(s) in PERSONAS: {', '.join(unknown)}")
+    return personas
+
+
+@contextmanager
+def working_directory(path: Path) -> Iterator[None]:
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def load_persona(persona: Persona) -> ModuleType:
+    """Import the persona's agent module once per process."""
+    module = sys.modules.get(persona.module_name)
+    if module is not None:
+        return module
+    path = persona.backend_dir / "src" / "agent.py"
+    spec = importlib.util.spec_from_file_location(persona.module_name, path)
+    if spec is None or spec.loader is None:
+        raise RuntimeError(f"Cannot load persona {persona.name!r} from {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[persona.module_name] = module
+    # Module-level code creates data folders and loads .env.local relative to the cwd
+    with working_directory(persona.backend_dir):
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[persona.module_name]
+            raise
+    logger.info(f"Loaded persona {persona.name} from {path}")
+    return module
@@ -0,0 +1,178 @@
+"""Pre-synthesized audio for lines the agents speak verbatim on every call.
+
+A persona lists such lines in ``SCRIPTED_PHRASES`` (its mandatory greeting,
+for instance). Their Murf audio is stored as raw PCM, keyed by text, voice,
+style and audio format, under ``PHRASE_CACHE_DIR``. When the persona speaks a
+cached line, the stored frames go straight into the room through
+``session.say(text, audio=...)``, with no TTS request and no TTFB.
+
+The cache is filled ahead of time, in one of two ways:
+
+- ``python src/phrase_cache.py`` synthesizes every persona's phrases (run it
+  at build time, next to ``download-files``);
+- failing that, the first job of each persona fills in what is missing, in
+  the background, using the warmed TTS client.
+
+Every job process loads the cache into memory in ``prewarm``.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+from collections.abc import AsyncIterator, Iterable
+from pathlib import Path
+from typing import Optional
+
+from livekit import rtc
+from livekit.agents import AgentSession, tts
+from prometheus_client import Counter
+
+logger = logging.getLogger("multi-persona")
+
+PHRASE_CACHE_DIR = Path(
+    os.getenv("PHRASE_CACHE_DIR", Path(__file__).resolve().parents[1] / ".phrase_cache")
+)
+FRAME_MS = 20
+
+PHRASE_LOOKUPS = Counter(
+    "agent_phrase_cache_lookups_total", "Scripted-phrase audio lookups", ["result"]
+)
+
+
+def phrase_key(
+    text: str, voice: str, style: Optional[str], sample_rate: int, num_channels: int
+) -> str:
+    material = "\x1f".join(
+        [
+            " ".join(text.split()),
+            voice,
+            style or "",
+            str(sample_rate),
+            str(num_channels),
+        ]
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def tts_key(engine: tts.TTS, text: str) -> str:
+    # murf.TTS keeps voice/style in its options; update_options() changes them there too
+    opts = getattr(engine, "_opts", None)
+    voice = getattr(opts, "voice", None) or type(engine).__name__
+    return phrase_key(
+        text,
+        voice,
+        getattr(opts, "style", None),
+        engine.sample_rate,
+        engine.num_channels,
+    )
+
+
+async def pcm_frames(
+    pcm: bytes, sample_rate: int, num_channels: int
+) -> AsyncIterator[rtc.AudioFrame]:
+    step = sample_rate * FRAME_MS // 1000 * num_channels * 2
+    for start in range(0, len(pcm), step):
+        chunk = pcm[start : start + step]
+        yield rtc.AudioFrame(
+            data=chunk,
+            sample_rate=sample_rate,
+            num_channels=num_channels,
+            samples_per_channel=len(chunk) // (2 * num_channels),
+        )
+
+
+class PhraseCache:
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.memory: dict[str, bytes] = {}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pcm"
+
+    def load(self) -> int:
+        """Read every cached phrase into memory (called from prewarm)."""
+        if self.directory.is_dir():
+            for path in self.directory.glob("*.pcm"):
+                self.memory[path.stem] = path.read_bytes()
+        return len(self.memory)
+
+    def _write(self, key: str, pcm: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(key).with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(pcm)
+        os.replace(tmp, self._path(key))
+
+    async def fill(self, engine: tts.TTS, text: str) -> bytes:
+        """Synthesize ``text`` with ``engine`` and store it."""
+        parts = []
+        async with engine.synthesize(text) as stream:
+            async for audio in stream:
+                parts.append(audio.frame.data.tobytes())
+        pcm = b"".join(parts)
+        key = tts_key(engine, text)
+        self.memory[key] = pcm
+        await asyncio.to_thread(self._write, key, pcm)
+        return pcm
+
+    async def fill_missing(self, engine: tts.TTS, texts: Iterable[str]) -> None:
+        for text in texts:
+            if tts_key(engine, text) in self.memory:
+                continue
+            try:
+                await self.fill(engine, text)
+                logger.info(f"Cached scripted phrase: {text[:40]!r}")
+            except Exception as e:
+                logger.warning(f"Could not pre-synthesize {text[:40]!r}: {e}")
+
+    def say(self, session: AgentSession, text: str):
+        """``session.say(text)``, played from the cached audio when there is some."""
+        pcm = self.memory.get(tts_key(session.tts, text)) if session.tts else None
+        PHRASE_LOOKUPS.labels(result="hit" if pcm else "miss").inc()
+        if pcm is None:
+            return session.say(text)
+        return session.say(
+            text,
+            audio=pcm_frames(pcm, session.tts.sample_rate, session.tts.num_channels),
+        )
+
+
+async def build(persona_names: Iterable[str]) -> None:
+    """Pre-synthesize the scripted phrases of the given personas."""
+    import aiohttp
+    from livekit.plugins import murf
+
+    from personas import find_persona, load_persona
+
+    cache = PhraseCache(PHRASE_CACHE_DIR)
+    cache.load()
+    async with aiohttp.ClientSession() as http:
+        for name in persona_names:
+            persona = find_persona(name)
+            module = load_persona(persona)
+            phrases = getattr(module, "SCRIPTED_PHRASES", [])
+            if not phrases:
+                continue
+            opts = module.create_session_plugins()["tts"]._opts
+            # Same voice and format as the persona's own TTS, on our own HTTP session
+            engine = murf.TTS(
+                model=opts.model,
+                locale=opts.locale,
+                voice=opts.voice,
+                style=opts.style,
+                sample_rate=opts.sample_rate,
+                http_session=http,
+            )
+            await cache.fill_missing(engine, phrases)
+    print(f"{len(cache.memory)} phrases in {PHRASE_CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    from personas import enabled_personas
+
+    load_dotenv(".env.local")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(build(sys.argv[1:] or [p.name for p in enabled_personas()]))
@@ -0,0 +1,472 @@
+"""Offline, deterministic replay of recorded conversations against a persona.
+
+    uv run python src/replay.py bench/conversations/grocery.json
+    uv run python src/replay.py bench/conversations/*.json --out replay.json
+    uv run python src/replay.py bench/conversations/*.json --check baseline.json
+
+A conversation file names a persona and lists the user turns, each with the
+LLM replies and tool calls to play back (see ``bench/conversations/``). The
+persona's own ``Agent`` subclass runs in an ``AgentSession`` on the fakes
+from ``fake_plugins``. Everything except the network is the production path:
+tools, chat context, tokenizer and TTS plumbing.
+
+Each conversation is replayed three times, with the same script and seed:
+
+1. timing: wall and CPU time per turn, and the time spent inside each tool;
+2. profile: cProfile, for the time spent in this repository's code;
+3. memory: tracemalloc, for the memory each turn allocates.
+
+Profiling and tracing slow everything down, so neither shares a pass with
+the timing. Tools run in a temporary copy of the persona's backend folder,
+so orders and saved games never reach the real data files.
+
+The timing pass also runs the event-loop watchdog (``loop_watchdog``) and
+reports every step that blocked the loop for more than ``--stall-ms``, with
+the tool and the line it was running.
+
+``--check`` compares against an earlier report and exits with status 1 when
+a conversation got slower or allocates more than ``--tolerance`` allows.
+"""
+
+import argparse
+import asyncio
+import cProfile
+import dataclasses
+import inspect
+import json
+import logging
+import os
+import pstats
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Optional
+
+from livekit import rtc
+from livekit.agents import Agent, AgentSession, llm, mock_tools
+from livekit.agents.llm.tool_context import get_function_info
+from livekit.agents.voice.run_result import RunResult
+
+from fake_plugins import (
+    CHARS_PER_SECOND,
+    FakeLatency,
+    FakeLLM,
+    FakeSTT,
+    FakeTTS,
+    NullAudioOutput,
+)
+from loop_watchdog import LoopWatchdog
+from personas import Persona, find_persona, load_persona, working_directory
+from tool_trace import instrument_tools
+from warmup import speech_tokenizer
+
+logger = logging.getLogger("multi-persona")
+
+SRC_DIR = Path(__file__).resolve().parent
+MODES = ("timing", "profile", "memory")
+# Loop stalls reported by the timing pass; the fakes answer instantly, so anything this long is our code
+STALL_MS = 20.0
+# Harness files that live next to the code being measured
+HARNESS_FILES = {str(SRC_DIR / "fake_plugins.py"), str(SRC_DIR / "replay.py")}
+
+
+@dataclass
+class Conversation:
+    name: str
+    persona: Persona
+    turns: list[dict[str, Any]]
+    # LLM replies consumed by the agent's on_enter, if it generates one
+    enter: list[dict[str, Any]] = field(default_factory=list)
+    latency: FakeLatency = field(default_factory=FakeLatency)
+    agent: Optional[str] = None
+    seed: int = 0
+
+
+def load_conversation(path: Path) -> Conversation:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    persona = find_persona(data.get("persona"))
+    if persona is None:
+        raise ValueError(f"{path}: unknown persona {data.get('persona')!r}")
+    return Conversation(
+        name=data.get("name", path.stem),
+        persona=persona,
+        turns=data["turns"],
+        enter=data.get("enter", []),
+        latency=FakeLatency(**data.get("latency", {})),
+        agent=data.get("agent"),
+        seed=data.get("seed", 0),
+    )
+
+
+def agent_class(module: ModuleType, name: Optional[str] = None) -> type:
+    """The ``Agent`` subclass the persona module defines (or the one called ``name``)."""
+    classes = [
+        obj
+        for obj in vars(module).values()
+        if isinstance(obj, type)
+        and issubclass(obj, Agent)
+        and obj.__module__ == module.__name__
+    ]
+    if name:
+        classes = [cls for cls in classes if cls.__name__ == name]
+    if len(classes) != 1:
+        found = ", ".join(cls.__name__ for cls in classes) or "none"
+        raise ValueError(
+            f"{module.__name__}: expected one Agent subclass, found {found}"
+        )
+    return classes[0]
+
+
+def make_userdata(module: ModuleType) -> Any:
+    """Default ``Userdata`` for personas whose tools read session userdata (Day-4, Day-10)."""
+    cls = getattr(module, "Userdata", None)
+    if cls is None or not dataclasses.is_dataclass(cls):
+        return None
+    hints = typing.get_type_hints(cls)
+    # Required fields are state dataclasses with defaults of their own
+    required = {
+        f.name: hints[f.name]()
+        for f in dataclasses.fields(cls)
+        if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING
+    }
+    return cls(**required)
+
+
+@contextmanager
+def sandbox(persona: Persona) -> Iterator[Path]:
+    """Run in a throwaway copy of the persona's data files."""
+    with tempfile.TemporaryDirectory(prefix=f"replay-{persona.name}-") as tmp:
+        root = Path(tmp) / "backend"
+        shutil.copytree(
+            persona.backend_dir,
+            root,
+            ignore=shutil.ignore_patterns(
+                "src", "tests", ".venv", "__pycache__", "*.lock", ".env*"
+            ),
+        )
+        with working_directory(root):
+            yield root
+
+
+def timed_tools(agent: Agent, log: list[dict[str, Any]]) -> dict[str, Callable]:
+    """Stand-ins for the agent's tools that run the real tool and time it."""
+
+    def wrap(tool: Callable, name: str) -> Callable:
+        async def run(*args: Any, **kwargs: Any) -> Any:
+            error = None
+            start = time.perf_counter()
+            try:
+                return await tool(*args, **kwargs)
+            except BaseException as e:
+                error = type(e).__name__
+                raise
+            finally:
+                log.append(
+                    {
+                        "name": name,
+                        "ms": round((time.perf_counter() - start) * 1000, 3),
+                        "error": error,
+                    }
+                )
+
+        # AgentSession binds the call arguments against this signature
+        run.__signature__ = inspect.signature(tool)
+        return run
+
+    return {
+        get_function_info(tool).name: wrap(tool, get_function_info(tool).name)
+        for tool in agent.tools
+        if llm.is_function_tool(tool)
+    }
+
+
+def utterance(text: str, sample_rate: int = 16000) -> rtc.AudioFrame:
+    """Silent user audio as long as the transcript would take to say."""
+    samples = max(1, int(len(text) / CHARS_PER_SECOND * sample_rate))
+    return rtc.AudioFrame(
+        data=bytes(2 * samples),
+        sample_rate=sample_rate,
+        num_channels=1,
+        samples_per_channel=samples,
+    )
+
+
+def is_own_code(filename: str, persona: Persona) -> bool:
+    if filename in HARNESS_FILES:
+        return False
+    return filename.startswith(
+        (str(persona.backend_dir / "src") + os.sep, str(SRC_DIR) + os.sep)
+    )
+
+
+def own_code_ms(profiler: cProfile.Profile, persona: Persona) -> float:
+    """Inclusive time of our functions, counting each call chain once."""
+    stats = pstats.Stats(profiler).stats  # type: ignore[attr-defined]
+    ours = {func for func in stats if is_own_code(func[0], persona)}
+    total = 0.0
+    for func in ours:
+        _, _, _, cumulative, callers = stats[func]
+        if not any(caller in ours for caller in callers):
+            total += cumulative
+    return round(total * 1000, 3)
+
+
+def own_code_bytes(
+    after: tracemalloc.Snapshot, before: tracemalloc.Snapshot, persona: Persona
+) -> int:
+    """Net allocations with one of our functions anywhere on their stack."""
+    return sum(
+        stat.size_diff
+        for stat in after.compare_to(before, "traceback")
+        if any(is_own_code(frame.filename, persona) for frame in stat.traceback)
+    )
+
+
+async def measure(
+    step: Callable[[], Awaitable[Optional[RunResult]]],
+    mode: str,
+    persona: Persona,
+    tool_log: list[dict[str, Any]],
+) -> dict[str, Any]:
+    tool_log.clear()
+    profiler = cProfile.Profile() if mode == "profile" else None
+    if mode == "memory":
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        before = tracemalloc.take_snapshot()
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        result = await step()
+        if result is not None:
+            await result
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+    if mode == "timing":
+        return {
+            "wall_ms": round((time.perf_counter() - start_wall) * 1000, 3),
+            "cpu_ms": round((time.process_time() - start_cpu) * 1000, 3),
+            "tool_ms": round(sum(call["ms"] for call in tool_log), 3),
+            "tools": list(tool_log),
+        }
+    if mode == "profile":
+        return {"own_ms": own_code_ms(profiler, persona)}
+    current, peak = tracemalloc.get_traced_memory()
+    own = own_code_bytes(tracemalloc.take_snapshot(), before, persona)
+    return {
+        "peak_kb": round((peak - start_bytes) / 1024, 1),
+        "retained_kb": round((current - start_bytes) / 1024, 1),
+        "own_retained_kb": round(own / 1024, 1),
+    }
+
+
+async def replay(conv: Conversation, mode: str) -> dict[str, Any]:
+    """Play the conversation once on fresh fakes; returns one record per turn."""
+    module = load_persona(conv.persona)
+    # Traced like in the worker, so stalls are attributed to their tool
+    instrument_tools(module, conv.persona.name)
+    random.seed(conv.seed)
+    # Same chunking and clean-up as when the persona is hosted by the worker
+    tokenizer = speech_tokenizer(conv.persona)
+    fake_stt, fake_llm = FakeSTT(conv.latency), FakeLLM(conv.latency)
+    fake_tts = FakeTTS(conv.latency, tokenizer=tokenizer)
+    tool_log: list[dict[str, Any]] = []
+    turns = []
+
+    with sandbox(conv.persona):
+        cls = agent_class(module, conv.agent)
+        userdata = make_userdata(module)
+        options = {} if userdata is None else {"userdata": userdata}
+        # NullAudioOutput cannot pause, which false-interruption resume needs
+        # No tts_text_transforms: the worker leaves markdown and emoji to SpeechNormalizer
+        async with AgentSession(
+            llm=fake_llm,
+            tts=fake_tts,
+            resume_false_interruption=False,
+            tts_text_transforms=None,
+            **options,
+        ) as session:
+            if hasattr(userdata, "agent_session"):
+                userdata.agent_session = session
+            session.output.audio = NullAudioOutput()
+            agent = cls()
+
+            async def enter() -> Optional[RunResult]:
+                if cls.on_enter is Agent.on_enter:
+                    # Nothing to capture: such a run would never complete
+                    await session.start(agent)
+                    return None
+                return await session.start(agent, capture_run=True)
+
+            with mock_tools(cls, timed_tools(agent, tool_log)):
+                fake_llm.script(conv.enter)
+                turns.append(
+                    {"user": None, **await measure(enter, mode, conv.persona, tool_log)}
+                )
+                for turn in conv.turns:
+                    fake_llm.script(turn.get("llm", []))
+                    fake_stt.transcripts.append(turn["user"])
+
+                    async def respond(text: str = turn["user"]) -> Optional[RunResult]:
+                        event = await fake_stt.recognize(utterance(text))
+                        return session.run(user_input=event.alternatives[0].text)
+
+                    turns.append(
+                        {
+                            "user": turn["user"],
+                            **await measure(respond, mode, conv.persona, tool_log),
+                        }
+                    )
+
+    return {
+        "turns": turns,
+        "unscripted_llm_calls": fake_llm.unscripted,
+        "tts_characters": fake_tts.characters,
+        "tts_characters_saved": tokenizer.characters_saved,
+    }
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "p50": round(statistics.median(ordered), 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+        "total": round(sum(ordered), 3),
+    }
+
+
+async def run_conversation(
+    conv: Conversation, stall_ms: float = STALL_MS
+) -> dict[str, Any]:
+    passes = {}
+    # Imported up front, so the import does not show up as a stall of the first turn
+    load_persona(conv.persona)
+    watchdog = LoopWatchdog(conv.persona.name, threshold_ms=stall_ms, log=False)
+    for mode in MODES:
+        if mode == "memory":
+            tracemalloc.start(16)
+        if mode == "timing":
+            watchdog.start()
+        try:
+            passes[mode] = await replay(conv, mode)
+        finally:
+            tracemalloc.stop()
+            watchdog.stop()
+    turns = [
+        {**timing, **profile, **memory}
+        for timing, profile, memory in zip(*(passes[mode]["turns"] for mode in MODES))
+    ]
+    summary = {
+        key: percentiles([turn[key] for turn in turns])
+        for key in (
+            "wall_ms",
+            "cpu_ms",
+            "own_ms",
+            "tool_ms",
+            "peak_kb",
+            "retained_kb",
+            "own_retained_kb",
+        )
+    }
+    summary["tool_calls"] = sum(len(turn["tools"]) for turn in turns)
+    summary["tool_errors"] = sum(
+        1 for turn in turns for call in turn["tools"] if call["error"]
+    )
+    summary["unscripted_llm_calls"] = passes["timing"]["unscripted_llm_calls"]
+    summary["tts_characters"] = passes["timing"]["tts_characters"]
+    summary["tts_characters_saved"] = passes["timing"]["tts_characters_saved"]
+    summary["loop_stalls"] = watchdog.stall_count
+    return {
+        "persona": conv.persona.name,
+        "summary": summary,
+        "turns": turns,
+        "stalls": list(watchdog.stalls),
+    }
+
+
+# Summary figures compared by --check, with the absolute slack each one gets on top of --tolerance
+CHECKED = {"cpu_ms": 5.0, "own_ms": 2.0, "peak_kb": 64.0}
+
+
+def regressions(
+    report: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    found = []
+    for name, result in report["conversations"].items():
+        before = baseline.get("conversations", {}).get(name)
+        if before is None:
+            continue
+        for key, slack in CHECKED.items():
+            now, then = result["summary"][key]["p50"], before["summary"][key]["p50"]
+            if now > then * (1 + tolerance) + slack:
+                found.append(f"{name}: {key} p50 {then} -> {now}")
+        # The script no longer matches what the agent does
+        for key in ("unscripted_llm_calls", "tool_errors"):
+            if result["summary"][key] > before["summary"][key]:
+                found.append(
+                    f"{name}: {key} {before['summary'][key]} -> {result['summary'][key]}"
+                )
+    return found
+
+
+async def main(args: argparse.Namespace) -> int:
+    report: dict[str, Any] = {"conversations": {}}
+    for path in args.conversations:
+        conv = load_conversation(path)
+        logger.info(
+            f"Replaying {conv.name} ({conv.persona.name}, {len(conv.turns)} turns)"
+        )
+        report["conversations"][conv.name] = await run_conversation(conv, args.stall_ms)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.check:
+        found = regressions(
+            report, json.loads(args.check.read_text(encoding="utf-8")), args.tolerance
+        )
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "conversations", nargs="+", type=Path, help="conversation JSON files"
+    )
+    parser.add_argument(
+        "--out", type=Path, help="write the report here instead of stdout"
+    )
+    parser.add_argument("--check", type=Path, help="earlier report to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.3,
+        help="allowed relative growth for --check",
+    )
+    parser.add_argument(
+        "--stall-ms",
+        type=float,
+        default=STALL_MS,
+        help="report event-loop stalls longer than this",
+    )
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(main(parser.parse_args())))
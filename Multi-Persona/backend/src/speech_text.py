@@ -0,0 +1,208 @@
+"""Text clean-up between the LLM and Murf, so only speakable text is billed.
+
+Tool results in Day-7 and Day-9 are formatted for reading: ``**bold**``
+labels, ``•`` bullets, ``⭐⭐⭐⭐☆`` ratings, ``₹`` prices, ``|`` separators
+and emoji. When the LLM echoes them, Murf reads the symbols aloud or just
+bills them as characters. LiveKit's own ``filter_markdown`` only strips
+markup surrounded by spaces (``**Total:** ₹250,`` gets through), and leaves
+bullets and currency alone.
+
+``SpeechNormalizer`` wraps the sentence tokenizer handed to ``murf.TTS``,
+so every chunk is normalized right before it is sent. The transcript and
+the chat history keep the LLM's text. The ``use_speech_normalizer`` session
+hook turns LiveKit's filters off, so that the normalizer sees, and counts,
+the text as the LLM wrote it. ``normalize`` does the following:
+
+- star ratings become "4.2 stars", or "4 stars" when the number is missing;
+- ``₹499``, ``Rs. 499`` and ``INR 499`` become "499 rupees";
+- markdown emphasis, headers, code and links lose their markup;
+- bullets, arrows, separators and emoji are dropped;
+- each line break becomes a sentence break and whitespace is collapsed.
+
+Characters before and after go to ``agent_tts_characters_total{agent,stage}``
+and a per-session line is logged when the job ends. They are also kept per
+speech, for ``barge_in`` to tell how much of a cancelled reply reached Murf.
+The speech comes from a private LiveKit context variable; if a LiveKit
+upgrade removes it, chunks are only counted per session.
+"""
+
+import logging
+import re
+from collections import OrderedDict
+from typing import Optional
+
+from livekit.agents import AgentSession, JobContext, tokenize
+from prometheus_client import Counter
+
+try:
+    from livekit.agents.voice.agent_activity import _SpeechHandleContextVar
+except ImportError:  # private to LiveKit, tested with livekit-agents 1.2
+    _SpeechHandleContextVar = None
+
+logger = logging.getLogger("speech-text")
+
+TTS_CHARACTERS = Counter(
+    "agent_tts_characters_total",
+    "Characters of agent replies before (llm) and after (tts) speech normalization",
+    ["agent", "stage"],
+)
+
+STARS = re.compile(r"([⭐★]+)([☆✩]*)\s*(?:\(\s*(\d+(?:\.\d+)?)\s*\))?")
+# Digit groups, so "₹250, 3 items" does not take the comma along
+RUPEES = re.compile(r"(?:₹|\bRs\.?|\bINR)\s?(\d+(?:,\d{2,3})*(?:\.\d+)?)")
+LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+EMPHASIS = re.compile(r"\*{1,3}|(?<!\w)_{1,3}|_{1,3}(?!\w)|`+|~~")
+HEADER = re.compile(r"^\s*#{1,6}\s*", re.MULTILINE)
+BULLET = re.compile(r"^\s*[-*+•●○◦▪▫■□‣►▶➤✓✔✗✘]\s+", re.MULTILINE)
+SEPARATOR = re.compile(r"\s*(?:\||→|⇒|->|=>|—{2,}|-{3,})\s*")
+SYMBOLS = re.compile(
+    "[\U0001f000-\U0001fbff"  # emoji and pictographs
+    "\u2190-\u21ff"  # arrows
+    "\u2300-\u23ff"  # technical symbols (watch, alarm clock...)
+    "\u25a0-\u25ff"  # geometric shapes
+    "\u2600-\u27bf"  # miscellaneous symbols and dingbats
+    "\u2b00-\u2bff"  # stars and other symbols
+    "\u2022\u200d\u20e3\ufe0e\ufe0f]"  # bullet, emoji joiners and variation selectors
+)
+LINE_END = re.compile(r"([^.!?,:;\s])[ \t]*\n+")
+SPACES = re.compile(r"\s+")
+SPACE_BEFORE_PUNCTUATION = re.compile(r"\s+([.,!?;:])")
+
+# Speeches whose character counts are kept until ``pop_speech`` claims them
+MAX_SPEECHES = 32
+
+
+def _stars(match: "re.Match[str]") -> str:
+    filled, hollow, number = match.groups()
+    if len(filled) == 1 and not hollow and not number:
+        return " "  # a decorative star, not a rating
+    rating = number or str(len(filled))
+    return f"{rating} {'star' if rating == '1' else 'stars'} "
+
+
+def _emphasis(match: "re.Match[str]") -> str:
+    if match.group().startswith("*"):
+        before, after = (
+            match.string[: match.start()].rstrip(),
+            match.string[match.end() :].lstrip(),
+        )
+        if before[-1:].isdigit() and after[:1].isdigit():
+            return match.group()  # a multiplication, e.g. "5 * 3"
+    return ""
+
+
+def normalize(text: str) -> str:
+    """``text`` as it should be spoken."""
+    text = STARS.sub(_stars, text)
+    text = RUPEES.sub(lambda m: f"{m.group(1)} rupees", text).replace("₹", " rupees ")
+    text = LINK.sub(r"\1", text)
+    text = HEADER.sub("", text)
+    text = BULLET.sub("", text)
+    text = EMPHASIS.sub(_emphasis, text)
+    text = SEPARATOR.sub(", ", text)
+    text = SYMBOLS.sub("", text)
+    # A line break is a pause for the reader; make it one for the listener too
+    text = LINE_END.sub(r"\1. ", text)
+    text = SPACES.sub(" ", text)
+    return SPACE_BEFORE_PUNCTUATION.sub(r"\1", text).strip()
+
+
+def current_speech_id() -> Optional[str]:
+    """Speech whose tasks are running; LiveKit tags LLM and TTS metrics with it the same way."""
+    if _SpeechHandleContextVar is None:
+        return None
+    return getattr(_SpeechHandleContextVar.get(None), "id", None)
+
+
+class NormalizedSentenceStream(tokenize.SentenceStream):
+    """``inner``'s chunks, normalized as they are read; empty ones are skipped."""
+
+    def __init__(self, owner: "SpeechNormalizer", inner: tokenize.SentenceStream):
+        super().__init__()
+        self._owner = owner
+        self._inner = inner
+        # The stream is created by the TTS task of the speech it synthesizes
+        self.speech_id = current_speech_id()
+
+    def push_text(self, text: str) -> None:
+        self._inner.push_text(text)
+
+    def flush(self) -> None:
+        self._inner.flush()
+
+    def end_input(self) -> None:
+        self._inner.end_input()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+        self._do_close()
+
+    async def __anext__(self) -> tokenize.TokenData:
+        while True:
+            ev = await self._inner.__anext__()
+            token = self._owner.count(ev.token, self.speech_id)
+            if token:
+                return tokenize.TokenData(segment_id=ev.segment_id, token=token)
+
+    @property
+    def closed(self) -> bool:
+        return self._inner.closed
+
+
+class SpeechNormalizer(tokenize.SentenceTokenizer):
+    """Sentence tokenizer whose chunks are normalized for speech."""
+
+    def __init__(self, inner: tokenize.SentenceTokenizer, agent: str = "agent"):
+        self.inner = inner
+        self.agent = agent
+        self.characters_in = 0
+        self.characters_out = 0
+        self.chunks_dropped = 0
+        # speech_id -> [characters in, characters out]
+        self.speeches: OrderedDict[str, list[int]] = OrderedDict()
+
+    def count(self, token: str, speech_id: Optional[str] = None) -> str:
+        spoken = normalize(token)
+        self.characters_in += len(token)
+        self.characters_out += len(spoken)
+        self.chunks_dropped += not spoken
+        if speech_id is not None:
+            counts = self.speeches.setdefault(speech_id, [0, 0])
+            counts[0] += len(token)
+            counts[1] += len(spoken)
+            while len(self.speeches) > MAX_SPEECHES:
+                self.speeches.popitem(last=False)
+        TTS_CHARACTERS.labels(agent=self.agent, stage="llm").inc(len(token))
+        TTS_CHARACTERS.labels(agent=self.agent, stage="tts").inc(len(spoken))
+        return spoken
+
+    def tokenize(self, text: str, *, language: Optional[str] = None) -> list[str]:
+        spoken = (
+            self.count(token) for token in self.inner.tokenize(text, language=language)
+        )
+        return [token for token in spoken if token]
+
+    def stream(self, *, language: Optional[str] = None) -> NormalizedSentenceStream:
+        return NormalizedSentenceStream(self, self.inner.stream(language=language))
+
+    def pop_speech(self, speech_id: str) -> tuple[int, int]:
+        """Characters of ``speech_id``'s reply from the LLM and sent to Murf so far."""
+        characters_in, characters_out = self.speeches.pop(speech_id, (0, 0))
+        return characters_in, characters_out
+
+    @property
+    def characters_saved(self) -> int:
+        return self.characters_in - self.characters_out
+
+    async def close(self) -> None:
+        if self.characters_in:
+            logger.info(
+                f"TTS text for {self.agent}: {self.characters_in} -> {self.characters_out} characters "
+                f"({self.characters_saved} saved, {100 * self.characters_saved / self.characters_in:.1f}%), "
+                f"{self.chunks_dropped} chunks with nothing to say"
+            )
+
+
+def use_speech_normalizer(ctx: JobContext, session: AgentSession) -> None:
+    """Session hook: leave markdown and emoji to ``SpeechNormalizer`` instead of LiveKit's filters."""
+    session.options.tts_text_transforms = None
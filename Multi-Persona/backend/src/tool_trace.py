@@ -0,0 +1,329 @@
+"""Timing and a structured trace for every ``@function_tool`` call.
+
+``instrument_tools(module, agent)`` wraps the function tools of every Agent
+class in a persona module, once, when the worker loads it. The persona code
+is unchanged and each call is recorded:
+
+- wall_ms: from the call until the tool returned
+- blocking_ms: the part of it spent running on the event loop, i.e. the sum
+  of the coroutine's steps between awaits (file writes, JSON parsing...)
+- cpu_ms: CPU time of the event-loop thread during those steps
+- max_step_ms: the longest single step, the worst stall the tool caused
+- arg_chars: JSON size of each argument; result_chars: length of the result
+- error: exception type and message, if the tool raised
+
+Calls feed the ``agent_tool_seconds{agent,tool,measure}`` and
+``agent_tool_chars{agent,tool,kind}`` histograms and the
+``agent_tool_calls_total{agent,tool,outcome}`` counter. When
+``TOOL_TRACE_DIR`` is set, every call is also appended to
+``<dir>/<room>.jsonl``. Aggregate such files into per-tool histograms with::
+
+    python src/tool_trace.py traces/*.jsonl
+"""
+
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Generator
+from pathlib import Path
+from types import CodeType, ModuleType
+from typing import Any, Callable
+
+from livekit.agents import Agent, RunContext, get_job_context, llm
+from livekit.agents.llm.tool_context import get_function_info
+from prometheus_client import Counter, Histogram
+
+from turn_latency import quantile
+
+logger = logging.getLogger("tool-trace")
+
+TRACE_DIR = Path(os.environ["TOOL_TRACE_DIR"]) if os.getenv("TOOL_TRACE_DIR") else None
+MAX_ERROR_CHARS = 200
+
+TOOL_SECONDS = Histogram(
+    "agent_tool_seconds",
+    "Function tool duration: wall time, event-loop blocking time and CPU time",
+    ["agent", "tool", "measure"],
+    buckets=(
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+    ),
+)
+TOOL_CHARS = Histogram(
+    "agent_tool_chars",
+    "Size of function tool arguments (JSON) and results, in characters",
+    ["agent", "tool", "kind"],
+    buckets=(16, 64, 256, 1024, 4096, 16384, 65536),
+)
+TOOL_CALLS = Counter(
+    "agent_tool_calls_total",
+    "Function tool calls by outcome",
+    ["agent", "tool", "outcome"],
+)
+
+# Bucket bounds, in ms, of the histograms printed by the CLI
+MS_BUCKETS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_writes: set["asyncio.Task[None]"] = set()
+
+# Code of every traced tool, so a captured stack can be mapped back to its tool
+TOOL_CODES: dict[CodeType, str] = {}
+
+
+class Steps:
+    """Event-loop time spent inside one coroutine, measured step by step."""
+
+    def __init__(self) -> None:
+        self.blocking = 0.0
+        self.cpu = 0.0
+        self.longest = 0.0
+
+    def drive(self, coro: Awaitable[Any]) -> Generator[Any, Any, Any]:
+        # A hand-written ``yield from`` that times every send()/throw()
+        it = coro.__await__()
+        send, error = None, None
+        while True:
+            start, cpu = time.perf_counter(), time.thread_time()
+            try:
+                yielded = it.throw(error) if error is not None else it.send(send)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                step = time.perf_counter() - start
+                self.blocking += step
+                self.cpu += time.thread_time() - cpu
+                self.longest = max(self.longest, step)
+            send, error = None, None
+            try:
+                send = yield yielded
+            except BaseException as e:
+                error = e
+
+
+class _Measured:
+    def __init__(self, coro: Awaitable[Any], steps: Steps):
+        self.coro = coro
+        self.steps = steps
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        return self.steps.drive(self.coro)
+
+
+def argument_sizes(arguments: dict[str, Any]) -> dict[str, int]:
+    return {
+        name: len(json.dumps(value, default=str))
+        for name, value in arguments.items()
+        if not isinstance(value, RunContext)
+    }
+
+
+def result_size(result: Any) -> int:
+    if result is None:
+        return 0
+    return len(result if isinstance(result, str) else json.dumps(result, default=str))
+
+
+def room_name() -> str:
+    try:
+        return get_job_context().room.name
+    except RuntimeError:
+        return "local"  # not running inside a job, e.g. in the replay benchmark
+
+
+def _append(path: Path, record: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def record_call(record: dict[str, Any]) -> None:
+    agent, tool = record["agent"], record["tool"]
+    for measure in ("wall", "blocking", "cpu"):
+        TOOL_SECONDS.labels(agent=agent, tool=tool, measure=measure).observe(
+            record[f"{measure}_ms"] / 1000
+        )
+    TOOL_CHARS.labels(agent=agent, tool=tool, kind="arguments").observe(
+        sum(record["arg_chars"].values())
+    )
+    TOOL_CHARS.labels(agent=agent, tool=tool, kind="result").observe(
+        record["result_chars"]
+    )
+    TOOL_CALLS.labels(
+        agent=agent, tool=tool, outcome="error" if record["error"] else "ok"
+    ).inc()
+    if TRACE_DIR is None:
+        return
+    path = TRACE_DIR / (re.sub(r"[^\w.-]", "_", record["room"]) + ".jsonl")
+    task = asyncio.get_running_loop().create_task(
+        asyncio.to_thread(_append, path, record)
+    )
+    _writes.add(task)
+    task.add_done_callback(_writes.discard)
+
+
+def tool_function(tool: Any) -> Callable[..., Any]:
+    """The function a tool calls.
+
+    Up to livekit-agents 1.3 ``@function_tool`` returns the decorated
+    function itself; later releases wrap it in a ``FunctionTool`` object.
+    """
+    return getattr(tool, "_func", tool)
+
+
+def traced(tool: Any, agent: str) -> Any:
+    """``tool`` with every call measured and recorded; the tool schema is unchanged."""
+    name = get_function_info(tool).name
+    func = tool_function(tool)
+    signature = inspect.signature(func)
+    # Past any wrapper LiveKit adds, so stacks map back to the persona's code
+    TOOL_CODES[inspect.unwrap(func).__code__] = name
+
+    @functools.wraps(func)
+    async def run(*args: Any, **kwargs: Any) -> Any:
+        bound = signature.bind_partial(*args, **kwargs)
+        bound.arguments.pop("self", None)
+        steps = Steps()
+        result, error = None, None
+        start = time.perf_counter()
+        try:
+            result = await _Measured(func(*args, **kwargs), steps)
+            return result
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"[:MAX_ERROR_CHARS]
+            raise
+        finally:
+            record_call(
+                {
+                    "ts": time.time(),
+                    "room": room_name(),
+                    "agent": agent,
+                    "tool": name,
+                    "wall_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "blocking_ms": round(steps.blocking * 1000, 3),
+                    "cpu_ms": round(steps.cpu * 1000, 3),
+                    "max_step_ms": round(steps.longest * 1000, 3),
+                    "arg_chars": argument_sizes(bound.arguments),
+                    "result_chars": result_size(result),
+                    "error": error,
+                }
+            )
+
+    run.__tool_trace__ = True  # type: ignore[attr-defined]
+    if func is tool:
+        return run
+    # A FunctionTool of the same kind and schema, calling the traced function
+    wrapped = type(tool)(run, tool.info)
+    wrapped.__tool_trace__ = True
+    return wrapped
+
+
+def instrument_tools(module: ModuleType, agent: str) -> list[str]:
+    """Trace the function tools of every Agent class defined in ``module``."""
+    instrumented, skipped = [], []
+    for cls in vars(module).values():
+        if not (
+            inspect.isclass(cls)
+            and issubclass(cls, Agent)
+            and cls.__module__ == module.__name__
+        ):
+            continue
+        for attr, member in list(vars(cls).items()):
+            if not llm.is_function_tool(member) or getattr(
+                member, "__tool_trace__", False
+            ):
+                continue
+            if not inspect.iscoroutinefunction(tool_function(member)):
+                logger.warning(
+                    f"Not tracing {cls.__name__}.{attr}: not a coroutine function"
+                )
+                skipped.append(f"{cls.__name__}.{attr}")
+                continue
+            setattr(cls, attr, traced(member, agent))
+            instrumented.append(f"{cls.__name__}.{attr}")
+    if skipped and not instrumented:
+        raise TypeError(
+            f"No function tool of {module.__name__} could be traced: {', '.join(skipped)}"
+        )
+    return instrumented
+
+
+async def flush() -> None:
+    """Wait for pending JSONL writes, e.g. before the job process exits."""
+    if _writes:
+        await asyncio.gather(*list(_writes), return_exceptions=True)
+
+
+def ms_histogram(values: list[float]) -> dict[str, int]:
+    counts: dict[str, int] = defaultdict(int)
+    for value in values:
+        bound = next((b for b in MS_BUCKETS if value <= b), None)
+        counts[f"<={bound}" if bound is not None else f">{MS_BUCKETS[-1]}"] += 1
+    return dict(counts)
+
+
+def aggregate(records: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Per-tool call counts, percentiles and blocking-time histogram."""
+    by_tool: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        by_tool[f"{record['agent']}.{record['tool']}"].append(record)
+    report = {}
+    for tool, calls in sorted(by_tool.items()):
+        stats: dict[str, Any] = {
+            "calls": len(calls),
+            "errors": sum(1 for c in calls if c["error"]),
+        }
+        for key in ("wall_ms", "blocking_ms", "cpu_ms", "max_step_ms", "result_chars"):
+            values = [c[key] for c in calls]
+            stats[key] = {
+                "p50": quantile(values, 0.5),
+                "p95": quantile(values, 0.95),
+                "max": max(values),
+            }
+        stats["blocking_histogram"] = ms_histogram([c["blocking_ms"] for c in calls])
+        report[tool] = stats
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Aggregate TOOL_TRACE_DIR files into per-tool histograms"
+    )
+    parser.add_argument("files", nargs="+", type=Path)
+    parser.add_argument(
+        "--sort", default="blocking_ms", help="figure whose p95 orders the tools"
+    )
+    args = parser.parse_args()
+
+    records = []
+    for path in args.files:
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    report = aggregate(records)
+    ordered = sorted(
+        report.items(), key=lambda kv: kv[1][args.sort]["p95"], reverse=True
+    )
+    json.dump(dict(ordered), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Per-turn latency breakdown for any AgentSession.
+
+``track_turn_latency(ctx, session)`` is the one call an entrypoint needs. It
+listens to the session's ``metrics_collected`` events (the same ones
+``metrics.UsageCollector`` consumes) and groups them by ``speech_id`` into
+turns:
+
+- eou_delay: end of user speech until the turn was committed
+- stt_latency: end of user speech until the final transcript
+- llm_ttft: LLM time to first token
+- tts_ttfb: Murf time to first audio byte
+- voice_to_voice: eou_delay + llm_ttft + tts_ttfb
+
+Each turn feeds the ``agent_turn_latency_seconds`` Prometheus histogram and
+a rolling window whose p50/p95/p99 are logged when the session ends. When
+``TURN_LATENCY_DIR`` is set, every turn is also appended to
+``<dir>/<room>.jsonl``.
+
+Usage totals are left to the entrypoint's own ``UsageCollector``. The Day-N
+agents call this through the ``session_hooks`` the multi-persona worker puts
+in ``proc.userdata``. Run standalone, they call it themselves when
+``TURN_LATENCY`` is set and this directory is on ``PYTHONPATH``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Optional
+
+from livekit.agents import AgentSession, JobContext, MetricsCollectedEvent, metrics
+from prometheus_client import Histogram
+
+logger = logging.getLogger("turn-latency")
+
+STAGES = ("eou_delay", "stt_latency", "llm_ttft", "tts_ttfb", "voice_to_voice")
+
+TURN_LATENCY = Histogram(
+    "agent_turn_latency_seconds",
+    "Per-turn latency by pipeline stage",
+    ["agent", "stage"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10),
+)
+
+JSONL_DIR = (
+    Path(os.environ["TURN_LATENCY_DIR"]) if os.getenv("TURN_LATENCY_DIR") else None
+)
+WINDOW = int(os.getenv("TURN_LATENCY_WINDOW", "200"))
+MAX_PENDING_TURNS = 32
+
+
+def quantile(samples: list[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TurnLatencyTracker:
+    def __init__(self, agent: str, room: str, session_id: str):
+        self.agent = agent
+        self.room = room
+        self.session_id = session_id
+        # speech_id -> stage -> seconds, until the turn has its LLM and TTS parts
+        self.pending: OrderedDict[str, dict[str, float]] = OrderedDict()
+        self.windows: dict[str, deque[float]] = {
+            stage: deque(maxlen=WINDOW) for stage in STAGES
+        }
+        self.turns = 0
+        self.writes: list[asyncio.Task[None]] = []
+
+    def collect(self, m: metrics.AgentMetrics) -> None:
+        speech_id = getattr(m, "speech_id", None)
+        if not speech_id:
+            return
+        turn = self.pending.setdefault(speech_id, {})
+        # Interrupted turns never get their TTS part; do not keep them forever
+        while len(self.pending) > MAX_PENDING_TURNS:
+            self.pending.popitem(last=False)
+        if isinstance(m, metrics.EOUMetrics):
+            turn["eou_delay"] = m.end_of_utterance_delay
+            turn["stt_latency"] = m.transcription_delay
+        elif isinstance(m, metrics.LLMMetrics):
+            turn.setdefault("llm_ttft", m.ttft)
+        elif isinstance(m, metrics.TTSMetrics):
+            # Only the first synthesized segment is on the critical path
+            turn.setdefault("tts_ttfb", m.ttfb)
+        if "llm_ttft" in turn and "tts_ttfb" in turn:
+            self._finish(speech_id, self.pending.pop(speech_id))
+
+    def _finish(self, speech_id: str, turn: dict[str, float]) -> None:
+        # Turns started by the agent itself (greetings) have no end of utterance
+        if "eou_delay" in turn:
+            turn["voice_to_voice"] = (
+                turn["eou_delay"] + turn["llm_ttft"] + turn["tts_ttfb"]
+            )
+        self.turns += 1
+        for stage, seconds in turn.items():
+            if seconds is None or seconds < 0:
+                continue
+            self.windows[stage].append(seconds)
+            TURN_LATENCY.labels(agent=self.agent, stage=stage).observe(seconds)
+        if JSONL_DIR is not None:
+            record = {
+                "ts": time.time(),
+                "session_id": self.session_id,
+                "agent": self.agent,
+                "turn": self.turns,
+                "speech_id": speech_id,
+                **{
+                    stage: round(seconds, 4)
+                    for stage, seconds in turn.items()
+                    if seconds is not None
+                },
+            }
+            task = asyncio.create_task(asyncio.to_thread(self._append, record))
+            self.writes.append(task)
+            task.add_done_callback(self.writes.remove)
+
+    def _append(self, record: dict) -> None:
+        JSONL_DIR.mkdir(parents=True, exist_ok=True)
+        filename = re.sub(r"[^\w.-]", "_", self.room) + ".jsonl"
+        with open(JSONL_DIR / filename, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def summary(self) -> dict:
+        stages = {}
+        for stage, window in self.windows.items():
+            samples = list(window)
+            stages[stage] = {
+                "count": len(samples),
+                **{f"p{int(q * 100)}": quantile(samples, q) for q in (0.5, 0.95, 0.99)},
+            }
+        return {
+            "session_id": self.session_id,
+            "agent": self.agent,
+            "turns": self.turns,
+            "stages": stages,
+        }
+
+    async def close(self) -> None:
+        if self.writes:
+            await asyncio.gather(*self.writes, return_exceptions=True)
+        logger.info(f"Turn latency for {self.room}: {json.dumps(self.summary())}")
+
+
+def track_turn_latency(
+    ctx: JobContext, session: AgentSession, agent: Optional[str] = None
+) -> TurnLatencyTracker:
+    """Attach a per-turn latency tracker to ``session`` for the lifetime of the job."""
+    tracker = TurnLatencyTracker(
+        agent=agent or ctx.job.agent_name or "agent",
+        room=ctx.room.name,
+        session_id=f"{ctx.room.name}/{ctx.job.id}",
+    )
+
+    @session.on("metrics_collected")
+    def _on_metrics_collected(ev: MetricsCollectedEvent):
+        tracker.collect(ev.metrics)
+
+    ctx.add_shutdown_callback(tracker.close)
+    return tracker
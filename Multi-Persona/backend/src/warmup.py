@@ -0,0 +1,133 @@
+"""Cold-start work moved off the first turn, with per-component timings.
+
+``prewarm`` (no event loop, no job yet) loads what it can synchronously.
+The turn detector and the upstream STT/LLM/TTS clients need the job's
+inference executor and HTTP session, so ``warm_job`` builds them as soon as
+a job is accepted. Connections open in the background, and the dummy
+turn-detector inference runs while the room is still being joined. The
+persona then claims the warmed clients from ``proc.userdata["plugins"]``.
+
+Every stage is logged, kept in ``proc.userdata["warmup"]`` and exported as
+the ``agent_warmup_seconds`` histogram.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from types import ModuleType
+
+from livekit.agents import JobContext, JobProcess, llm, tokenize, tts
+from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from prometheus_client import Histogram
+
+from clause_tokenizer import ClauseTokenizer
+from personas import Persona
+from phrase_cache import PhraseCache
+from speech_text import SpeechNormalizer
+
+logger = logging.getLogger("multi-persona")
+
+WARMUP_SECONDS = Histogram(
+    "agent_warmup_seconds",
+    "Time spent warming each component of a job process",
+    ["component"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+
+@contextmanager
+def timed(proc: JobProcess, component: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        proc.userdata.setdefault("warmup", {})[component] = round(elapsed, 4)
+        WARMUP_SECONDS.labels(component=component).observe(elapsed)
+        logger.info(f"Warm-up {component}: {elapsed * 1000:.0f} ms")
+
+
+def shared_turn_detector(proc: JobProcess) -> MultilingualModel:
+    # Needs a job context, so it is created on the first job instead of in prewarm
+    detector = proc.userdata.get("turn_detector")
+    if detector is None:
+        with timed(proc, "turn_detector_load"):
+            detector = proc.userdata["turn_detector"] = MultilingualModel()
+    return detector
+
+
+async def warm_turn_detector(proc: JobProcess, detector: MultilingualModel) -> None:
+    """One dummy end-of-turn prediction, so the ONNX session is hot for the first real turn."""
+    if proc.userdata.get("turn_detector_warm"):
+        return
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="assistant", content="Hi! How can I help you today?")
+    chat_ctx.add_message(role="user", content="I wanted to ask about my order")
+    try:
+        with timed(proc, "turn_detector_inference"):
+            await detector.predict_end_of_turn(chat_ctx)
+        proc.userdata["turn_detector_warm"] = True
+    except Exception as e:
+        logger.warning(f"Turn detector warm-up failed: {e}")
+
+
+def speech_tokenizer(persona: Persona) -> SpeechNormalizer:
+    """How the persona's replies are chunked and cleaned up on their way to Murf."""
+    if persona.first_chunk_words:
+        tokenizer = ClauseTokenizer(first_max_words=persona.first_chunk_words)
+    else:
+        tokenizer = tokenize.basic.SentenceTokenizer(min_sentence_len=2)
+    return SpeechNormalizer(tokenizer, agent=persona.name)
+
+
+def warm_plugins(
+    proc: JobProcess,
+    persona: Persona,
+    persona_module: ModuleType,
+    tokenizer: SpeechNormalizer,
+) -> dict:
+    """Build the persona's STT/LLM/TTS and start their connections."""
+    with timed(proc, "plugins_init"):
+        plugins = persona_module.create_session_plugins(tokenizer=tokenizer)
+    for component, plugin in plugins.items():
+        with timed(proc, f"{component}_connect"):
+            try:
+                # Opens the websocket / HTTP connection in the background
+                plugin.prewarm()
+            except Exception as e:
+                logger.warning(f"Could not prewarm {component}: {e}")
+    return plugins
+
+
+async def warm_background(
+    proc: JobProcess,
+    detector: MultilingualModel,
+    phrases: PhraseCache,
+    engine: tts.TTS,
+    scripted: list[str],
+) -> None:
+    await warm_turn_detector(proc, detector)
+    # Only does work when the phrases were not pre-built for this voice
+    await phrases.fill_missing(engine, scripted)
+
+
+def warm_job(
+    ctx: JobContext, persona: Persona, persona_module: ModuleType, phrases: PhraseCache
+) -> "asyncio.Task[None]":
+    """Prepare everything the persona needs; returns the background warm-up task."""
+    detector = shared_turn_detector(ctx.proc)
+    tokenizer = ctx.proc.userdata["speech_tokenizer"] = speech_tokenizer(persona)
+    ctx.add_shutdown_callback(tokenizer.close)
+    plugins = ctx.proc.userdata["plugins"] = warm_plugins(
+        ctx.proc, persona, persona_module, tokenizer
+    )
+    scripted = getattr(persona_module, "SCRIPTED_PHRASES", [])
+    task = asyncio.create_task(
+        warm_background(ctx.proc, detector, phrases, plugins["tts"], scripted)
+    )
+    task.add_done_callback(
+        lambda _: logger.info(f"Warm-up timings: {ctx.proc.userdata.get('warmup')}")
+    )
+    return task
@@ -0,0 +1,145 @@
+import asyncio
+from types import SimpleNamespace
+
+from livekit.agents import Agent, AgentSession, utils
+from livekit.agents.voice.audio_recognition import _PreemptiveGenerationInfo
+
+from barge_in import BargeInTracker, track_barge_in
+from clause_tokenizer import ClauseTokenizer
+from fake_plugins import FakeLatency, FakeLLM, FakeTTS, NullAudioOutput
+from speech_text import SpeechNormalizer
+
+
+def test_interrupted_reply_is_accounted() -> None:
+    normalizer = SpeechNormalizer(ClauseTokenizer(first_max_words=4), agent="shop")
+    latency = FakeLatency(llm_token_ms=5, tts_ttfb_ms=300)
+    fake_llm, fake_tts = FakeLLM(latency), FakeTTS(latency, tokenizer=normalizer)
+    fake_llm.script(
+        [
+            {
+                "text": "We have **blue denim shirts** at ₹1,299, white linen ones at ₹999, and more. "
+                * 4
+            }
+        ]
+    )
+    callbacks = []
+    ctx = SimpleNamespace(
+        job=SimpleNamespace(agent_name="shop"),
+        proc=SimpleNamespace(userdata={"speech_tokenizer": normalizer}),
+        add_shutdown_callback=callbacks.append,
+    )
+
+    async def run() -> BargeInTracker:
+        async with AgentSession(
+            llm=fake_llm,
+            tts=fake_tts,
+            resume_false_interruption=False,
+            tts_text_transforms=None,
+        ) as session:
+            session.output.audio = NullAudioOutput()
+            tracker = track_barge_in(ctx, session)
+            await session.start(Agent(instructions="Sell shirts."))
+            handle = session.generate_reply(user_input="Any shirts?")
+            # The user barges in while Murf is still on its first audio
+            while not normalizer.speeches.get(handle.id):
+                await asyncio.sleep(0.01)
+            handle.interrupt()
+            await handle
+            await tracker.close()
+            return tracker
+
+    tracker = asyncio.run(run())
+    totals = tracker.totals
+    assert totals["interrupted"] == 1 and totals["preemptive"] == 0
+    # Nothing was played, so everything sent to Murf was wasted
+    assert 0 < totals["wasted_tts_characters"] == totals["tts_characters"]
+    # The stream was cancelled before its usage, so the tokens are estimated from the text
+    assert 0 < totals["wasted_llm_tokens"] == totals["llm_tokens"]
+    assert callbacks == [tracker.close]
+
+
+def test_discarded_preemptive_reply_is_accounted() -> None:
+    normalizer = SpeechNormalizer(ClauseTokenizer(first_max_words=4), agent="shop")
+    latency = FakeLatency(llm_token_ms=5, tts_ttfb_ms=300)
+    fake_llm, fake_tts = FakeLLM(latency), FakeTTS(latency, tokenizer=normalizer)
+    fake_llm.script(
+        [
+            {
+                "text": "We have blue denim shirts at ₹1,299 and white linen ones at ₹999. "
+                * 4
+            }
+        ]
+    )
+    ctx = SimpleNamespace(
+        job=SimpleNamespace(agent_name="shop"),
+        proc=SimpleNamespace(userdata={"speech_tokenizer": normalizer}),
+        add_shutdown_callback=lambda callback: None,
+    )
+
+    async def run() -> BargeInTracker:
+        async with AgentSession(
+            llm=fake_llm,
+            tts=fake_tts,
+            preemptive_generation=True,
+            tts_text_transforms=None,
+        ) as session:
+            session.output.audio = NullAudioOutput()
+            tracker = track_barge_in(ctx, session)
+            handles = []
+            session.on("speech_created", lambda ev: handles.append(ev.speech_handle))
+            await session.start(Agent(instructions="Sell shirts."))
+            # What an interim transcript does, then a final one that differs from it
+            activity = session._activity
+            activity.on_preemptive_generation(
+                _PreemptiveGenerationInfo(
+                    new_transcript="Any shirts?",
+                    transcript_confidence=0.9,
+                    started_speaking_at=None,
+                )
+            )
+            while not normalizer.speeches.get(handles[-1].id):
+                await asyncio.sleep(0.01)
+            activity._cancel_preemptive_generation()
+            await handles[-1]
+            await tracker.close()
+            return tracker
+
+    tracker = asyncio.run(run())
+    totals = tracker.totals
+    assert totals["preemptive"] == 1 and totals["interrupted"] == 0
+    # Never played, so everything sent to Murf was wasted
+    assert 0 < totals["wasted_tts_characters"] == totals["tts_characters"]
+    assert 0 < totals["wasted_llm_tokens"] == totals["llm_tokens"]
+
+
+def test_cancelled_reply_closes_its_socket_promptly() -> None:
+    opened, closed = [], []
+
+    async def connect(timeout: float) -> str:
+        opened.append(f"ws{len(opened)}")
+        return opened[-1]
+
+    async def close(ws: str) -> None:
+        closed.append(ws)
+
+    async def run() -> None:
+        pool = utils.ConnectionPool[str](connect_cb=connect, close_cb=close)
+        tracker = BargeInTracker("shop", None, SimpleNamespace(_pool=pool))
+        # What murf.TTS does with the socket of a cancelled stream
+        pool.remove(await pool.get(timeout=1))
+        assert closed == []
+        tracker.close_cancelled()
+        await tracker.close()
+        assert closed == ["ws0"]
+        # The next reply gets the fresh socket opened in the background
+        assert await pool.get(timeout=1) == "ws1"
+
+    asyncio.run(run())
+
+
+def test_engine_without_a_pool_only_counts() -> None:
+    tracker = BargeInTracker("shop", None, SimpleNamespace(_pool=None))
+    assert tracker.pool is None
+    # No running loop needed: there is nothing to close
+    tracker.close_cancelled()
+    assert tracker.tasks == set()
@@ -0,0 +1,68 @@
+import pytest
+
+from clause_tokenizer import ClauseChunker, ClauseChunking, ClauseTokenizer
+
+
+def _stream(text: str, opts: ClauseChunking) -> list:
+    chunker = ClauseChunker(opts)
+    chunks = []
+    for i in range(0, len(text), 4):
+        chunks += chunker.push(text[i : i + 4])
+    return chunks + chunker.flush()
+
+
+@pytest.mark.parametrize(
+    ("text", "first"),
+    [
+        # comma, once the minimum number of words is in
+        (
+            "Thanks for asking, a variable is a named container for a value.",
+            "Thanks for asking,",
+        ),
+        (
+            "Sure thing, I have added the butter to your cart. Anything else?",
+            "Sure thing, I have added the butter",
+        ),
+        # before a conjunction
+        (
+            "I checked the catalog and the headphones are in stock today.",
+            "I checked the catalog",
+        ),
+        # word limit
+        (
+            "Deep in the heart of the ancient jungle the tiger waits for you.",
+            "Deep in the heart of the ancient",
+        ),
+        # a short sentence is its own first chunk
+        ("Namaste! This is State Bank of India calling about your card.", "Namaste!"),
+    ],
+)
+def test_first_chunk_is_flushed_early(text: str, first: str) -> None:
+    chunks = _stream(text, ClauseChunking(first_min_words=3, first_max_words=7))
+    assert chunks[0] == first
+    assert " ".join(chunks) == text
+
+
+def test_rest_is_sentence_sized() -> None:
+    text = "Welcome, traveller. The river is high today. Rs. 500 buys a boat ride across it."
+    chunks = _stream(
+        text, ClauseChunking(first_min_words=1, first_max_words=8, min_sentence_len=20)
+    )
+    assert chunks == [
+        "Welcome,",
+        "traveller. The river is high today.",
+        "Rs. 500 buys a boat ride across it.",
+    ]
+
+
+def test_flush_starts_a_new_early_chunk() -> None:
+    chunker = ClauseChunker(ClauseChunking(first_min_words=2, first_max_words=4))
+    assert chunker.push("one two three four five six ") == ["one two three four"]
+    assert chunker.flush() == ["five six"]
+    assert chunker.push("seven eight nine ten eleven ") == ["seven eight nine ten"]
+
+
+def test_tokenize_matches_stream() -> None:
+    text = "I am calling from the fraud department, and I need to verify a payment. Is now a good time?"
+    tok = ClauseTokenizer(first_max_words=6)
+    assert tok.tokenize(text) == _stream(text, tok.opts)
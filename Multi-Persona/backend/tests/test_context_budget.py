@@ -0,0 +1,163 @@
+import asyncio
+from types import SimpleNamespace
+
+from livekit.agents import llm
+
+from context_budget import (
+    ContextBudget,
+    compacted,
+    context_tokens,
+    is_summary,
+    plan_compaction,
+)
+from fake_plugins import FakeLLM
+
+
+def _chat_ctx(exchanges: int) -> llm.ChatContext:
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content="You are Jungle Raja, the game master.")
+    for i in range(exchanges):
+        chat_ctx.add_message(role="user", content=f"Go north, step {i}")
+        chat_ctx.insert(
+            llm.FunctionCall(
+                call_id=f"call_{i}", name="move_to_location", arguments="{}"
+            )
+        )
+        chat_ctx.insert(
+            llm.FunctionCallOutput(
+                call_id=f"call_{i}",
+                name="move_to_location",
+                output=f"Clearing {i}",
+                is_error=False,
+            )
+        )
+        chat_ctx.add_message(
+            role="assistant",
+            content=f"You reach clearing {i}. " + "The jungle hums. " * 10,
+        )
+    return chat_ctx
+
+
+class _Agent:
+    def __init__(self, chat_ctx: llm.ChatContext):
+        self.chat_ctx = chat_ctx
+
+    async def update_chat_ctx(self, chat_ctx: llm.ChatContext) -> None:
+        self.chat_ctx = chat_ctx
+
+
+def test_compaction_pins_instructions_and_tools() -> None:
+    chat_ctx = _chat_ctx(exchanges=10)
+    summary, folded = plan_compaction(chat_ctx, keep_messages=4)
+    assert summary is None
+    assert len(folded) == 16 and {m.role for m in folded} == {"user", "assistant"}
+
+    result = compacted(
+        chat_ctx, folded, "The player walked north through eight clearings."
+    )
+    assert result.items[0].role == "system" and not is_summary(result.items[0])
+    assert is_summary(result.items[1])
+    assert [i.type for i in result.items].count("function_call_output") == 10
+    assert (
+        sum(1 for i in result.items if i.type == "message" and i.role != "system") == 4
+    )
+    assert context_tokens(result) < context_tokens(chat_ctx)
+
+    # The next compaction folds the previous summary into the new one
+    summary, _ = plan_compaction(result, keep_messages=2)
+    assert summary is result.items[1]
+
+
+def test_budget_compacts_in_background() -> None:
+    fake = FakeLLM()
+    fake.script([{"text": "The player explored ten clearings heading north."}])
+    agent = _Agent(_chat_ctx(exchanges=10))
+    session = SimpleNamespace(llm=fake, current_agent=agent)
+    manager = ContextBudget(session, "game", budget=200, keep_messages=4)
+
+    async def run() -> None:
+        manager.check(agent.chat_ctx.items[-1])
+        await manager.task
+
+    asyncio.run(run())
+    assert manager.compactions == 1
+    summaries = [i for i in agent.chat_ctx.items if is_summary(i)]
+    assert "ten clearings" in summaries[0].text_content
+    assert fake.unscripted == 0
+
+
+def test_summary_falls_back_to_transcript_tail() -> None:
+    class _FailingLLM(FakeLLM):
+        def chat(self, **kwargs):
+            raise RuntimeError("quota exceeded")
+
+    agent = _Agent(_chat_ctx(exchanges=6))
+    manager = ContextBudget(
+        SimpleNamespace(llm=_FailingLLM(), current_agent=agent),
+        "game",
+        budget=100,
+        keep_messages=2,
+    )
+
+    async def run() -> None:
+        manager.check(agent.chat_ctx.items[-1])
+        await manager.task
+
+    asyncio.run(run())
+    summary = next(i for i in agent.chat_ctx.items if is_summary(i))
+    assert "Go north, step 4" in summary.text_content
+
+
+def test_budget_backs_off_when_pinned_items_exceed_it() -> None:
+    fake = FakeLLM()
+    fake.script(
+        [
+            {"text": "The player explored six clearings heading north."},
+            {"text": "The player explored nine clearings heading north."},
+        ]
+    )
+    chat_ctx = _chat_ctx(exchanges=6)
+    # A game state big enough to fill the budget on its own
+    chat_ctx.insert(
+        llm.FunctionCallOutput(
+            call_id="call_state",
+            name="get_state",
+            output="Inventory: rope. " * 80,
+            is_error=False,
+        )
+    )
+    agent = _Agent(chat_ctx)
+    manager = ContextBudget(
+        SimpleNamespace(llm=fake, current_agent=agent),
+        "game",
+        budget=300,
+        keep_messages=2,
+    )
+
+    def exchange(i: int) -> None:
+        agent.chat_ctx.add_message(role="user", content=f"Go north, step {i}")
+        agent.chat_ctx.add_message(
+            role="assistant",
+            content=f"You reach clearing {i}. " + "The jungle hums. " * 10,
+        )
+        manager.check(agent.chat_ctx.items[-1])
+
+    async def run() -> None:
+        manager.check(agent.chat_ctx.items[-2])
+        first = manager.task
+        await first
+        assert manager.over_budget == 1
+        # A couple of turns are not worth folding again
+        exchange(6)
+        exchange(7)
+        assert manager.task is first
+        # Half a budget of new messages is
+        exchange(8)
+        assert manager.task is not first
+        await manager.task
+
+    asyncio.run(run())
+    assert manager.compactions == 2
+    summaries = [i for i in agent.chat_ctx.items if is_summary(i)]
+    assert len(summaries) == 1 and "nine clearings" in summaries[0].text_content
+    assert fake.unscripted == 0
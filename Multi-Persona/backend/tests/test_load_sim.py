@@ -0,0 +1,53 @@
+from argparse import Namespace
+
+from load_sim import suggest, summarize
+
+LIMITS = Namespace(max_lag_ms=50.0, max_drop_rate=0.001, max_underruns_per_min=1.0)
+
+
+def _process(cpu_s: float, lag_ms: float, dropped: int = 0) -> dict:
+    return {
+        "cpu_s": cpu_s,
+        "wall_s": 60.0,
+        "rss_mb": 300.0,
+        "rss_growth_mb": 20.0,
+        "lag_ms": [1.0] * 98 + [lag_ms] * 2,
+        "captured": 1200,
+        "dropped": dropped,
+        "input_delay_p99_ms": 10.0,
+        "underruns": 0,
+        "turns_started": 10,
+        "stalls": {
+            "- @ Day-7/backend/src/agent.py:45 in save_order": {
+                "count": 1,
+                "max_ms": 120.0,
+            }
+        },
+    }
+
+
+def test_summarize_flags_unhealthy_steps() -> None:
+    healthy = summarize(2, [_process(6.0, 20.0), _process(6.0, 30.0)], LIMITS)
+    assert healthy["healthy"]
+    assert healthy["cpu_per_session_pct"] == 10.0
+    assert healthy["rss_per_session_mb"] == 20.0
+    assert healthy["loop_stalls"] == 2
+
+    assert not summarize(1, [_process(6.0, 80.0)], LIMITS)["healthy"]
+    assert not summarize(1, [_process(6.0, 5.0, dropped=12)], LIMITS)["healthy"]
+
+
+def test_suggest_uses_the_last_healthy_step() -> None:
+    curve = [
+        {"sessions": 4, "machine_cpu": 0.3, "healthy": True},
+        {"sessions": 8, "machine_cpu": 0.62, "healthy": True},
+        {"sessions": 16, "machine_cpu": 0.97, "healthy": False},
+    ]
+    assert suggest(curve) == {
+        "max_sessions": 8,
+        "load_threshold": 0.55,
+        "ceiling_reached": True,
+    }
+    # Never overloaded: no threshold to suggest yet
+    assert suggest(curve[:2])["load_threshold"] is None
+    assert suggest(curve[2:]) == {"max_sessions": 0, "load_threshold": None}
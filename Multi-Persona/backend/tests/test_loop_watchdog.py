@@ -0,0 +1,80 @@
+import asyncio
+import time
+import types
+
+from livekit.agents import Agent, function_tool
+
+from loop_watchdog import LoopWatchdog, is_own_file
+from personas import PERSONAS_ROOT
+from tool_trace import instrument_tools
+
+
+def _write_slowly() -> None:
+    time.sleep(0.15)  # stands in for a synchronous json.dump to disk
+
+
+def _persona_module() -> types.ModuleType:
+    module = types.ModuleType("persona_watchdog_test")
+
+    class OrderAgent(Agent):
+        def __init__(self) -> None:
+            super().__init__(instructions="Take orders.")
+
+        @function_tool
+        async def place_order(self):
+            """Save the order."""
+            _write_slowly()
+            return "Order placed"
+
+    OrderAgent.__module__ = module.__name__
+    module.OrderAgent = OrderAgent
+    return module
+
+
+def test_stall_is_attributed_to_tool_and_line() -> None:
+    module = _persona_module()
+    instrument_tools(module, "grocery")
+
+    async def run() -> LoopWatchdog:
+        watchdog = LoopWatchdog(
+            "grocery", threshold_ms=50, interval=0.01, log=False
+        ).start()
+        await asyncio.sleep(0.05)
+        await module.OrderAgent().place_order()
+        await asyncio.sleep(0.05)
+        watchdog.stop()
+        return watchdog
+
+    watchdog = asyncio.run(run())
+    assert watchdog.stall_count == 1
+    stall = watchdog.stalls[0]
+    assert stall["ms"] >= 100
+    assert stall["tool"] == "place_order"
+    assert (
+        "test_loop_watchdog.py" in stall["location"]
+        and "_write_slowly" in stall["location"]
+    )
+    # time.sleep is a builtin without a frame, so its caller is the innermost call
+    assert stall["blocking_call"] == stall["location"]
+    assert watchdog.summary()["stalls"] == 1
+
+
+def test_no_stall_when_the_loop_is_free() -> None:
+    async def run() -> LoopWatchdog:
+        watchdog = LoopWatchdog(threshold_ms=50, interval=0.01, log=False).start()
+        await asyncio.sleep(0.2)
+        watchdog.stop()
+        return watchdog
+
+    assert asyncio.run(run()).stall_count == 0
+
+
+def test_library_frames_are_not_own_code() -> None:
+    assert not is_own_file("/usr/lib/python3.11/json/encoder.py")
+    assert not is_own_file(
+        str(
+            PERSONAS_ROOT
+            / "Day-7/backend/.venv/lib/python3.11/site-packages/murf/tts.py"
+        )
+    )
+    assert is_own_file(__file__)
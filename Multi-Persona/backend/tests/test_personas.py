@@ -0,0 +1,44 @@
+import pytest
+
+from personas import PERSONAS, enabled_personas, persona_from_metadata, resolve_persona
+
+
+def test_every_persona_points_at_an_agent_module() -> None:
+    for persona in PERSONAS.values():
+        assert (persona.backend_dir / "src" / "agent.py").is_file(), persona.day
+
+
+@pytest.mark.parametrize(
+    ("metadata", "expected"),
+    [
+        ('{"persona": "fraud"}', "fraud"),
+        ("shop", "shop"),
+        ("", None),
+        ('{"room": "x"}', None),
+    ],
+)
+def test_persona_from_metadata(metadata: str, expected: str) -> None:
+    assert persona_from_metadata(metadata) == expected
+
+
+def test_metadata_wins_over_agent_name_and_default() -> None:
+    persona = resolve_persona("tutor", '{"persona": "day6"}', default="improv")
+    assert persona is PERSONAS["fraud"]
+
+
+def test_agent_name_and_default_fallbacks() -> None:
+    assert resolve_persona("Jar-SDR", None) is PERSONAS["sdr"]
+    assert (
+        resolve_persona("murf-personas", None, default="improv") is PERSONAS["improv"]
+    )
+    assert resolve_persona("murf-personas", '{"persona": "nope"}') is None
+
+
+def test_enabled_personas_rejects_unknown_names(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("PERSONAS", "fraud, game")
+    assert [p.name for p in enabled_personas()] == ["fraud", "game"]
+    monkeypatch.setenv("PERSONAS", "fraud,bogus")
+    with pytest.raises(RuntimeError):
+        enabled_personas()
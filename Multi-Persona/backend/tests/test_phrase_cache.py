@@ -0,0 +1,49 @@
+import asyncio
+from types import SimpleNamespace
+
+from phrase_cache import PhraseCache, pcm_frames, phrase_key, tts_key
+
+
+def _engine(voice: str = "en-IN-priya", style: str = "Conversation"):
+    return SimpleNamespace(
+        _opts=SimpleNamespace(voice=voice, style=style),
+        sample_rate=24000,
+        num_channels=1,
+    )
+
+
+def test_key_depends_on_voice_and_style() -> None:
+    text = "Namaste! How can I help?"
+    assert tts_key(_engine(), text) == tts_key(_engine(), "Namaste!  How can I help?")
+    assert tts_key(_engine(), text) != tts_key(_engine(voice="en-US-alicia"), text)
+    assert tts_key(_engine(), text) != tts_key(_engine(style="Promo"), text)
+    assert phrase_key(text, "v", None, 24000, 1) != phrase_key(
+        text, "v", None, 16000, 1
+    )
+
+
+def test_pcm_frames_are_20ms() -> None:
+    pcm = bytes(24000 * 2)  # one second of mono audio
+
+    async def collect():
+        return [frame async for frame in pcm_frames(pcm, 24000, 1)]
+
+    frames = asyncio.run(collect())
+    assert len(frames) == 50
+    assert {f.samples_per_channel for f in frames} == {480}
+
+
+def test_load_and_say(tmp_path) -> None:
+    engine = _engine()
+    PhraseCache(tmp_path)._write(tts_key(engine, "Hello!"), bytes(960))
+    cache = PhraseCache(tmp_path)
+    assert cache.load() == 1
+
+    calls = []
+    session = SimpleNamespace(
+        tts=engine, say=lambda text, **kwargs: calls.append((text, kwargs))
+    )
+    cache.say(session, "Hello!")
+    cache.say(session, "Goodbye!")
+    assert "audio" in calls[0][1]
+    assert calls[1] == ("Goodbye!", {})
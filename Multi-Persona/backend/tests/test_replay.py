@@ -0,0 +1,68 @@
+import asyncio
+from pathlib import Path
+
+from livekit.agents import llm
+
+from fake_plugins import FALLBACK_REPLY, FakeLLM
+from personas import PERSONAS
+from replay import load_conversation, regressions, replay
+
+CONVERSATIONS = Path(__file__).resolve().parents[1] / "bench" / "conversations"
+
+
+def test_fake_llm_plays_script_then_falls_back() -> None:
+    fake = FakeLLM()
+    fake.script(
+        [{"tool_calls": [{"name": "view_cart"}]}, {"text": "Your cart is empty."}]
+    )
+
+    async def collect():
+        chunks = []
+        for _ in range(3):
+            async with fake.chat(chat_ctx=llm.ChatContext.empty()) as stream:
+                chunks.append([chunk async for chunk in stream])
+        return chunks
+
+    calls, answer, fallback = asyncio.run(collect())
+    assert [
+        c.name for chunk in calls if chunk.delta for c in chunk.delta.tool_calls
+    ] == ["view_cart"]
+    assert "".join(c.delta.content for c in answer if c.delta) == "Your cart is empty."
+    assert "".join(c.delta.content for c in fallback if c.delta) == FALLBACK_REPLY
+    assert fake.unscripted == 1
+
+
+def test_replay_runs_the_persona_tools() -> None:
+    conv = load_conversation(CONVERSATIONS / "grocery.json")
+    orders = PERSONAS["grocery"].backend_dir / "orders"
+    before = sorted(orders.iterdir())
+
+    result = asyncio.run(replay(conv, "timing"))
+
+    tools = [[call["name"] for call in turn["tools"]] for turn in result["turns"][1:]]
+    expected = [
+        [call["name"] for reply in turn["llm"] for call in reply.get("tool_calls", [])]
+        for turn in conv.turns
+    ]
+    assert tools == expected
+    assert result["unscripted_llm_calls"] == 0
+    assert not any(call["error"] for turn in result["turns"] for call in turn["tools"])
+    # place_order wrote to the sandbox, not to the persona's data
+    assert sorted(orders.iterdir()) == before
+
+
+def test_regressions() -> None:
+    def report(cpu: float, unscripted: int = 0) -> dict:
+        summary = {key: {"p50": 10.0} for key in ("own_ms", "peak_kb")}
+        summary.update(
+            cpu_ms={"p50": cpu}, unscripted_llm_calls=unscripted, tool_errors=0
+        )
+        return {"conversations": {"grocery": {"summary": summary}}}
+
+    assert regressions(report(20.0), report(18.0), tolerance=0.3) == []
+    assert regressions(report(40.0), report(18.0), tolerance=0.3) == [
+        "grocery: cpu_ms p50 18.0 -> 40.0"
+    ]
+    assert regressions(report(18.0, unscripted=1), report(18.0), tolerance=0.3) == [
+        "grocery: unscripted_llm_calls 0 -> 1"
+    ]
@@ -0,0 +1,74 @@
+import asyncio
+
+import speech_text
+from clause_tokenizer import ClauseTokenizer
+from speech_text import SpeechNormalizer, normalize
+
+
+def test_tool_result_markup_is_spoken_plainly() -> None:
+    listing = (
+        "1. **Blue Denim Shirt** (Levi's)\n   Price: ₹1,299 | Rating: ⭐⭐⭐⭐☆ (4.2)\n"
+    )
+    assert (
+        normalize(listing)
+        == "1. Blue Denim Shirt (Levi's). Price: 1,299 rupees, Rating: 4.2 stars."
+    )
+    cart = "• Milk - ₹60 per litre\n• Bread - Rs. 40 per loaf\n\n🎊 **Total amount:** ₹100\n"
+    assert normalize(cart) == (
+        "Milk - 60 rupees per litre. Bread - 40 rupees per loaf. Total amount: 100 rupees."
+    )
+    assert (
+        normalize("Rated ⭐⭐⭐, a ⭐ pick!  Clothing → Shirts 🛍️")
+        == "Rated 3 stars, a pick! Clothing, Shirts"
+    )
+    assert normalize("🎉") == ""
+
+
+def test_amounts_and_products_keep_their_punctuation() -> None:
+    assert normalize("**Total:** ₹250, 3 items") == "Total: 250 rupees, 3 items"
+    assert normalize("Rs. 1,29,999.50 or ₹1299") == "1,29,999.50 rupees or 1299 rupees"
+    assert normalize("5 * 3 is *fifteen*, 2*4 is 8") == "5 * 3 is fifteen, 2*4 is 8"
+
+
+def test_plain_text_is_unchanged() -> None:
+    text = "Namaste! Would you like snake_case or 5 apples, Mr. Rao?"
+    assert normalize(text) == text
+
+
+def test_stream_counts_characters_saved() -> None:
+    normalizer = SpeechNormalizer(ClauseTokenizer(first_max_words=6), agent="shop")
+    reply = "Your **order** is placed 🎉 Total: ₹2,598. It ships tomorrow! 📦"
+
+    async def run():
+        stream = normalizer.stream()
+        for word in reply.split(" "):
+            stream.push_text(word + " ")
+        stream.end_input()
+        return [ev.token async for ev in stream]
+
+    chunks = asyncio.run(run())
+    assert (
+        " ".join(chunks)
+        == "Your order is placed Total: 2,598 rupees. It ships tomorrow!"
+    )
+    assert normalizer.characters_out == sum(len(c) for c in chunks)
+    assert (
+        normalizer.characters_in - normalizer.characters_out
+        == normalizer.characters_saved
+        > 0
+    )
+
+
+def test_counts_without_the_livekit_speech_context(monkeypatch) -> None:
+    # A LiveKit release without the private context variable
+    monkeypatch.setattr(speech_text, "_SpeechHandleContextVar", None)
+    normalizer = SpeechNormalizer(ClauseTokenizer(first_max_words=6), agent="shop")
+
+    async def run():
+        stream = normalizer.stream()
+        stream.push_text("Total: **₹250**. Thanks!")
+        stream.end_input()
+        return [ev.token async for ev in stream]
+
+    assert asyncio.run(run()) == ["Total: 250 rupees.", "Thanks!"]
+    assert normalizer.characters_out > 0 and normalizer.speeches == {}
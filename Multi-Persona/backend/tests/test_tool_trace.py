@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+import types
+
+import pytest
+from livekit.agents import Agent, function_tool, llm
+
+import tool_trace
+
+
+def _persona_module() -> types.ModuleType:
+    module = types.ModuleType("persona_test")
+
+    class ShopAgent(Agent):
+        def __init__(self) -> None:
+            super().__init__(instructions="Sell things.")
+
+        @function_tool
+        async def search(self, query: str, limit: int = 3):
+            """Search the catalog."""
+            time.sleep(0.02)  # a blocking file read
+            await asyncio.sleep(0.05)
+            return f"{limit} results for {query}"
+
+        @function_tool
+        async def checkout(self):
+            """Place the order."""
+            raise ValueError("cart is empty")
+
+    ShopAgent.__module__ = module.__name__
+    module.ShopAgent = ShopAgent
+    return module
+
+
+def test_instrumented_tools_are_traced(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(tool_trace, "TRACE_DIR", tmp_path)
+    module = _persona_module()
+    assert tool_trace.instrument_tools(module, "shop") == [
+        "ShopAgent.search",
+        "ShopAgent.checkout",
+    ]
+    # Loading the persona again does not wrap twice
+    assert tool_trace.instrument_tools(module, "shop") == []
+
+    async def run() -> None:
+        agent = module.ShopAgent()
+        assert {llm.tool_context.get_function_info(t).name for t in agent.tools} == {
+            "search",
+            "checkout",
+        }
+        assert await agent.search("rice") == "3 results for rice"
+        with pytest.raises(ValueError):
+            await agent.checkout()
+        await tool_trace.flush()
+
+    asyncio.run(run())
+    # Written from worker threads, so the lines are not necessarily in call order
+    records = [
+        json.loads(line) for line in (tmp_path / "local.jsonl").read_text().splitlines()
+    ]
+    search, checkout = sorted(records, key=lambda r: r["tool"], reverse=True)
+    assert search["tool"] == "search" and search["arg_chars"] == {"query": 6}
+    assert search["wall_ms"] >= 70 and 20 <= search["blocking_ms"] < 60
+    assert search["result_chars"] == len("3 results for rice")
+    assert checkout["error"] == "ValueError: cart is empty"
+
+
+def test_aggregate_per_tool() -> None:
+    records = [
+        {
+            "agent": "shop",
+            "tool": "search",
+            "wall_ms": ms,
+            "blocking_ms": ms,
+            "cpu_ms": ms,
+            "max_step_ms": ms,
+            "result_chars": 10,
+            "error": None,
+        }
+        for ms in (0.2, 3, 40)
+    ]
+    report = tool_trace.aggregate(records)
+    assert report["shop.search"]["calls"] == 3
+    assert report["shop.search"]["blocking_ms"]["max"] == 40
+    assert report["shop.search"]["blocking_histogram"] == {
+        "<=0.5": 1,
+        "<=5": 1,
+        "<=50": 1,
+    }
+
+
+def test_untraceable_tools_are_an_error() -> None:
+    module = types.ModuleType("persona_sync")
+
+    class SyncAgent(Agent):
+        @function_tool
+        def lookup(self, order_id: str):
+            """Look an order up."""
+            return order_id
+
+    SyncAgent.__module__ = module.__name__
+    module.SyncAgent = SyncAgent
+    with pytest.raises(TypeError, match=r"SyncAgent\.lookup"):
+        tool_trace.instrument_tools(module, "shop")